@@ -3,7 +3,12 @@
 # Assumes a SQLite database for demonstration, but can be adapted for other backends.
 
 import json
+import os
 import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapy_crawlers'))
+from bulk_loader import BulkLoader, iter_json_array
 
 # Paths to JSON files
 LEAGUES_JSON = 'oberfranken_leagues_2003_2024.json'
@@ -31,29 +36,27 @@ c.execute('''CREATE TABLE IF NOT EXISTS players (
 )''')
 conn.commit()
 
-# Ingest leagues
+# Ingest leagues (streamed, batched executemany in one transaction)
 def ingest_leagues():
-    with open(LEAGUES_JSON, 'r', encoding='utf-8') as f:
-        leagues = json.load(f)
-    for league in leagues:
-        c.execute('''INSERT OR REPLACE INTO leagues (liga_id, season, name, bezirk) VALUES (?, ?, ?, ?)''',
-                  (league['liga_id'], league['season'], league['name'], league['bezirk']))
-    conn.commit()
-
-# Ingest players
+    with BulkLoader(conn) as loader:
+        loader.register('leagues', '''INSERT OR REPLACE INTO leagues (liga_id, season, name, bezirk) VALUES (?, ?, ?, ?)''')
+        for league in iter_json_array(LEAGUES_JSON):
+            loader.add('leagues', (league['liga_id'], league['season'], league['name'], league['bezirk']))
+    print(f"Leagues: {loader.summary()}")
+
+# Ingest players (streamed from the 'players' list, batched executemany in one transaction)
 def ingest_players():
-    with open(COMPREHENSIVE_JSON, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    for player in data.get('players', []):
-        season = player.get('season')
-        liga_id = player.get('liga_id')
-        league_name = player.get('league_name')
-        for stat in player.get('statBesteWerferArchiv', []):
-            player_name = stat.get('name')
-            stats_json = json.dumps(stat)
-            c.execute('''INSERT INTO players (season, liga_id, league_name, player_name, stats_json) VALUES (?, ?, ?, ?, ?)''',
-                      (season, liga_id, league_name, player_name, stats_json))
-    conn.commit()
+    with BulkLoader(conn) as loader:
+        loader.register('players', '''INSERT INTO players (season, liga_id, league_name, player_name, stats_json) VALUES (?, ?, ?, ?, ?)''')
+        for player in iter_json_array(COMPREHENSIVE_JSON, key='players'):
+            season = player.get('season')
+            liga_id = player.get('liga_id')
+            league_name = player.get('league_name')
+            for stat in player.get('statBesteWerferArchiv', []):
+                player_name = stat.get('name')
+                stats_json = json.dumps(stat)
+                loader.add('players', (season, liga_id, league_name, player_name, stats_json))
+    print(f"Players: {loader.summary()}")
 
 if __name__ == '__main__':
     ingest_leagues()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Action=106 League Index
+
+Offline batch extractor for the saved action_106_page_{page}_{season}_startrow_{n}.html
+league lists. Instead of building a BeautifulSoup tree per page (as
+parse_leagues_from_page / extract_liga_ids_from_page do while crawling), each
+page is memory-mapped and scanned once with precompiled byte-level regexes:
+
+- a single tokenizer pass finds <tr> boundaries and sportItem cells
+- only the six text cells of a league row are decoded; the action cell is
+  searched for the liga_id link as raw bytes
+- cell texts follow BeautifulSoup's get_text(strip=True), so the fields are
+  the same as the crawlers' parsers produce
+
+The pages are indexed in a process pool and merged in (season, page, startrow)
+order, keeping the first row of every (season, liga_id).
+
+Usage:
+    python action106_league_index.py                     # all pages, all Bezirke
+    python action106_league_index.py --bezirk Oberfranken --output leagues.json
+"""
+
+import argparse
+import glob
+import html
+import json
+import mmap
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+
+PAGE_PATTERN = 'action_106_page_*_*_startrow_*.html'
+DEFAULT_OUTPUT = 'action_106_league_index.json'
+
+# One pass over the page: row starts and sportItemOdd/sportItemEven cells
+ROW_TOKEN_RE = re.compile(
+    rb'(<tr[\s>])|<td[^>]*\bclass="sportItem(?:Odd|Even)"[^>]*>(.*?)</td\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+LIGA_LINK_RE = re.compile(rb'href=["\']([^"\']*?liga_id=(\d+)[^"\']*)["\']', re.IGNORECASE)
+SAISON_ID_RE = re.compile(rb'saison_id=(\d+)')
+MARKUP_RE = re.compile(rb'<!--.*?-->|<[^>]*>', re.DOTALL)
+FILENAME_RE = re.compile(r'action_106_page_(\d+)_(\d{4})_startrow_(\d+)\.html$')
+
+
+class LeagueListing(NamedTuple):
+    """One league row of an Action=106 league list"""
+    liga_id: str
+    season: Optional[int]
+    spielklasse: str
+    altersklasse: str
+    geschlecht: str
+    bezirk: str
+    kreis: str
+    name: str
+    href: str
+    source: str
+
+    def to_league(self) -> Dict:
+        """Record in the format of BeastOberfrankenCrawler.parse_leagues_from_page"""
+        return {
+            'id': self.liga_id,
+            'season': self.season,
+            'spielklasse': self.spielklasse,
+            'altersklasse': self.altersklasse,
+            'geschlecht': self.geschlecht,
+            'bezirk': self.bezirk,
+            'kreis': self.kreis,
+            'full_name': self.name
+        }
+
+    def to_liga_info(self) -> Dict:
+        """Record in the format of paginated_historical_crawler.extract_liga_ids_from_page"""
+        return {'liga_id': self.liga_id, 'name': self.name, 'href': self.href}
+
+
+def page_sort_key(path: str):
+    """(season, page, startrow) of a saved page; unknown names sort last"""
+    match = FILENAME_RE.search(os.path.basename(path))
+    if not match:
+        return (float('inf'), 0, 0, path)
+    page, season, startrow = (int(group) for group in match.groups())
+    return (season, page, startrow, path)
+
+
+def _cell_text(raw: bytes) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True) for a cell's inner markup"""
+    return ''.join(
+        html.unescape(piece.decode('utf-8', 'replace')).strip()
+        for piece in MARKUP_RE.split(raw)
+    )
+
+
+def _iter_rows(buffer):
+    """Raw sportItem cells of every table row"""
+    cells = []
+    for match in ROW_TOKEN_RE.finditer(buffer):
+        if match.group(1) is not None:
+            if cells:
+                yield cells
+            cells = []
+        else:
+            cells.append(match.group(2))
+    if cells:
+        yield cells
+
+
+def parse_league_rows(buffer, season: Optional[int] = None, source: str = '') -> List[LeagueListing]:
+    """
+    League rows of an Action=106 page held in bytes or an mmap. Rows need the
+    six text cells and a liga_id link; the season falls back to the link's
+    saison_id when it is not given.
+    """
+    listings = []
+    for cells in _iter_rows(buffer):
+        if len(cells) < 6:
+            continue
+        link = None
+        for raw in cells:
+            link = LIGA_LINK_RE.search(raw)
+            if link:
+                break
+        if not link:
+            continue
+
+        href = html.unescape(link.group(1).decode('utf-8', 'replace'))
+        row_season = season
+        if row_season is None:
+            saison = SAISON_ID_RE.search(link.group(1))
+            row_season = int(saison.group(1)) if saison else None
+
+        spielklasse, altersklasse, geschlecht, bezirk, kreis, name = (_cell_text(raw) for raw in cells[:6])
+        listings.append(LeagueListing(
+            liga_id=link.group(2).decode('ascii'),
+            season=row_season,
+            spielklasse=spielklasse,
+            altersklasse=altersklasse,
+            geschlecht=geschlecht,
+            bezirk=bezirk,
+            kreis=kreis,
+            name=name,
+            href=href,
+            source=source,
+        ))
+    return listings
+
+
+def index_file(path: str) -> List[LeagueListing]:
+    """Memory-map one saved page and extract its league rows"""
+    match = FILENAME_RE.search(os.path.basename(path))
+    season = int(match.group(2)) if match else None
+    source = os.path.basename(path)
+
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []  # mmap cannot map empty files
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return parse_league_rows(buffer, season=season, source=source)
+
+
+def find_pages(directories: Iterable[str] = None, pattern: str = PAGE_PATTERN) -> List[str]:
+    """Saved pages in the given directories (default: cwd and repo root), deduplicated"""
+    directories = directories or [os.getcwd(), REPO_ROOT]
+    paths = {}
+    for directory in directories:
+        for path in glob.glob(os.path.join(directory, pattern)):
+            paths.setdefault(os.path.basename(path), os.path.abspath(path))
+    return sorted(paths.values(), key=page_sort_key)
+
+
+def index_archive(paths: List[str], workers: Optional[int] = None,
+                  bezirk: Optional[str] = None) -> List[LeagueListing]:
+    """
+    Index all pages in a process pool. Results are merged in (season, page,
+    startrow) order; the first row of every (season, liga_id) wins.
+    """
+    paths = sorted(paths, key=page_sort_key)
+    if not paths:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+
+    if workers == 1:
+        per_file = [index_file(path) for path in paths]
+    else:
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            per_file = list(pool.map(index_file, paths, chunksize=chunksize))
+
+    listings = []
+    seen = set()
+    for file_listings in per_file:
+        for listing in file_listings:
+            if bezirk and listing.bezirk.lower() != bezirk.lower():
+                continue
+            key = (listing.season, listing.liga_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            listings.append(listing)
+    return listings
+
+
+def save_index(listings: List[LeagueListing], output_path: str, files: int) -> str:
+    by_season = {}
+    for listing in listings:
+        by_season.setdefault(str(listing.season), []).append(listing._asdict())
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': datetime.now().isoformat(),
+            'files': files,
+            'total_leagues': len(listings),
+            'seasons': by_season
+        }, f, indent=2, ensure_ascii=False)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline league index of the saved Action=106 pages')
+    parser.add_argument('directories', nargs='*', help='Directories with saved pages (default: cwd and repo root)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--bezirk', help='Only keep leagues of this Bezirk, e.g. Oberfranken')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON index file')
+    args = parser.parse_args()
+
+    paths = find_pages(args.directories)
+    if not paths:
+        print(f"❌ No {PAGE_PATTERN} pages found")
+        return
+
+    started = time.perf_counter()
+    listings = index_archive(paths, workers=args.workers, bezirk=args.bezirk)
+    elapsed = time.perf_counter() - started
+
+    save_index(listings, args.output, len(paths))
+
+    seasons = sorted({listing.season for listing in listings if listing.season is not None})
+    print(f"📂 Indexed {len(paths)} pages in {elapsed * 1000:.0f}ms")
+    print(f"🏀 {len(listings)} leagues across {len(seasons)} seasons"
+          + (f" ({seasons[0]}-{seasons[-1]})" if seasons else ''))
+    print(f"💾 Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
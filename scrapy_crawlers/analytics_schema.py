@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Analytics Schema Tuning
+
+Secondary indexes and statistics for basketball_analytics.db, derived from the
+queries of enhanced_basketball_api.py:
+
+- matches.total_points (home_score + guest_score) is a generated column, so
+  "completed" filters and the top scoring games can use an index instead of
+  computing the sum for every row
+- covering indexes for the match listing filters (season, league, team), the
+  (kickoff_date, match_id) keyset ordering and the per-league / per-team
+  aggregates
+- ANALYZE afterwards so the planner picks them
+
+tune_analytics_db() is idempotent; the builder calls it after loading, and
+it can be run on an existing database from the command line.
+check_query_plans.py verifies that no API query scans the matches table.
+"""
+
+import argparse
+import sqlite3
+import time
+
+TOTAL_POINTS_EXPRESSION = 'COALESCE(home_score, 0) + COALESCE(guest_score, 0)'
+
+ANALYTICS_INDEXES = {
+    # Match listing: unfiltered, per season, per league, per team, newest first;
+    # ending in (kickoff_date, match_id) so a keyset page is one range seek
+    'idx_matches_kickoff': 'matches (kickoff_date, match_id)',
+    'idx_matches_season_kickoff': 'matches (season_year, kickoff_date, match_id)',
+    'idx_matches_league_kickoff': 'matches (league_id, kickoff_date, match_id)',
+    'idx_matches_league_season': 'matches (league_id, season_year, kickoff_date, match_id)',
+    'idx_matches_home_team': 'matches (home_team_id, kickoff_date, match_id)',
+    'idx_matches_guest_team': 'matches (guest_team_id, kickoff_date, match_id)',
+    # Completed counts and top scoring games
+    'idx_matches_total_points': 'matches (total_points)',
+    # Per-league aggregates of /api/leagues (covering)
+    'idx_matches_league_points': 'matches (league_id, total_points, match_id)',
+    # (season_year, league_id) is the unique key idx_seasons_key (ensure_seasons_key)
+    'idx_seasons_league': 'seasons (league_id, season_year)',
+    # Team history and the latest season join of /api/teams
+    'idx_team_season_stats_team': 'team_season_stats (team_permanent_id, season_year)',
+    # Team counts per season of /api/seasons (covering)
+    'idx_team_season_stats_season': 'team_season_stats (season_year, team_permanent_id)',
+    # Top teams by differential / ppg / wins
+    'idx_team_season_stats_differential': 'team_season_stats (point_differential)',
+    'idx_team_season_stats_ppg': 'team_season_stats (avg_points_for)',
+    'idx_team_season_stats_wins': 'team_season_stats (wins)',
+}
+
+
+def _columns(conn: sqlite3.Connection, table: str):
+    # table_xinfo also lists generated columns
+    return {row[1] for row in conn.execute(f'PRAGMA table_xinfo({table})')}
+
+
+def ensure_total_points(conn: sqlite3.Connection) -> bool:
+    """
+    Add matches.total_points to databases built before it existed. SQLite can
+    only add VIRTUAL generated columns to an existing table; new databases
+    create it STORED. Returns True if the column was added.
+    """
+    if 'total_points' in _columns(conn, 'matches'):
+        return False
+    conn.execute(f'''
+        ALTER TABLE matches ADD COLUMN total_points INTEGER
+        GENERATED ALWAYS AS ({TOTAL_POINTS_EXPRESSION}) VIRTUAL
+    ''')
+    return True
+
+
+def ensure_seasons_key(conn: sqlite3.Connection) -> bool:
+    """
+    Unique (season_year, league_id) key on seasons, so a rebuild updates a
+    league season instead of appending it again. Earlier builds may have
+    stored duplicates; the latest row of each key is kept. Returns True if
+    the key was just added.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_seasons_key'").fetchone():
+        return False
+    conn.execute('''
+        DELETE FROM seasons WHERE id NOT IN (
+            SELECT MAX(id) FROM seasons GROUP BY season_year, league_id
+        )
+    ''')
+    # Superseded by the unique key on the same columns
+    conn.execute('DROP INDEX IF EXISTS idx_seasons_year')
+    conn.execute('CREATE UNIQUE INDEX idx_seasons_key ON seasons (season_year, league_id)')
+    return True
+
+
+def create_indexes(conn: sqlite3.Connection):
+    existing = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index'"))
+    for name, definition in ANALYTICS_INDEXES.items():
+        sql = f'CREATE INDEX {name} ON {definition}'
+        if existing.get(name, sql) != sql:
+            # Definition changed since the database was tuned: rebuild it
+            conn.execute(f'DROP INDEX {name}')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+
+
+def tune_analytics_db(conn: sqlite3.Connection):
+    """Generated column, indexes and planner statistics"""
+    started = time.perf_counter()
+    if ensure_total_points(conn):
+        print("🔧 Added generated column matches.total_points")
+    if ensure_seasons_key(conn):
+        print("🔧 Added unique key seasons (season_year, league_id)")
+    create_indexes(conn)
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.commit()
+    print(f"📈 {len(ANALYTICS_INDEXES)} indexes ready, statistics analyzed "
+          f"({time.perf_counter() - started:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Add indexes and statistics to basketball_analytics.db')
+    parser.add_argument('--db', default='basketball_analytics.db', help='Database file')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        tune_analytics_db(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Async Fetch Engine for basketball-bund.net crawlers
+
+Shared asyncio/aiohttp fetcher used by the requests-based Oberfranken crawlers
+to fan out league and statistik requests concurrently while keeping the load
+on the site within a fixed budget:
+
+- pooled keep-alive connections (one aiohttp session per run)
+- per-host concurrency limit
+- token-bucket politeness rate per host
+- retry with exponential backoff on 5xx/429 and timeouts
+- optional http_response_cache.ResponseCache lookups with conditional revalidation
+
+Crawlers keep their synchronous structure: they build a list of FetchRequest
+objects, call fetch_all() and post-process the FetchResponse objects, which
+expose the same status_code/text/content attributes as requests.Response.
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+
+# Default load budget for basketball-bund.net
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_REQUESTS_PER_SECOND = 3.0
+DEFAULT_BURST = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 1.0
+DEFAULT_TIMEOUT = 30
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchRequest:
+    """A single request to be executed by the engine"""
+
+    def __init__(self, url: str, method: str = 'GET', data: Optional[Dict] = None,
+                 headers: Optional[Dict] = None, meta: Optional[Dict] = None):
+        self.url = url
+        self.method = method.upper()
+        self.data = data
+        self.headers = headers or {}
+        self.meta = meta or {}
+
+
+class FetchResponse:
+    """Minimal requests.Response look-alike returned by the engine"""
+
+    def __init__(self, request: FetchRequest, status_code: int = 0, content: bytes = b'',
+                 encoding: Optional[str] = None, elapsed: float = 0.0,
+                 attempts: int = 0, error: Optional[str] = None,
+                 headers: Optional[Dict] = None):
+        self.request = request
+        self.url = request.url
+        self.meta = request.meta
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.error = error
+        self.headers = headers or {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+
+    def header(self, name: str) -> Optional[str]:
+        """Case-insensitive response header lookup"""
+        for key, value in self.headers.items():
+            if key.lower() == name.lower():
+                return value
+        return None
+
+
+class TokenBucket:
+    """Async token bucket limiting the request rate to one host"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncFetchEngine:
+    """Connection-pooled, rate-limited concurrent fetcher"""
+
+    def __init__(self, headers: Optional[Dict] = None, cookies: Optional[Dict] = None,
+                 max_per_host: int = DEFAULT_MAX_PER_HOST,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 burst: int = DEFAULT_BURST,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 cache=None,
+                 logger=None):
+        self.headers = dict(headers or {})
+        self.cookies = dict(cookies or {})
+        self.max_per_host = max_per_host
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.cache = cache
+        self.logger = logger
+
+        self.session = None
+        self.host_semaphores = {}
+        self.host_buckets = {}
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'cache_hits': 0,
+            'bytes': 0,
+        }
+
+    @classmethod
+    def from_requests_session(cls, session, **options):
+        """Build an engine carrying over headers and cookies of a requests.Session"""
+        headers = {k: v for k, v in session.headers.items() if k.lower() != 'content-type'}
+        cookies = {cookie.name: cookie.value for cookie in session.cookies}
+        options.setdefault('cache', getattr(session, 'cache', None))
+        return cls(headers=headers, cookies=cookies, **options)
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit_per_host=self.max_per_host, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            cookies=self.cookies,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    def _host_limits(self, url: str):
+        host = urlsplit(url).netloc
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.max_per_host)
+            self.host_buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+        return self.host_semaphores[host], self.host_buckets[host]
+
+    async def fetch(self, request: FetchRequest) -> FetchResponse:
+        """Execute one request, retrying 5xx/429 responses and timeouts"""
+        entry = None
+        headers = request.headers
+        if self.cache is not None:
+            entry = self.cache.lookup(request.method, request.url, request.data)
+            if entry is not None and entry.fresh:
+                self.stats['cache_hits'] += 1
+                return FetchResponse(request, entry.status, entry.content, encoding=entry.encoding,
+                                     headers=entry.headers)
+            if entry is not None:
+                headers = {**headers, **entry.conditional_headers()}
+
+        semaphore, bucket = self._host_limits(request.url)
+        status_code = 0
+        error = None
+
+        for attempt in range(1, self.max_retries + 2):
+            await bucket.acquire()
+            started = time.monotonic()
+            try:
+                async with semaphore:
+                    self.stats['requests'] += 1
+                    async with self.session.request(
+                        request.method, request.url,
+                        data=request.data, headers=headers
+                    ) as response:
+                        content = await response.read()
+                        status_code = response.status
+                        if entry is not None and status_code == 304:
+                            self.cache.mark_revalidated(entry, request.method, request.url, request.data)
+                            return FetchResponse(request, entry.status, entry.content, encoding=entry.encoding,
+                                                 elapsed=time.monotonic() - started, attempts=attempt,
+                                                 headers=entry.headers)
+                        if status_code not in RETRY_STATUSES:
+                            self.stats['bytes'] += len(content)
+                            encoding = response.get_encoding()
+                            if self.cache is not None:
+                                self.cache.store(request.method, request.url, request.data, status_code,
+                                                 dict(response.headers), content, encoding)
+                            return FetchResponse(
+                                request, status_code, content,
+                                encoding=encoding,
+                                elapsed=time.monotonic() - started,
+                                attempts=attempt,
+                                headers=dict(response.headers),
+                            )
+                        error = f"HTTP {status_code}"
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                error = f"{e.__class__.__name__}: {e}"
+
+            if attempt <= self.max_retries:
+                self.stats['retries'] += 1
+                delay = self.backoff_factor * (2 ** (attempt - 1)) + random.uniform(0, self.backoff_factor)
+                if self.logger:
+                    self.logger.warning(f"Retry {attempt}/{self.max_retries} for {request.url} in {delay:.1f}s ({error})")
+                await asyncio.sleep(delay)
+
+        self.stats['failures'] += 1
+        if self.logger:
+            self.logger.error(f"Giving up on {request.url}: {error}")
+        return FetchResponse(request, status_code, attempts=self.max_retries + 1, error=error)
+
+    async def fetch_many(self, requests: List[FetchRequest]) -> List[FetchResponse]:
+        """Fetch all requests concurrently; results keep the input order"""
+        return await asyncio.gather(*(self.fetch(request) for request in requests))
+
+
+def fetch_all(requests: List[FetchRequest], session=None, **options) -> List[FetchResponse]:
+    """
+    Synchronous entry point for the crawlers.
+
+    If a requests.Session is given, its headers and cookies (including the
+    server-side session established by the Action=100 setup call) are reused,
+    as is its response cache when it is an http_response_cache.CachedSession.
+    """
+    if not requests:
+        return []
+
+    async def run():
+        if session is not None:
+            engine = AsyncFetchEngine.from_requests_session(session, **options)
+        else:
+            engine = AsyncFetchEngine(**options)
+        async with engine:
+            return await engine.fetch_many(requests)
+
+    return asyncio.run(run())
@@ -3,21 +3,33 @@ Basketball Statistics API
 Provides REST endpoints for custom stats and player card generation
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
+import argparse
 import json
 import os
 from basketball_stats_engine import BasketballStatsEngine
 from team_analyzer import TeamAnalyzer
-import tempfile
+from stat_formula import FormulaError
+from dashboard_charts import DashboardCache
+from pdf_export import DEFAULT_EXPORT_DIR, PdfExportJobs
+from streaming_export import EXPORT_FORMATS, ExportError, collect_fieldnames, gzip_chunks, iter_export
+import re
 import base64
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend access
 
-# Initialize the stats engine and team analyzer
+# Initialize the stats engine and team analyzer (sharing the engine's data)
 stats_engine = BasketballStatsEngine('real_players_extracted.json')
-team_analyzer = TeamAnalyzer('real_players_extracted.json')
+team_analyzer = TeamAnalyzer(stats_engine)
+pdf_jobs = PdfExportJobs()
+dashboard_cache = DashboardCache()
+
+@app.before_request
+def reload_players_data():
+    """Pick up a changed player JSON before any route reads the engine"""
+    stats_engine.reload_if_changed()
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -32,11 +44,11 @@ def calculate_advanced_stats():
         player_name = data.get('player_name')
         
         # Find player
-        player = next((p for p in stats_engine.players_data if p.get('name', '').lower() == player_name.lower()), None)
+        player = stats_engine.player_index.find(player_name)
         if not player:
             return jsonify({'error': 'Player not found'}), 404
         
-        advanced_stats = stats_engine.calculate_advanced_stats(player)
+        advanced_stats = stats_engine.get_advanced_stats(player)
         
         return jsonify({
             'player': player,
@@ -57,30 +69,15 @@ def calculate_custom_stat():
         if not formula:
             return jsonify({'error': 'Formula is required'}), 400
         
-        results = []
-        
-        for player in stats_engine.players_data:
-            try:
-                result = stats_engine.create_custom_stat(formula, player)
-                if result is not None:
-                    results.append({
-                        'name': player.get('name', 'Unknown'),
-                        'team': player.get('team', 'Unknown'),
-                        'value': result,
-                        'rank': 0  # Will be set after sorting
-                    })
-            except Exception as e:
-                print(f"Error calculating stat for {player.get('name')}: {e}")
-        
-        # Sort by value descending and assign ranks
-        results.sort(key=lambda x: x['value'], reverse=True)
-        for i, result in enumerate(results):
-            result['rank'] = i + 1
+        try:
+            results = stats_engine.rank_custom_stat(formula, limit=100)
+        except FormulaError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'stat_name': stat_name,
             'formula': formula,
-            'results': results[:100]  # Limit to top 100
+            'results': results  # Top 100
         })
     
     except Exception as e:
@@ -127,19 +124,16 @@ def generate_bulk_cards():
         
         if method == 'top':
             # Get top players by points
-            sorted_players = sorted(stats_engine.players_data, 
-                                  key=lambda p: float(p.get('points', 0)), reverse=True)
-            players_to_process = sorted_players[:count]
+            players_to_process = stats_engine.player_index.top(count, 'points')
         elif method == 'category' and category:
-            players_to_process = [p for p in stats_engine.players_data 
-                                if p.get('endpoint') == category][:20]
+            players_to_process = stats_engine.player_index.by_endpoint(category, limit=20)
         elif method == 'team' and team:
-            players_to_process = [p for p in stats_engine.players_data 
-                                if p.get('team') == team][:20]
+            players_to_process = stats_engine.player_index.by_team(team, limit=20)
         
         cards = []
-        for player in players_to_process:
-            card_data = stats_engine.generate_player_card(player.get('name'), style=style)
+        card_results = stats_engine.generate_player_cards(
+            [player.get('name') for player in players_to_process], style=style)
+        for player, card_data in zip(players_to_process, card_results):
             if card_data:
                 cards.append({
                     'image_base64': card_data['image_base64'],
@@ -155,29 +149,113 @@ def generate_bulk_cards():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/export/csv', methods=['POST'])
-def export_csv():
-    """Export filtered player data as CSV"""
+@app.route('/api/export/<export_format>', methods=['GET', 'POST'])
+def export_players(export_format):
+    """
+    Stream player data as CSV, NDJSON or Parquet (gzip if the client accepts it).
+    Filters: team, season_id, liga_id, category; a POSTed 'players' list is
+    exported as given.
+    """
     try:
-        data = request.get_json()
-        players = data.get('players', stats_engine.players_data)
-        filename = data.get('filename', 'basketball_export')
+        data = request.get_json(silent=True) or {}
+        params = {**request.args.to_dict(), **data}
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"Unsupported format '{export_format}'",
+                            'formats': list(EXPORT_FORMATS)}), 400
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            export_path = stats_engine.export_table_data(players, 'csv', filename)
-            
-        return send_file(export_path, as_attachment=True, download_name=f"{filename}.csv")
+        if 'players' in data:
+            players = data['players']
+        else:
+            players = list(stats_engine.player_index.filter(
+                team=params.get('team'),
+                season_id=params.get('season_id'),
+                liga_id=params.get('liga_id'),
+                endpoint=params.get('category')
+            ))
+        chunks = iter_export(players, export_format, collect_fieldnames(players))
+        
+        filename = re.sub(r'[^\w.-]+', '_', str(params.get('filename', 'basketball_export')))
+        headers = {
+            'Content-Disposition': f'attachment; filename="{filename}.{EXPORT_FORMATS[export_format]["extension"]}"',
+            'Vary': 'Accept-Encoding'
+        }
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            chunks = gzip_chunks(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        
+        return Response(chunks, content_type=EXPORT_FORMATS[export_format]['mimetype'], headers=headers)
+    
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/export/pdf/jobs', methods=['POST'])
+def start_pdf_export():
+    """
+    Start a background PDF export. Filters: team, season_id, liga_id, category;
+    options: columns, sort_by, ascending, filename
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        players = list(stats_engine.player_index.filter(
+            team=data.get('team'),
+            season_id=data.get('season_id'),
+            liga_id=data.get('liga_id'),
+            endpoint=data.get('category')
+        ))
+        filename = re.sub(r'[^\w.-]+', '_', str(data.get('filename', 'basketball_export')))
+        job_id = pdf_jobs.submit(
+            players,
+            filename=filename,
+            columns=data.get('columns'),
+            sort_by=data.get('sort_by'),
+            ascending=bool(data.get('ascending', False))
+        )
+        return jsonify({
+            'job_id': job_id,
+            'rows': len(players),
+            'status_url': f"/api/export/pdf/jobs/{job_id}",
+            'download_url': f"/api/export/pdf/jobs/{job_id}/download"
+        }), 202
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/export/pdf/jobs/<job_id>', methods=['GET'])
+def get_pdf_export_status(job_id):
+    """Progress of a background PDF export"""
+    job = pdf_jobs.status(job_id)
+    if not job:
+        return jsonify({'error': 'Export job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/export/pdf/jobs/<job_id>/download', methods=['GET'])
+def download_pdf_export(job_id):
+    """Download a finished PDF export"""
+    job = pdf_jobs.status(job_id)
+    if not job:
+        return jsonify({'error': 'Export job not found'}), 404
+    path = pdf_jobs.result_path(job_id)
+    if not path:
+        return jsonify({'error': f"Export is {job['status']}", 'job': job}), 409
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=job['filename'],
+                     mimetype='application/pdf')
+
 @app.route('/api/dashboard/charts', methods=['GET'])
 def get_dashboard_charts():
-    """Get interactive charts for statistics dashboard"""
+    """Get interactive charts (HTML per chart) for statistics dashboard"""
+    try:
+        return Response(dashboard_cache.charts_json(stats_engine, 'html'), mimetype='application/json')
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/dashboard/chart-specs', methods=['GET'])
+def get_dashboard_chart_specs():
+    """Get the dashboard charts as Plotly figure specs, with the data version"""
     try:
-        charts = stats_engine.create_statistics_dashboard()
-        return jsonify(charts)
+        return Response(dashboard_cache.charts_json(stats_engine, 'spec'), mimetype='application/json')
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -186,17 +264,17 @@ def get_dashboard_charts():
 def get_top_players(count):
     """Get top N players by points"""
     try:
-        sorted_players = sorted(stats_engine.players_data, 
-                              key=lambda p: float(p.get('points', 0)), reverse=True)
-        top_players = sorted_players[:count]
+        snapshot = stats_engine.snapshot
         
-        # Add advanced stats to each player
-        for player in top_players:
-            player['advanced_stats'] = stats_engine.calculate_advanced_stats(player)
+        # Copies with advanced stats; the index's player dicts stay untouched
+        top_players = [
+            {**player, 'advanced_stats': stats_engine.get_advanced_stats(player)}
+            for player in snapshot.player_index.top(count, 'points')
+        ]
         
         return jsonify({
             'players': top_players,
-            'total_count': len(stats_engine.players_data)
+            'total_count': len(snapshot.players_data)
         })
     
     except Exception as e:
@@ -224,7 +302,8 @@ def search_teams():
         if not query:
             return jsonify({'error': 'Query parameter q is required'}), 400
         
-        teams = team_analyzer.search_teams(query)
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        teams = team_analyzer.search_teams(query, limit)
         return jsonify({
             'teams': teams,
             'query': query
@@ -242,19 +321,14 @@ def get_team_details(team_name):
         
         # Debug logging
         print(f"🔍 API Call: team='{team_name}', league={league_id}, season={season_id}")
-        print(f"📝 Available teams containing '{team_name.lower()}':")
         
-        # Find similar team names
-        similar_teams = []
-        for existing_team in team_analyzer.teams.keys():
-            if team_name.lower() in existing_team.lower() or existing_team.lower() in team_name.lower():
-                similar_teams.append(existing_team)
-                print(f"   - '{existing_team}'")
-        
-        team_details = team_analyzer.get_team_details(team_name, league_id, season_id)
+        team_details = team_analyzer.team_details_json(team_name, league_id, season_id)
         
         if not team_details:
             print(f"❌ No team details found for '{team_name}'")
+            similar_teams = team_analyzer.suggest_teams(team_name, limit=10)
+            print(f"📝 {len(similar_teams)} similar teams")
+            
             # Return helpful error with suggestions
             return jsonify({
                 'error': 'Team not found',
@@ -263,8 +337,8 @@ def get_team_details(team_name):
                 'suggestion': similar_teams[0] if similar_teams else None
             }), 404
         
-        print(f"✅ Found team: {team_details['roster_size']} players")
-        return jsonify(team_details)
+        # Memoized payload, served as is
+        return Response(team_details, mimetype='application/json')
     
     except Exception as e:
         print(f"💥 API Error: {e}")
@@ -291,43 +365,25 @@ def debug_teams():
         league_id = request.args.get('league_id', type=int)
         season_id = request.args.get('season_id', type=int)
         
-        # Get all teams
-        all_teams = {}
-        litzendorf_teams = []
+        player_index = stats_engine.player_index
         
-        for player in stats_engine.players_data:
-            team = player.get('team', '')
-            liga = player.get('liga_id')
-            season = player.get('season_id')
-            
-            # Track all teams
-            key = f"{team}|{liga}|{season}"
-            if key in all_teams:
-                all_teams[key] += 1
-            else:
-                all_teams[key] = 1
-            
-            # Track Litzendorf variations
-            if 'litzendorf' in team.lower():
-                litzendorf_teams.append({
-                    'team': team,
-                    'liga_id': liga,
-                    'season_id': season,
-                    'player': player.get('name', 'Unknown')
-                })
+        # Track Litzendorf variations
+        litzendorf_teams = [{
+            'team': player.get('team', ''),
+            'liga_id': player.get('liga_id'),
+            'season_id': player.get('season_id'),
+            'player': player.get('name', 'Unknown')
+        } for player in player_index.players_of_teams_matching('litzendorf', limit=20)]
         
         # Filter by league/season if provided
         filtered_teams = {}
         if league_id and season_id:
-            for key, count in all_teams.items():
-                team, liga, season = key.split('|')
-                if int(liga) == league_id and int(season) == season_id:
-                    filtered_teams[team] = count
+            filtered_teams = player_index.league_team_counts(league_id, season_id)
         
         return jsonify({
-            'total_teams': len(all_teams),
+            'total_teams': player_index.team_league_count,
             'filtered_teams': filtered_teams if league_id and season_id else {},
-            'litzendorf_variations': litzendorf_teams[:20],  # Limit to first 20
+            'litzendorf_variations': litzendorf_teams,  # Limited to first 20
             'query': {
                 'league_id': league_id,
                 'season_id': season_id
@@ -351,4 +407,10 @@ def get_organization_info(org_name):
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Basketball Statistics API')
+    parser.add_argument('--pdf-export-dir', default=DEFAULT_EXPORT_DIR,
+                        help=f'Directory for finished PDF exports (default: {DEFAULT_EXPORT_DIR})')
+    args = parser.parse_args()
+    pdf_jobs.export_dir = args.pdf_export_dir
+
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -7,6 +7,9 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 import traceback
 import time
+import queue
+import threading
+import uuid
 
 
 class CrawlLoggerPipeline:
@@ -15,8 +18,12 @@ class CrawlLoggerPipeline:
     and stores it in a searchable database format.
     """
     
-    def __init__(self):
-        self.db_path = 'crawl_logs.db'
+    def __init__(self, db_path: str = 'crawl_logs.db', batch_size: int = 500,
+                 flush_interval: float = 1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.log_handler = None
         self.session_id = None
         self.session_start_time = None
         self.stats = {
@@ -26,6 +33,16 @@ class CrawlLoggerPipeline:
             'items_scraped': 0,
             'leagues_discovered': 0
         }
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Read logging options from the Scrapy settings"""
+        settings = crawler.settings
+        return cls(
+            db_path=settings.get('CRAWL_LOGGING_DB_PATH', 'crawl_logs.db'),
+            batch_size=settings.getint('CRAWL_LOGGING_BATCH_SIZE', 500),
+            flush_interval=settings.getfloat('CRAWL_LOGGING_FLUSH_INTERVAL', 1.0),
+        )
         
     def open_spider(self, spider):
         """Initialize logging session when spider starts"""
@@ -157,11 +174,17 @@ class CrawlLoggerPipeline:
     
     def setup_log_handler(self, spider):
         """Set up custom log handler to capture all log messages"""
-        handler = CrawlDatabaseLogHandler(self.db_path, self.session_id)
+        handler = CrawlDatabaseLogHandler(
+            self.db_path,
+            self.session_id,
+            batch_size=self.batch_size,
+            flush_interval=self.flush_interval,
+        )
         handler.setLevel(logging.DEBUG)
         
         # Add handler to root logger instead of spider logger
         logging.getLogger().addHandler(handler)
+        self.log_handler = handler
         
         spider.logger.info(f"📝 Enhanced logging enabled for session: {self.session_id}")
     
@@ -181,7 +204,7 @@ class CrawlLoggerPipeline:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        discovery_id = f"disc_{int(time.time() * 1000000)}"
+        discovery_id = new_record_id("disc")
         
         cursor.execute('''
             INSERT INTO crawl_discoveries (
@@ -220,7 +243,7 @@ class CrawlLoggerPipeline:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        error_id = f"err_{int(time.time() * 1000000)}"
+        error_id = new_record_id("err")
         
         # Extract error details
         error_type = failure.type.__name__ if failure.type else 'UnknownError'
@@ -298,24 +321,138 @@ class CrawlLoggerPipeline:
         spider.logger.info(f"   Items scraped: {self.stats['items_scraped']}")
         spider.logger.info(f"   Leagues discovered: {self.stats['leagues_discovered']}")
         spider.logger.info(f"   Success rate: {(self.stats['successful_requests'] / max(1, self.stats['total_requests']) * 100):.1f}%")
+        
+        # Drain buffered log records before the process exits
+        if self.log_handler:
+            logging.getLogger().removeHandler(self.log_handler)
+            self.log_handler.close()
+            self.log_handler = None
+
+
+def new_record_id(prefix: str) -> str:
+    """Build a collision-free primary key for log tables"""
+    return f"{prefix}_{uuid.uuid4().hex}"
+
+
+class BufferedCrawlLogWriter:
+    """
+    Background writer that batches crawl_logs rows into a single long-lived
+    WAL-mode connection instead of committing once per log record.
+    """
+    
+    INSERT_SQL = '''
+        INSERT INTO crawl_logs (
+            id, session_id, timestamp, level, logger_name, message,
+            url, response_status, response_time_ms, league_id, season_year,
+            match_count, metadata
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    def __init__(self, db_path: str, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_queue_size: int = 10000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped_records = 0
+        self._flush_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='crawl-log-writer', daemon=True
+        )
+        self._thread.start()
+    
+    def write(self, row: tuple):
+        """Queue a row; drop it rather than stall the crawl if the queue stays full"""
+        try:
+            self.queue.put(row, timeout=self.flush_interval)
+        except queue.Full:
+            self.dropped_records += 1
+    
+    def flush(self, timeout: float = 10.0):
+        """Block until everything queued so far has been written"""
+        if not self._thread.is_alive():
+            return
+        self._flush_requested.set()
+        deadline = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+    
+    def close(self, timeout: float = 10.0):
+        """Flush outstanding rows and stop the writer thread"""
+        self._stopped.set()
+        self._flush_requested.set()
+        self._thread.join(timeout)
+        if self.dropped_records:
+            print(f"Log writer dropped {self.dropped_records} records (queue full)")
+    
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        
+        batch = []
+        last_flush = time.time()
+        try:
+            while True:
+                wait = max(0.0, self.flush_interval - (time.time() - last_flush))
+                try:
+                    batch.append(self.queue.get(timeout=wait))
+                except queue.Empty:
+                    pass
+                
+                # Drain whatever is already waiting without blocking again
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                flush_due = (
+                    len(batch) >= self.batch_size
+                    or time.time() - last_flush >= self.flush_interval
+                    or self._flush_requested.is_set()
+                )
+                if batch and flush_due:
+                    self._write_batch(conn, batch)
+                    batch = []
+                if flush_due:
+                    last_flush = time.time()
+                    if self.queue.empty():
+                        self._flush_requested.clear()
+                
+                if self._stopped.is_set() and self.queue.empty() and not batch:
+                    break
+        finally:
+            conn.close()
+    
+    def _write_batch(self, conn: sqlite3.Connection, batch: list):
+        try:
+            with conn:
+                conn.executemany(self.INSERT_SQL, batch)
+        except Exception as e:
+            # Don't let logging errors crash the spider
+            print(f"Log writer error ({len(batch)} records lost): {e}")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
 
 
 class CrawlDatabaseLogHandler(logging.Handler):
-    """Custom log handler that writes to crawl_logs database table"""
+    """Custom log handler that buffers records into the crawl_logs database table"""
     
-    def __init__(self, db_path: str, session_id: str):
+    def __init__(self, db_path: str, session_id: str, batch_size: int = 500,
+                 flush_interval: float = 1.0):
         super().__init__()
         self.db_path = db_path
         self.session_id = session_id
+        self.writer = BufferedCrawlLogWriter(
+            db_path, batch_size=batch_size, flush_interval=flush_interval
+        )
     
     def emit(self, record: logging.LogRecord):
-        """Emit log record to database"""
+        """Queue log record for the background database writer"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            log_id = f"log_{int(time.time() * 1000000)}"
-            
             # Extract additional context from record
             url = getattr(record, 'url', None)
             response_status = getattr(record, 'response_status', None)
@@ -329,14 +466,8 @@ class CrawlDatabaseLogHandler(logging.Handler):
             if hasattr(record, 'extra_data'):
                 metadata.update(record.extra_data)
             
-            cursor.execute('''
-                INSERT INTO crawl_logs (
-                    id, session_id, timestamp, level, logger_name, message,
-                    url, response_status, response_time_ms, league_id, season_year,
-                    match_count, metadata
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                log_id,
+            self.writer.write((
+                new_record_id('log'),
                 self.session_id,
                 datetime.fromtimestamp(record.created).isoformat(),
                 record.levelname,
@@ -348,15 +479,21 @@ class CrawlDatabaseLogHandler(logging.Handler):
                 league_id,
                 season_year,
                 match_count,
-                json.dumps(metadata) if metadata else None
+                json.dumps(metadata, default=str) if metadata else None
             ))
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             # Don't let logging errors crash the spider
             print(f"Log handler error: {e}")
+    
+    def flush(self):
+        """Write all queued records to the database"""
+        self.writer.flush()
+    
+    def close(self):
+        """Flush and stop the background writer"""
+        self.writer.close()
+        super().close()
 
 
 class EnhancedRequestMiddleware:
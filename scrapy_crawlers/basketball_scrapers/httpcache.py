@@ -0,0 +1,48 @@
+# Scrapy HTTP cache storage backed by the shared response cache
+#
+# Enable with HTTPCACHE_STORAGE = 'basketball_scrapers.httpcache.ResponseCacheStorage'
+# See: https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-storage
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+
+from http_response_cache import DEFAULT_CACHE_DIR, ResponseCache
+
+
+class ResponseCacheStorage:
+    """Scrapy HTTPCACHE_STORAGE using the same on-disk cache as the requests crawlers"""
+
+    def __init__(self, settings):
+        self.cache_dir = settings.get('RESPONSE_CACHE_DIR') or DEFAULT_CACHE_DIR
+        self.current_season_ttl = settings.getint('RESPONSE_CACHE_CURRENT_SEASON_TTL', 6 * 3600)
+        # Soft failures (status 200 error pages) are not cached unless this is set
+        self.soft_failure_ttl = settings.getint('RESPONSE_CACHE_SOFT_FAILURE_TTL', 0)
+        self.cache = None
+
+    def open_spider(self, spider):
+        self.cache = ResponseCache(self.cache_dir, current_season_ttl=self.current_season_ttl,
+                                   soft_failure_ttl=self.soft_failure_ttl)
+        spider.logger.info(f"Response cache: {self.cache_dir}")
+
+    def close_spider(self, spider):
+        spider.logger.info(f"Response cache stats: {self.cache.stats}")
+        self.cache.close()
+
+    def retrieve_response(self, spider, request):
+        """Return a fresh cached response; stale entries fall through to the network"""
+        entry = self.cache.lookup(request.method, request.url, request.body)
+        if entry is None or not entry.fresh:
+            return None
+
+        headers = Headers(entry.headers)
+        respcls = responsetypes.from_args(headers=headers, url=request.url, body=entry.content)
+        return respcls(url=request.url, headers=headers, status=entry.status, body=entry.content)
+
+    def store_response(self, spider, request, response):
+        headers = {
+            key.decode('latin-1'): b', '.join(values).decode('latin-1')
+            for key, values in response.headers.items()
+        }
+        encoding = getattr(response, 'encoding', None)
+        self.cache.store(request.method, request.url, request.body, response.status,
+                         headers, response.body, encoding)
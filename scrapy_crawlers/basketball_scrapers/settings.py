@@ -35,6 +35,8 @@ LOG_DATEFORMAT = '%Y-%m-%d %H:%M:%S'
 # Enable enhanced crawl logging
 CRAWL_LOGGING_ENABLED = True
 CRAWL_LOGGING_DB_PATH = 'crawl_logs.db'
+CRAWL_LOGGING_BATCH_SIZE = 500  # rows per executemany batch
+CRAWL_LOGGING_FLUSH_INTERVAL = 1.0  # seconds between forced flushes
 
 # AutoThrottle settings for better performance monitoring
 AUTOTHROTTLE_ENABLED = True
@@ -52,6 +54,14 @@ AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
 # Configure logging
 LOG_LEVEL = 'INFO'
 
+# Shared on-disk response cache (also used by the requests-based crawlers)
+# Archive seasons never expire, the current season is refetched after 6h
+HTTPCACHE_ENABLED = True
+HTTPCACHE_POLICY = 'scrapy.extensions.httpcache.DummyPolicy'
+HTTPCACHE_STORAGE = 'basketball_scrapers.httpcache.ResponseCacheStorage'
+RESPONSE_CACHE_DIR = None  # defaults to scrapy_crawlers/.http_cache
+RESPONSE_CACHE_CURRENT_SEASON_TTL = 6 * 3600
+
 # Database configuration (for pipeline)
 DATABASE_URL = 'sqlite:///basketball_stats.db'  # Change this to your database URL
 
@@ -3,8 +3,15 @@ import json
 import sqlite3
 import os
 from datetime import datetime, timedelta
+from itertools import zip_longest
 from urllib.parse import urljoin
 
+from league_id_index import AdaptiveLeagueIdIndex
+
+# Range discovery samples every 50th ID and sends at most 200 requests per session
+DISCOVERY_STRIDE = 50
+MAX_DISCOVERY_REQUESTS = 200
+
 
 class SmartHistoricalCrawlerSpider(scrapy.Spider):
     name = 'smart_historical_crawler'
@@ -165,43 +172,58 @@ class SmartHistoricalCrawlerSpider(scrapy.Spider):
                     dont_filter=True
                 )
         
-        # Then, systematically check league ranges for unknown leagues
-        for start_range, end_range in self.target_league_ranges:
-            for base_league_id in range(start_range, end_range, 50):  # Sample every 50 IDs
-                for season in test_seasons[:2]:  # Only check recent 2 seasons for discovery
-                    year_offset = 2025 - season
-                    historical_id = base_league_id - year_offset
-                    
-                    # Skip if already tested or cached
-                    is_cached, cached_exists = self.is_league_cached(str(historical_id), season)
-                    if is_cached:
-                        continue
-                    
-                    # Skip if too many requests already
-                    if request_count >= 200:
-                        self.logger.info(f"Limiting discovery requests to 200 for this session")
-                        break
-                    
-                    url = urljoin(base_url, f'competition/actual/id/{historical_id}')
-                    request_count += 1
-                    
-                    yield scrapy.Request(
-                        url=url,
-                        callback=self.parse_league_response,
-                        meta={
-                            'original_league_id': str(base_league_id),
-                            'original_league_name': 'Unknown',
-                            'historical_league_id': str(historical_id),
-                            'season_year': season,
-                            'test_type': 'discovery'
-                        },
-                        dont_filter=True
-                    )
-                    
-                if request_count >= 200:
+        # Then, check league ranges for unknown leagues. The ID index skips
+        # regions known to be empty and samples the rest every DISCOVERY_STRIDE
+        # IDs; hits are refined by explore_adjacent_leagues. Seeds of the
+        # seasons are interleaved so the request cap does not use up one
+        # season before the other is probed at all.
+        id_index = AdaptiveLeagueIdIndex(self.cache_db_path, coarse_stride=DISCOVERY_STRIDE)
+        season_seeds = []
+        for season in test_seasons[:2]:  # Only check recent 2 seasons for discovery
+            year_offset = 2025 - season
+            season_ranges = [(start - year_offset, end - year_offset) for start, end in self.target_league_ranges]
+            season_seeds.append([(season, year_offset, historical_id)
+                                 for historical_id in id_index.plan_seeds(season_ranges)])
+        
+        for seeds in zip_longest(*season_seeds):
+            for seed in seeds:
+                if seed is None:
+                    continue
+                season, year_offset, historical_id = seed
+                
+                # Skip if already tested or cached
+                is_cached, cached_exists = self.is_league_cached(str(historical_id), season)
+                if is_cached:
+                    continue
+                
+                # Skip if too many requests already
+                if request_count >= MAX_DISCOVERY_REQUESTS:
                     break
-            if request_count >= 200:
+                
+                url = urljoin(base_url, f'competition/actual/id/{historical_id}')
+                request_count += 1
+                
+                yield scrapy.Request(
+                    url=url,
+                    callback=self.parse_league_response,
+                    meta={
+                        'original_league_id': str(historical_id + year_offset),
+                        'original_league_name': 'Unknown',
+                        'historical_league_id': str(historical_id),
+                        'season_year': season,
+                        'test_type': 'discovery'
+                    },
+                    dont_filter=True
+                )
+            
+            if request_count >= MAX_DISCOVERY_REQUESTS:
+                self.logger.info(f"Limiting discovery requests to {MAX_DISCOVERY_REQUESTS} for this session")
                 break
+        
+        self.logger.info(
+            f"ID index skipped {id_index.stats['skipped_buckets']} empty regions "
+            f"and {id_index.stats['skipped_known']} known-missing IDs"
+        )
 
         self.logger.info(f"Generated {request_count} discovery requests")
 
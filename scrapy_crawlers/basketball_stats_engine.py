@@ -3,39 +3,203 @@ Advanced Basketball Statistics Engine
 Provides custom stats calculations and export features
 """
 
+import hashlib
 import json
+import os
+import threading
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from reportlab.lib.pagesizes import A4, letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from PIL import Image as PILImage, ImageDraw, ImageFont
+from PIL import Image as PILImage
 import io
 import base64
 from datetime import datetime
-import math
+from card_renderer import CardRenderer
+from dashboard_charts import build_chart_figures
+from pdf_export import build_pdf_table
+from player_index import PlayerIndex
+from stat_formula import compile_formula, formula_inputs, rank_values
+
+ADVANCED_STAT_COLUMNS = ['PPG', 'FG_PCT', 'FT_PCT', '3P_PCT', 'IMPACT', 'EFFICIENCY', 'TS_PCT', 'USG_RATE', 'VERSATILITY']
+
+def _numeric_column(df, column, default):
+    """Column as a float array; missing or non-numeric values become default"""
+    if column not in df.columns:
+        return np.full(len(df), float(default))
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+    return np.where(np.isnan(values), float(default), values)
+
+def _round(values, digits):
+    """np.round, falling back to Python's round() on .5 ties so results match it exactly"""
+    rounded = np.round(values, digits)
+    scaled = values * 10 ** digits
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-9):
+        rounded[i] = round(float(values[i]), digits)
+    return rounded
+
+def compute_advanced_stats_frame(df):
+    """
+    Vectorized BasketballStatsEngine.calculate_advanced_stats for every row of
+    df. Returns the ADVANCED_STAT_COLUMNS as a DataFrame with df's index.
+    """
+    points = _numeric_column(df, 'points', 0)
+    games = _numeric_column(df, 'games', 1)
+    average = _numeric_column(df, 'average', 0)
+
+    points_per_game = np.divide(points, games, out=np.zeros_like(points), where=games > 0)
+    ppg = np.where(average > 0, _round(average, 1), np.where(games > 0, _round(points_per_game, 1), 0.0))
+
+    estimated_fg_pct = np.clip(42 + (ppg - 12) * 0.8, 35, 65)
+    estimated_ft_pct = np.clip(72 + (ppg - 12) * 0.6, 60, 95)
+    estimated_3p_pct = np.clip(33 + (ppg - 15) * 0.4, 25, 50)
+
+    volume_factor = np.minimum(2.0, ppg / 10)
+    efficiency_factor = estimated_fg_pct / 45
+    consistency_factor = np.minimum(1.2, games / 15)
+
+    estimated_possessions = np.divide(points * 0.9, ppg, out=np.zeros_like(points), where=ppg > 0)
+
+    versatility = ((ppg > 15).astype(int) + ((ppg > 10) & (games > 10)) + (estimated_fg_pct > 48)
+                   + (estimated_ft_pct > 80) + (ppg > 20))
+
+    return pd.DataFrame({
+        'PPG': ppg,
+        'FG_PCT': _round(estimated_fg_pct, 1),
+        'FT_PCT': _round(estimated_ft_pct, 1),
+        '3P_PCT': _round(estimated_3p_pct, 1),
+        'IMPACT': _round(volume_factor * efficiency_factor * consistency_factor * 15, 1),
+        'EFFICIENCY': _round(points / np.maximum(1, estimated_possessions), 2),
+        'TS_PCT': _round(np.clip(50 + (ppg - 12) * 0.7, 40, 70), 1),
+        'USG_RATE': _round(np.minimum(40, np.maximum(10, ppg * 1.8)), 1),
+        'VERSATILITY': versatility.astype(int),
+    }, index=df.index, columns=ADVANCED_STAT_COLUMNS)
+
+class PlayerDataSnapshot:
+    """
+    One loaded version of the player data with everything derived from it.
+    A reload builds a new snapshot and swaps it in with one assignment, so a
+    reader holding a snapshot never mixes its data with another version's
+    frames; lazily computed frames are stored on the snapshot they came from.
+    """
+    
+    def __init__(self, players_data, data_version):
+        self.players_data = players_data
+        self.data_version = data_version
+        self.df = pd.DataFrame(players_data)
+        self.player_index = PlayerIndex(players_data)
+        self.lock = threading.RLock()
+        self._advanced_stats_frame = None
+        self._advanced_stats_records = None
+        self._formula_inputs = None
+    
+    def _lazy(self, name, compute):
+        value = getattr(self, name)
+        if value is None:
+            with self.lock:
+                value = getattr(self, name)
+                if value is None:
+                    value = compute()
+                    setattr(self, name, value)
+        return value
+    
+    def advanced_stats_frame(self):
+        """Advanced stats of all players (aligned with self.df)"""
+        return self._lazy('_advanced_stats_frame', lambda: compute_advanced_stats_frame(self.df))
+    
+    def advanced_stats_records(self):
+        return self._lazy('_advanced_stats_records', lambda: self.advanced_stats_frame().to_dict('records'))
+    
+    def formula_inputs(self):
+        return self._lazy('_formula_inputs', lambda: formula_inputs(self.players_data))
 
 class BasketballStatsEngine:
     """Advanced basketball statistics calculator and exporter"""
     
     def __init__(self, players_data_path):
         """Initialize with player data"""
-        with open(players_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        self.players_data_path = players_data_path
+        self.card_renderer = CardRenderer()
+        self._reload_lock = threading.Lock()
+        self._load_players()
+    
+    # The current snapshot's data; use snapshot directly when reading several of them together
+    @property
+    def players_data(self):
+        return self.snapshot.players_data
+    
+    @property
+    def df(self):
+        return self.snapshot.df
+    
+    @property
+    def player_index(self):
+        return self.snapshot.player_index
+    
+    @property
+    def data_version(self):
+        return self.snapshot.data_version
+    
+    def _load_players(self):
+        """(Re)load the player JSON into a new snapshot"""
+        stamp = self._file_stamp()
+        with open(self.players_data_path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
         
         # Handle both direct list and nested structure
         if isinstance(data, dict) and 'players' in data:
-            self.players_data = data['players']
+            players_data = data['players']
         elif isinstance(data, list):
-            self.players_data = data
+            players_data = data
         else:
             raise ValueError("Unexpected data structure in JSON file")
         
-        self.df = pd.DataFrame(self.players_data)
+        # Content hash identifies the data; the stat stamp makes change checks cheap
+        self.snapshot = PlayerDataSnapshot(players_data, hashlib.sha1(raw).hexdigest()[:16])
+        self._data_stamp = stamp
+    
+    def _file_stamp(self):
+        stat = os.stat(self.players_data_path)
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def reload_if_changed(self):
+        """Reload when the JSON file's content changed; returns True if it did"""
+        try:
+            if self._file_stamp() == self._data_stamp:
+                return False
+        except OSError:
+            return False  # file is being replaced; keep serving the loaded data
+        with self._reload_lock:
+            try:
+                stamp = self._file_stamp()
+                if stamp == self._data_stamp:
+                    return False  # another thread reloaded it meanwhile
+                with open(self.players_data_path, 'rb') as f:
+                    version = hashlib.sha1(f.read()).hexdigest()[:16]
+            except OSError:
+                return False
+            if version == self.data_version:
+                self._data_stamp = stamp
+                return False
+            self._load_players()
+        return True
+    
+    def advanced_stats_frame(self):
+        """Advanced stats of all loaded players, computed once (aligned with self.df)"""
+        return self.snapshot.advanced_stats_frame()
+    
+    def get_advanced_stats(self, player):
+        """Cached advanced stats of a loaded player; other player dicts are calculated directly"""
+        snapshot = self.snapshot
+        position = snapshot.player_index.position_of(player)
+        if position is None:
+            return self.calculate_advanced_stats(player)
+        return dict(snapshot.advanced_stats_records()[position])
     
     def calculate_advanced_stats(self, player):
         """Calculate realistic basketball statistics based on available data"""
@@ -92,158 +256,68 @@ class BasketballStatsEngine:
         return stats
     
     def create_custom_stat(self, formula, player):
-        """Create custom statistic based on formula"""
-        try:
-            # Safe evaluation of custom formulas
-            available_vars = {
-                'points': float(player.get('punkte', 0)),
-                'games': float(player.get('spiele', 1)),
-                'fg': float(player.get('field_goals', 0)),
-                'fga': float(player.get('field_goal_attempts', 1)),
-                'ft': float(player.get('freiwuerfe', 0)),
-                'fta': float(player.get('freiwurf_versuche', 1)),
-                'three': float(player.get('dreier', 0)),
-                'threea': float(player.get('dreier_versuche', 1)),
-                'math': math
-            }
-            
-            # Replace common basketball formulas
-            formula = formula.replace('PPG', '(points/games)')
-            formula = formula.replace('FG%', '(fg/fga)*100')
-            formula = formula.replace('FT%', '(ft/fta)*100')
-            formula = formula.replace('3P%', '(three/threea)*100')
-            
-            result = eval(formula, {"__builtins__": {}}, available_vars)
-            return round(float(result), 2)
-        except:
-            return 0
+        """Create custom statistic based on formula (raises FormulaError for invalid formulas)"""
+        return compile_formula(formula).evaluate_player(player)
+    
+    def rank_custom_stat(self, formula, limit=100):
+        """Evaluate a formula for all loaded players at once; returns the top `limit` results"""
+        compiled = compile_formula(formula)
+        snapshot = self.snapshot
+        players_data = snapshot.players_data
+        values = compiled.evaluate(snapshot.formula_inputs(), len(players_data))
+        
+        results = []
+        for rank, position in enumerate(rank_values(values, limit), 1):
+            player = players_data[position]
+            results.append({
+                'name': player.get('name', 'Unknown'),
+                'team': player.get('team', 'Unknown'),
+                'value': float(values[position]),
+                'rank': rank
+            })
+        return results
     
     def generate_player_card(self, player_name, output_path=None, style='vintage'):
         """Generate vintage basketball card for player"""
         # Find player
-        player = next((p for p in self.players_data if p.get('name', '').lower() == player_name.lower()), None)
+        player = self.player_index.find(player_name)
         if not player:
             return None
         
         # Calculate advanced stats
-        advanced_stats = self.calculate_advanced_stats(player)
-        
-        # Create card image
-        card_width, card_height = 600, 850
-        card = PILImage.new('RGB', (card_width, card_height), color='white')
-        draw = ImageDraw.Draw(card)
-        
-        # Try to load fonts, fallback to default
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 32)
-            header_font = ImageFont.truetype("arial.ttf", 24)
-            stat_font = ImageFont.truetype("arial.ttf", 18)
-            small_font = ImageFont.truetype("arial.ttf", 14)
-        except:
-            title_font = ImageFont.load_default()
-            header_font = ImageFont.load_default()
-            stat_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-        
-        if style == 'vintage':
-            # Vintage Upper Deck style
-            # Background gradient effect
-            for y in range(card_height):
-                color_intensity = int(240 - (y / card_height) * 40)
-                draw.rectangle([(0, y), (card_width, y+1)], fill=(color_intensity, color_intensity-10, color_intensity-20))
-            
-            # Border
-            draw.rectangle([(10, 10), (card_width-10, card_height-10)], outline='#8B4513', width=8)
-            draw.rectangle([(15, 15), (card_width-15, card_height-15)], outline='#DAA520', width=4)
-            
-            # Header section
-            draw.rectangle([(25, 25), (card_width-25, 120)], fill='#1a237e', outline='#DAA520', width=2)
-            
-            # Player name
-            name_bbox = draw.textbbox((0, 0), player.get('name', 'Unknown'), font=title_font)
-            name_width = name_bbox[2] - name_bbox[0]
-            draw.text(((card_width - name_width) // 2, 45), player.get('name', 'Unknown'), 
-                     fill='white', font=title_font)
-            
-            # Team and league
-            team_text = f"{player.get('team', 'Unknown Team')} | Liga {player.get('liga_id', '')}"
-            team_bbox = draw.textbbox((0, 0), team_text, font=header_font)
-            team_width = team_bbox[2] - team_bbox[0]
-            draw.text(((card_width - team_width) // 2, 85), team_text, 
-                     fill='#DAA520', font=header_font)
-        
-        # Stats section
-        y_pos = 150
-        draw.text((50, y_pos), "SEASON STATISTICS", fill='#1a237e', font=header_font)
-        y_pos += 40
-        
-        # Basic stats with mapped field names
-        stats_to_show = [
-            ("Punkte", player.get('points', 0)),
-            ("Spiele", player.get('games', 0)),
-            ("PPG", advanced_stats['PPG']),
-            ("FG%", advanced_stats['FG_PCT']),
-            ("3P%", advanced_stats['3P_PCT']),
-            ("FT%", advanced_stats['FT_PCT']),
-            ("Impact", advanced_stats['IMPACT']),
-            ("TS%", advanced_stats['TS_PCT']),
-        ]
-        
-        # Draw stats in two columns
-        for i, (stat_name, stat_value) in enumerate(stats_to_show):
-            x_pos = 50 if i % 2 == 0 else 320
-            if i % 2 == 0 and i > 0:
-                y_pos += 35
-            
-            draw.text((x_pos, y_pos), f"{stat_name}:", fill='#333333', font=stat_font)
-            draw.text((x_pos + 120, y_pos), str(stat_value), fill='#1a237e', font=stat_font)
-        
-        # Category badges
-        y_pos += 80
-        draw.text((50, y_pos), "CATEGORIES", fill='#1a237e', font=header_font)
-        y_pos += 30
-        
-        category_colors = {
-            'statBesteWerferArchiv': '#FF6B35',
-            'statBesteFreiWerferArchiv': '#4ECDC4',
-            'statBeste3erWerferArchiv': '#45B7D1'
-        }
-        
-        category = player.get('endpoint', '')  # Use 'endpoint' field from our data
-        if category in category_colors:
-            draw.rectangle([(50, y_pos), (250, y_pos + 30)], 
-                          fill=category_colors[category], outline='#333333', width=2)
-            category_names = {
-                'statBesteWerferArchiv': 'BESTE WERFER',
-                'statBesteFreiWerferArchiv': 'FREIWURF EXPERTE',
-                'statBeste3erWerferArchiv': '3-PUNKTE SPEZIALIST'
-            }
-            draw.text((60, y_pos + 8), category_names.get(category, category), 
-                     fill='white', font=stat_font)
-        
-        # Season info
-        y_pos = card_height - 100
-        draw.text((50, y_pos), f"Saison: {player.get('season_id', '2018')}", 
-                 fill='#666666', font=small_font)
-        draw.text((50, y_pos + 20), f"Basketball-Bund.net Export", 
-                 fill='#666666', font=small_font)
-        
-        # Upper Deck style logo area
-        draw.text((card_width - 200, card_height - 40), "BGL STATS", 
-                 fill='#1a237e', font=header_font)
+        advanced_stats = self.get_advanced_stats(player)
         
+        # Render from the style template (or the card cache)
+        card_png = self.card_renderer.render_png(player, advanced_stats, style)
+        return self._card_result(player, advanced_stats, card_png, output_path)
+    
+    def generate_player_cards(self, player_names, style='vintage'):
+        """
+        Generate cards for several players (None for unknown names); uncached
+        cards are rendered in a process pool
+        """
+        players = [self.player_index.find(player_name) for player_name in player_names]
+        found = [(player, self.get_advanced_stats(player)) for player in players if player]
+        card_pngs = iter(self.card_renderer.render_many(
+            [(player, advanced_stats, style) for player, advanced_stats in found]))
+        
+        cards = []
+        found = iter(found)
+        for player in players:
+            if player:
+                player, advanced_stats = next(found)
+                cards.append(self._card_result(player, advanced_stats, next(card_pngs)))
+            else:
+                cards.append(None)
+        return cards
+    
+    def _card_result(self, player, advanced_stats, card_png, output_path=None):
         # Save card
         if output_path:
-            card.save(output_path)
-        
-        # Convert to base64 for web display
-        buffer = io.BytesIO()
-        card.save(buffer, format='PNG')
-        buffer.seek(0)
-        card_base64 = base64.b64encode(buffer.getvalue()).decode()
+            PILImage.open(io.BytesIO(card_png)).save(output_path)
         
         return {
-            'image_base64': card_base64,
+            'image_base64': base64.b64encode(card_png).decode(),
             'player': player,
             'advanced_stats': advanced_stats,
             'card_path': output_path
@@ -277,82 +351,26 @@ class BasketballStatsEngine:
             self._create_pdf_table(df, output_path)
             return output_path
     
-    def _create_pdf_table(self, df, output_path):
-        """Create PDF table with professional styling"""
-        doc = SimpleDocTemplate(output_path, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#1a237e'),
-            alignment=TA_CENTER,
-            spaceAfter=20
-        )
-        story.append(Paragraph("Basketball Statistiken Export", title_style))
-        story.append(Spacer(1, 12))
-        
-        # Prepare table data
-        table_data = [df.columns.tolist()]
-        for _, row in df.iterrows():
-            table_data.append(row.tolist())
-        
-        # Create table
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a237e')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(table)
-        doc.build(story)
+    def _create_pdf_table(self, df, output_path, **options):
+        """Create PDF table with professional styling (page-sized chunks, see pdf_export)"""
+        build_pdf_table(df, output_path, **options)
     
     def create_statistics_dashboard(self, players_subset=None):
         """Create interactive statistics dashboard"""
         if players_subset:
             df = pd.DataFrame(players_subset)
+            advanced_stats = compute_advanced_stats_frame(df)
         else:
-            df = self.df.copy()
+            snapshot = self.snapshot
+            df = snapshot.df
+            advanced_stats = snapshot.advanced_stats_frame()
         
-        # Calculate advanced stats for all players
-        for i, player in df.iterrows():
-            advanced_stats = self.calculate_advanced_stats(player.to_dict())
-            for stat, value in advanced_stats.items():
-                df.at[i, stat] = value
+        # Attach advanced stats for all players
+        df = df.drop(columns=ADVANCED_STAT_COLUMNS, errors='ignore').join(advanced_stats)
         
         # Create visualizations
-        charts = {}
-        
-        # PPG Distribution
-        fig_ppg = px.histogram(df, x='PPG', nbins=20, title='Points Per Game Distribution')
-        fig_ppg.update_layout(template='plotly_white')
-        charts['ppg_distribution'] = fig_ppg.to_html(include_plotlyjs='cdn')
-        
-        # Efficiency vs Points scatter
-        if 'PER' in df.columns and 'PPG' in df.columns:
-            fig_scatter = px.scatter(df, x='PPG', y='PER', hover_data=['name', 'mannschaft'],
-                                   title='Player Efficiency vs Points Per Game')
-            fig_scatter.update_layout(template='plotly_white')
-            charts['efficiency_scatter'] = fig_scatter.to_html(include_plotlyjs='cdn')
-        
-        # Top performers by category
-        if 'kategorie' in df.columns:
-            category_stats = df.groupby('kategorie')['PPG'].mean().reset_index()
-            fig_category = px.bar(category_stats, x='kategorie', y='PPG',
-                                title='Average PPG by Category')
-            fig_category.update_layout(template='plotly_white')
-            charts['category_performance'] = fig_category.to_html(include_plotlyjs='cdn')
-        
-        return charts
+        return {name: figure.to_html(include_plotlyjs='cdn')
+                for name, figure in build_chart_figures(df).items()}
 
 def main():
     """Test the stats engine"""
@@ -10,13 +10,21 @@ from bs4 import BeautifulSoup
 import re
 import json
 import time
-import csv
 from datetime import datetime
 import logging
 
+from async_fetch_engine import FetchRequest, fetch_all
+from http_response_cache import CachedSession, response_failure
+from checkpoint_store import CheckpointStore
+from crawl_frontier import CrawlFrontier, DiscoveryError, DISCOVERY_ENDPOINT
+from statistik_parser import parse_tables
+
+STATISTIK_ENDPOINT = 'statBesteWerferArchiv'
+
 class BeastOberfrankenCrawler:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, concurrent_leagues=4, requests_per_second=3.0,
+                 checkpoint_dir='BEAST_OBERFRANKEN_CHECKPOINT'):
+        self.session = CachedSession()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36'
         })
@@ -57,6 +65,17 @@ class BeastOberfrankenCrawler:
             'seasons_data': {}
         }
         
+        # Load budget for the league -> statistik fan-out
+        self.concurrent_leagues = concurrent_leagues
+        self.requests_per_second = requests_per_second
+        
+        # Append-only checkpoint journal (completed seasons are skipped on rerun)
+        self.checkpoint = CheckpointStore(checkpoint_dir)
+        self.checkpointed_count = 0
+        
+        # Shared work queue: several beast processes can drain it together
+        self.frontier = CrawlFrontier('beast_oberfranken')
+        
         # ALL SEASONS TO UNLEASH ON
         self.seasons = [str(year) for year in range(2003, 2025)]  # 22 SEASONS!
         
@@ -94,7 +113,7 @@ class BeastOberfrankenCrawler:
             return False
     
     def get_all_leagues_for_season(self, season):
-        """Beast mode league discovery"""
+        """Beast mode league discovery; DiscoveryError if a page fails or lists no leagues"""
         self.logger.info(f"🎯 BEAST DISCOVERING SEASON {season}")
         
         all_leagues = []
@@ -130,14 +149,15 @@ class BeastOberfrankenCrawler:
                     'referer': 'https://www.basketball-bund.net/index.jsp?Action=106'
                 })
                 
-                if response.status_code != 200 or "Keine Einträge gefunden" in response.text:
-                    break
+                if response.status_code != 200:
+                    raise DiscoveryError(f"page {page}: HTTP {response.status_code}")
                 
                 soup = BeautifulSoup(response.text, 'html.parser')
                 page_leagues = self.parse_leagues_from_page(soup, season)
                 
+                # "Keine Einträge gefunden", an expired session or an error page
                 if not page_leagues:
-                    break
+                    raise DiscoveryError(f"no leagues on page {page}")
                 
                 all_leagues.extend(page_leagues)
                 self.logger.info(f"  Page {page}: {len(page_leagues)} leagues")
@@ -151,9 +171,10 @@ class BeastOberfrankenCrawler:
                 page += 1
                 time.sleep(0.3)  # Be nice to server
                 
+            except DiscoveryError:
+                raise
             except Exception as e:
-                self.logger.error(f"Error on season {season} page {page}: {e}")
-                break
+                raise DiscoveryError(f"page {page}: {e}") from e
         
         # Remove duplicates
         unique_leagues = []
@@ -222,99 +243,184 @@ class BeastOberfrankenCrawler:
                 return int(match.group(1))
         return None
     
+    def statistik_url(self, league):
+        """Top scorer archive URL for a league"""
+        return f"https://www.basketball-bund.net/statistik.do?reqCode=statBesteWerferArchiv&liga_id={league['id']}&saison_id={league['season']}&_top=-1"
+    
     def crawl_players_for_league(self, league):
         """Beast player crawling"""
+        try:
+            response = self.session.get(self.statistik_url(league))
+            return self.parse_players_response(response, league)
+        except Exception as e:
+            self.logger.error(f"Error crawling liga {league['id']}: {e}")
+            return []
+    
+    def fetch_league_responses(self, leagues):
+        """Fetch the statistik pages of several leagues at once through the async fetch engine"""
+        requests_to_fetch = [FetchRequest(self.statistik_url(league)) for league in leagues]
+        return fetch_all(
+            requests_to_fetch,
+            session=self.session,
+            max_per_host=self.concurrent_leagues,
+            requests_per_second=self.requests_per_second,
+            logger=self.logger,
+        )
+    
+    def crawl_players_for_leagues(self, leagues):
+        """Crawl several leagues at once through the async fetch engine"""
+        responses = self.fetch_league_responses(leagues)
+        
+        results = []
+        for league, response in zip(leagues, responses):
+            try:
+                results.append(self.parse_players_response(response, league))
+            except Exception as e:
+                self.logger.error(f"Error crawling liga {league['id']}: {e}")
+                results.append([])
+        return results
+    
+    def parse_players_response(self, response, league):
+        """Parse the statistik response of one league into player dicts"""
         liga_id = league['id']
         season = league['season']
         
+        if response.status_code != 200 or len(response.text) < 5000:
+            return []
+        
+        players = []
+        
+        for table in parse_tables(response.text):
+            for cell_texts in table.rows:
+                if len(cell_texts) >= 4:
+                    # Skip headers
+                    if any(h in ' '.join(cell_texts).lower() for h in ['platz', 'name', 'vorname']):
+                        continue
+                    
+                    try:
+                        if cell_texts[0] and cell_texts[1]:
+                            # Parse player data
+                            if cell_texts[0].isdigit():
+                                lastname = cell_texts[1]
+                                firstname = cell_texts[2] if len(cell_texts) > 2 else ""
+                                team = cell_texts[3] if len(cell_texts) > 3 else ""
+                                points = cell_texts[4] if len(cell_texts) > 4 else ""
+                                games = cell_texts[5] if len(cell_texts) > 5 else ""
+                            else:
+                                lastname = cell_texts[0]
+                                firstname = cell_texts[1] if len(cell_texts) > 1 else ""
+                                team = cell_texts[2] if len(cell_texts) > 2 else ""
+                                points = cell_texts[3] if len(cell_texts) > 3 else ""
+                                games = cell_texts[4] if len(cell_texts) > 4 else ""
+                            
+                            if lastname and len(lastname) > 1 and not lastname.isdigit():
+                                player = {
+                                    'lastname': lastname,
+                                    'firstname': firstname,
+                                    'team': team,
+                                    'points': points,
+                                    'games': games,
+                                    'liga_id': liga_id,
+                                    'season': season,
+                                    'bezirk': league['bezirk'],
+                                    'spielklasse': league['spielklasse'],
+                                    'altersklasse': league['altersklasse'],
+                                    'geschlecht': league['geschlecht'],
+                                    'league_full_name': league['full_name'],
+                                    'kreis': league['kreis']
+                                }
+                                players.append(player)
+                    except:
+                        continue
+        
+        # Remove duplicates
+        unique_players = []
+        seen = set()
+        for player in players:
+            key = f"{player['lastname']}_{player['firstname']}_{player['team']}"
+            if key not in seen:
+                seen.add(key)
+                unique_players.append(player)
+        
+        return unique_players
+    
+    def discover_season(self, season):
+        """
+        League list for a season from the frontier; discovered once and
+        queued as one statistik item per league. None while another worker
+        is still discovering the season.
+        """
+        if self.frontier.is_done(season, DISCOVERY_ENDPOINT):
+            return self.frontier.result(season, DISCOVERY_ENDPOINT)
+        
+        item = self.frontier.claim_key(season, DISCOVERY_ENDPOINT)
+        if item is None:
+            return None
+        
         try:
-            statistik_url = f"https://www.basketball-bund.net/statistik.do?reqCode=statBesteWerferArchiv&liga_id={liga_id}&saison_id={season}&_top=-1"
-            response = self.session.get(statistik_url)
-            
-            if response.status_code != 200 or len(response.text) < 5000:
-                return []
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            players = []
-            
-            for table in soup.find_all('table'):
-                for row in table.find_all('tr'):
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 4:
-                        cell_texts = [cell.get_text(strip=True) for cell in cells]
-                        
-                        # Skip headers
-                        if any(h in ' '.join(cell_texts).lower() for h in ['platz', 'name', 'vorname']):
-                            continue
-                        
-                        try:
-                            if cell_texts[0] and cell_texts[1]:
-                                # Parse player data
-                                if cell_texts[0].isdigit():
-                                    lastname = cell_texts[1]
-                                    firstname = cell_texts[2] if len(cell_texts) > 2 else ""
-                                    team = cell_texts[3] if len(cell_texts) > 3 else ""
-                                    points = cell_texts[4] if len(cell_texts) > 4 else ""
-                                    games = cell_texts[5] if len(cell_texts) > 5 else ""
-                                else:
-                                    lastname = cell_texts[0]
-                                    firstname = cell_texts[1] if len(cell_texts) > 1 else ""
-                                    team = cell_texts[2] if len(cell_texts) > 2 else ""
-                                    points = cell_texts[3] if len(cell_texts) > 3 else ""
-                                    games = cell_texts[4] if len(cell_texts) > 4 else ""
-                                
-                                if lastname and len(lastname) > 1 and not lastname.isdigit():
-                                    player = {
-                                        'lastname': lastname,
-                                        'firstname': firstname,
-                                        'team': team,
-                                        'points': points,
-                                        'games': games,
-                                        'liga_id': liga_id,
-                                        'season': season,
-                                        'bezirk': league['bezirk'],
-                                        'spielklasse': league['spielklasse'],
-                                        'altersklasse': league['altersklasse'],
-                                        'geschlecht': league['geschlecht'],
-                                        'league_full_name': league['full_name'],
-                                        'kreis': league['kreis']
-                                    }
-                                    players.append(player)
-                        except:
-                            continue
-            
-            # Remove duplicates
-            unique_players = []
-            seen = set()
-            for player in players:
-                key = f"{player['lastname']}_{player['firstname']}_{player['team']}"
-                if key not in seen:
-                    seen.add(key)
-                    unique_players.append(player)
-            
-            return unique_players
-            
-        except Exception as e:
-            self.logger.error(f"Error crawling liga {liga_id}: {e}")
+            leagues = self.get_all_leagues_for_season(season)
+        except DiscoveryError as e:
+            # Not completed: the next run discovers the season again
+            self.logger.error(f"League list of season {season} incomplete: {e}")
+            self.frontier.fail(item, e)
             return []
+        except Exception as e:
+            self.frontier.fail(item, e)
+            raise
+        
+        self.frontier.add_many((season, league['id'], STATISTIK_ENDPOINT, league) for league in leagues)
+        self.frontier.complete(item, leagues)
+        return leagues
+    
+    def drain_season(self, season):
+        """Claim and crawl this season's pending leagues until none are left"""
+        batch_size = self.concurrent_leagues * 2
+        while True:
+            items = self.frontier.claim(batch_size, season=season, endpoint=STATISTIK_ENDPOINT)
+            if not items:
+                return
+            
+            leagues = [item.payload for item in items]
+            responses = self.fetch_league_responses(leagues)
+            for item, league, response in zip(items, leagues, responses):
+                # Only a validated page completes an item; anything else is retried
+                failure = response_failure(response)
+                if failure:
+                    self.frontier.fail(item, failure)
+                    continue
+                try:
+                    players = self.parse_players_response(response, league)
+                except Exception as e:
+                    self.logger.error(f"Error crawling liga {league['id']}: {e}")
+                    self.frontier.fail(item, e)
+                    continue
+                self.frontier.complete(item, players, etag=response.header('ETag'))
     
-    def save_progress(self, all_players, suffix="PROGRESS"):
-        """Save progress during beast run"""
+    def save_progress(self, all_players, completed_seasons=()):
+        """Append players added since the last checkpoint to the journal"""
+        current_stats = self.stats.copy()
+        current_stats['total_players'] = self.checkpoint.total_records + len(all_players) - self.checkpointed_count
+        current_stats['current_time'] = datetime.now().isoformat()
+        
+        segment_file = self.checkpoint.append(
+            all_players[self.checkpointed_count:],
+            completed_seasons=completed_seasons,
+            stats=current_stats
+        )
+        self.checkpointed_count = len(all_players)
+        
+        return segment_file, self.checkpoint.manifest_path
+    
+    def export_final_results(self):
+        """Write the combined CSV and stats JSON from the journal"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Save CSV
-        csv_file = f'BEAST_OBERFRANKEN_{suffix}_{timestamp}.csv'
-        if all_players:
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=all_players[0].keys())
-                writer.writeheader()
-                writer.writerows(all_players)
+        csv_file = self.checkpoint.export_csv(f'BEAST_OBERFRANKEN_FINAL_{timestamp}.csv')
         
-        # Save stats
-        stats_file = f'BEAST_STATS_{suffix}_{timestamp}.json'
+        stats_file = f'BEAST_STATS_FINAL_{timestamp}.json'
         with open(stats_file, 'w', encoding='utf-8') as f:
             current_stats = self.stats.copy()
-            current_stats['total_players'] = len(all_players)
+            current_stats['total_players'] = self.checkpoint.total_records
             current_stats['current_time'] = datetime.now().isoformat()
             json.dump(current_stats, f, indent=2, ensure_ascii=False, default=str)
         
@@ -331,15 +437,27 @@ class BeastOberfrankenCrawler:
         all_players = []
         start_time = datetime.now()
         
+        completed_seasons = set(self.checkpoint.completed_seasons)
+        if completed_seasons:
+            print(f"♻️ Resuming from checkpoint: {self.checkpoint.total_records} players, "
+                  f"seasons {', '.join(sorted(completed_seasons))} already done")
+        
         for season_idx, season in enumerate(self.seasons, 1):
+            if season in completed_seasons:
+                continue
+            
             season_start = datetime.now()
             
             print(f"\n{'🔥' * 60}")
             print(f"🎯 BEAST ATTACKING SEASON {season} ({season_idx}/{len(self.seasons)})")
             print(f"{'🔥' * 60}")
             
-            # Get leagues for this season
-            leagues = self.get_all_leagues_for_season(season)
+            # Get leagues for this season (discovered once, kept in the frontier)
+            leagues = self.discover_season(season)
+            
+            if leagues is None:
+                print(f"  ⏭️ Season {season} is being discovered by another worker")
+                continue
             
             if not leagues:
                 self.logger.warning(f"⚠️ No leagues for season {season}")
@@ -351,12 +469,28 @@ class BeastOberfrankenCrawler:
                 'litzendorf_found': 0
             }
             
-            # Crawl all leagues in this season
+            # Crawl all pending leagues in this season, N leagues at a time
+            print(f"  🚀 Fetching {len(leagues)} leagues ({self.concurrent_leagues} at once)")
+            self.drain_season(season)
+            
+            if not self.frontier.is_drained(season, STATISTIK_ENDPOINT):
+                print(f"  ⏭️ Other workers are still crawling season {season}")
+                continue
+            
+            failed = self.frontier.counts(season, STATISTIK_ENDPOINT)['failed']
+            if failed:
+                self.logger.warning(f"⚠️ {failed} leagues failed in season {season} (see crawl_frontier.last_error)")
+            
+            # Exactly one worker writes the season into the checkpoint journal
+            finalize = self.frontier.claim_key(season, 'checkpoint')
+            if finalize is None:
+                continue
+            
             season_players = []
-            for league_idx, league in enumerate(leagues, 1):
+            for league_idx, (item, players) in enumerate(self.frontier.results(season, STATISTIK_ENDPOINT), 1):
+                league = item.payload
                 print(f"  🔍 Liga {league_idx}/{len(leagues)}: {league['full_name']} (ID: {league['id']})")
                 
-                players = self.crawl_players_for_league(league)
                 season_players.extend(players)
                 
                 # Count BG Litzendorf
@@ -366,9 +500,6 @@ class BeastOberfrankenCrawler:
                     self.stats['litzendorf_players'] += litzendorf_count
                 
                 print(f"    ✅ {len(players)} players")
-                
-                # Small delay
-                time.sleep(0.2)
             
             all_players.extend(season_players)
             self.stats['seasons_processed'] += 1
@@ -380,12 +511,12 @@ class BeastOberfrankenCrawler:
             print(f"   Leagues: {len(leagues)}")
             print(f"   Players: {len(season_players)}")
             print(f"   Time: {season_time.total_seconds():.1f}s")
-            print(f"   TOTAL SO FAR: {len(all_players)} players")
+            print(f"   TOTAL SO FAR: {self.checkpoint.total_records + len(season_players)} players")
             
-            # Save progress every 3 seasons
-            if season_idx % 3 == 0:
-                csv_file, stats_file = self.save_progress(all_players, f"SEASON_{season}")
-                print(f"   💾 Progress saved: {csv_file}")
+            # Checkpoint every season (only the new players are written)
+            segment_file, manifest_file = self.save_progress(all_players, completed_seasons=[season])
+            self.frontier.complete(finalize)
+            print(f"   💾 Progress saved: {segment_file}")
             
             # Show estimated completion
             elapsed = datetime.now() - start_time
@@ -397,6 +528,7 @@ class BeastOberfrankenCrawler:
         
         # FINAL RESULTS
         total_time = datetime.now() - start_time
+        all_players = self.checkpoint.load_players()
         self.stats['total_players'] = len(all_players)
         
         print(f"\n{'🎉' * 70}")
@@ -410,7 +542,7 @@ class BeastOberfrankenCrawler:
         print(f"{'🎉' * 70}")
         
         # Save final results
-        final_csv, final_stats = self.save_progress(all_players, "FINAL")
+        final_csv, final_stats = self.export_final_results()
         
         print(f"\n💾 FINAL BEAST RESULTS:")
         print(f"📊 Players CSV: {final_csv}")
@@ -448,7 +580,8 @@ def main():
             print(f"\n🎉 BEAST RAMPAGE COMPLETE! {len(all_players)} players conquered!")
         except KeyboardInterrupt:
             print(f"\n⚠️ Beast interrupted by user!")
-            beast.save_progress(getattr(beast, 'all_players', []), "INTERRUPTED")
+            beast.frontier.release()
+            print(f"💾 Completed seasons are journaled in {beast.checkpoint.directory} - run again to resume")
         except Exception as e:
             print(f"\n❌ Beast encountered error: {e}")
     else:
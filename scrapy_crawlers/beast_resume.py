@@ -6,16 +6,25 @@ Resume the beast from season 2006!
 
 import requests
 import time
-import csv
 import json
 import logging
 from datetime import datetime
 from bs4 import BeautifulSoup
 import re
 
+from async_fetch_engine import FetchRequest, fetch_all
+from http_response_cache import CachedSession
+from checkpoint_store import CheckpointStore
+from statistik_parser import parse_tables
+
 class BeastResumeCrawler:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, concurrent_leagues=4, requests_per_second=3.0,
+                 checkpoint_dir='BEAST_OBERFRANKEN_CHECKPOINT'):
+        self.session = CachedSession()
+        self.checkpoint = CheckpointStore(checkpoint_dir)
+        self.checkpointed_count = 0
+        self.concurrent_leagues = concurrent_leagues
+        self.requests_per_second = requests_per_second
         self.stats = {
             'start_time': datetime.now(),
             'seasons_crawled': 0,
@@ -46,20 +55,25 @@ class BeastResumeCrawler:
         })
         
     def unleash_beast_resume(self):
-        """Continue the beast from season 2006!"""
-        print("🔥🔥🔥 BEAST RESUMING FROM SEASON 2006! 🔥🔥🔥")
-        print("Previous progress: 3754 players from seasons 2003-2005")
-        print("Continuing with seasons 2006-2024...")
+        """Continue the beast from the seasons missing in the checkpoint manifest"""
+        completed_seasons = set(self.checkpoint.completed_seasons)
+        seasons = [season for season in range(2003, 2025) if str(season) not in completed_seasons]
+        total_players = self.checkpoint.total_records  # Previous count
+        
+        if not seasons:
+            print("✅ Checkpoint already covers all seasons 2003-2024")
+            return
+        
+        print(f"🔥🔥🔥 BEAST RESUMING FROM SEASON {seasons[0]}! 🔥🔥🔥")
+        print(f"Previous progress: {total_players} players from {len(completed_seasons)} seasons")
+        print(f"Continuing with {len(seasons)} seasons ({seasons[0]}-{seasons[-1]})...")
         
-        self.logger.info("🔥🔥🔥 BEAST RESUMED! CONTINUING FROM 2006! 🔥🔥🔥")
+        self.logger.info(f"🔥🔥🔥 BEAST RESUMED! CONTINUING FROM {seasons[0]}! 🔥🔥🔥")
         
-        # Resume from 2006
-        seasons = list(range(2006, 2025))
         all_players = []
-        total_players = 3754  # Previous count
         
         for season_idx, season in enumerate(seasons):
-            print(f"\\n🎯 BEAST ATTACKING SEASON {season} ({season_idx+4}/22)")
+            print(f"\\n🎯 BEAST ATTACKING SEASON {season} ({len(completed_seasons)+season_idx+1}/22)")
             print("🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥")
             
             start_time = time.time()
@@ -73,11 +87,11 @@ class BeastResumeCrawler:
             season_players = 0
             season_bg_litzendorf = 0
             
-            for idx, league in enumerate(leagues):
+            league_players = self.get_players_for_leagues(leagues, season)
+            
+            for idx, (league, players) in enumerate(zip(leagues, league_players)):
                 print(f"  🔍 Liga {idx+1}/{len(leagues)}: {league['full_name']} (ID: {league['id']})")
                 
-                players = self.get_league_players(league['id'], season)
-                
                 # Check for BG Litzendorf
                 bg_players = [p for p in players if 'litzendorf' in p.get('team', '').lower()]
                 if bg_players:
@@ -97,9 +111,6 @@ class BeastResumeCrawler:
                 all_players.extend(players)
                 season_players += len(players)
                 print(f"    ✅ {len(players)} players")
-                
-                # Brief pause
-                time.sleep(0.2)
             
             # Season summary
             season_time = time.time() - start_time
@@ -116,16 +127,15 @@ class BeastResumeCrawler:
                 eta_minutes = (remaining_seasons * season_time) / 60
                 print(f"   ⏱️ ETA: {eta_minutes:.1f} minutes remaining")
             
-            # Save progress every 3 seasons
-            if (season_idx + 1) % 3 == 0 or season_idx == len(seasons) - 1:
-                self.save_progress(all_players, f"SEASON_{season}")
-                
             self.stats['seasons_crawled'] += 1
             self.stats['players_collected'] = len(all_players)
             self.stats['bg_litzendorf_found'] += season_bg_litzendorf
+            
+            # Checkpoint every season (only the new players are written)
+            self.save_progress(all_players, completed_seasons=[season])
         
         # Final save
-        self.save_final_results(all_players, total_players)
+        self.save_final_results(all_players)
         
     def get_season_leagues(self, season):
         """Get all Oberfranken leagues for a season"""
@@ -235,113 +245,109 @@ class BeastResumeCrawler:
                 return int(match.group(1))
         return None
     
+    def league_players_url(self, liga_id, season):
+        """Player statistics URL for a league"""
+        return f"https://www.basketball-bund.net/liga_tool/statistik.do?Action=100&Liga={liga_id}&PageOffset=0&Saison={season}"
+    
     def get_league_players(self, liga_id, season):
         """Get all players from a league"""
-        url = f"https://www.basketball-bund.net/liga_tool/statistik.do?Action=100&Liga={liga_id}&PageOffset=0&Saison={season}"
-        
         try:
-            response = self.session.get(url, timeout=10)
-            if response.status_code != 200:
-                return []
-                
-            soup = BeautifulSoup(response.content, 'html.parser')
-            players = []
-            
-            # Find all player tables
-            for table in soup.find_all('table'):
-                rows = table.find_all('tr')
-                
-                if len(rows) < 2:
-                    continue
-                    
-                # Check if this looks like a player stats table
-                header = rows[0]
-                header_text = header.get_text()
-                
-                if any(keyword in header_text.lower() for keyword in ['name', 'spiele', 'punkte', 'rebounds']):
-                    # Get team name from preceding content
-                    team_name = "Unknown"
-                    prev_elements = []
-                    current = table.find_previous_sibling()
-                    while current and len(prev_elements) < 5:
-                        if hasattr(current, 'get_text'):
-                            text = current.get_text(strip=True)
-                            if text and len(text) > 5:
-                                prev_elements.append(text)
-                        current = current.find_previous_sibling()
-                    
-                    if prev_elements:
-                        team_name = prev_elements[0]
-                    
-                    # Parse player rows
-                    for row in rows[1:]:
-                        cells = row.find_all('td')
-                        if len(cells) >= 4:
-                            try:
-                                name = cells[0].get_text(strip=True)
-                                if name and name not in ['Gesamt', 'Durchschnitt', '']:
-                                    player_data = {
-                                        'name': name,
-                                        'team': team_name,
-                                        'spiele': cells[1].get_text(strip=True) if len(cells) > 1 else '',
-                                        'punkte': cells[2].get_text(strip=True) if len(cells) > 2 else '',
-                                        'punkte_pro_spiel': cells[3].get_text(strip=True) if len(cells) > 3 else ''
-                                    }
-                                    
-                                    # Additional stats if available
-                                    if len(cells) > 4:
-                                        player_data['rebounds'] = cells[4].get_text(strip=True)
-                                    if len(cells) > 5:
-                                        player_data['assists'] = cells[5].get_text(strip=True)
-                                    
-                                    players.append(player_data)
-                            except:
-                                continue
-            
-            return players
-            
+            response = self.session.get(self.league_players_url(liga_id, season), timeout=10)
+            return self.parse_league_players(response)
         except Exception as e:
             self.logger.error(f"Error getting players for liga {liga_id}: {e}")
             return []
     
-    def save_progress(self, all_players, suffix="PROGRESS"):
-        """Save progress during beast run"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    def get_players_for_leagues(self, leagues, season):
+        """Fetch the player pages of several leagues concurrently"""
+        responses = fetch_all(
+            [FetchRequest(self.league_players_url(league['id'], season)) for league in leagues],
+            session=self.session,
+            max_per_host=self.concurrent_leagues,
+            requests_per_second=self.requests_per_second,
+            timeout=10,
+            logger=self.logger,
+        )
         
-        # Save CSV
-        csv_file = f'BEAST_RESUME_{suffix}_{timestamp}.csv'
-        if all_players:
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=all_players[0].keys())
-                writer.writeheader()
-                writer.writerows(all_players)
+        results = []
+        for league, response in zip(leagues, responses):
+            try:
+                results.append(self.parse_league_players(response))
+            except Exception as e:
+                self.logger.error(f"Error getting players for liga {league['id']}: {e}")
+                results.append([])
+        return results
+    
+    def parse_league_players(self, response):
+        """Parse player tables from a league statistics response"""
+        if response.status_code != 200:
+            return []
+            
+        players = []
         
-        # Save stats
-        stats_file = f'BEAST_RESUME_STATS_{suffix}_{timestamp}.json'
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            current_stats = self.stats.copy()
-            current_stats['total_players'] = len(all_players)
-            current_stats['current_time'] = datetime.now().isoformat()
-            json.dump(current_stats, f, indent=2, ensure_ascii=False, default=str)
+        # Find all player tables
+        for table in parse_tables(response.content):
+            rows = table.rows
+            
+            if len(rows) < 2:
+                continue
+                
+            # Check if this looks like a player stats table
+            header_text = ' '.join(rows[0])
+            
+            if any(keyword in header_text.lower() for keyword in ['name', 'spiele', 'punkte', 'rebounds']):
+                # Get team name from preceding content
+                team_name = table.caption() or "Unknown"
+                
+                # Parse player rows
+                for cells in table.data_rows[1:]:
+                    if len(cells) >= 4:
+                        name = cells[0]
+                        if name and name not in ['Gesamt', 'Durchschnitt', '']:
+                            player_data = {
+                                'name': name,
+                                'team': team_name,
+                                'spiele': cells[1],
+                                'punkte': cells[2],
+                                'punkte_pro_spiel': cells[3]
+                            }
+                            
+                            # Additional stats if available
+                            if len(cells) > 4:
+                                player_data['rebounds'] = cells[4]
+                            if len(cells) > 5:
+                                player_data['assists'] = cells[5]
+                            
+                            players.append(player_data)
+        
+        return players
+    
+    def save_progress(self, all_players, completed_seasons=()):
+        """Append players added since the last checkpoint to the journal"""
+        current_stats = self.stats.copy()
+        current_stats['total_players'] = self.checkpoint.total_records + len(all_players) - self.checkpointed_count
+        current_stats['current_time'] = datetime.now().isoformat()
+        
+        self.checkpoint.append(
+            all_players[self.checkpointed_count:],
+            completed_seasons=completed_seasons,
+            stats=current_stats
+        )
+        self.checkpointed_count = len(all_players)
         
-        self.logger.info(f"💾 Progress saved: {len(all_players)} players")
+        self.logger.info(f"💾 Progress saved: {self.checkpoint.total_records} players")
     
-    def save_final_results(self, all_players, total_players):
+    def save_final_results(self, all_players):
         """Save final beast results"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Final CSV
-        csv_file = f'BEAST_RESUME_FINAL_{timestamp}.csv'
-        if all_players:
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=all_players[0].keys())
-                writer.writeheader()
-                writer.writerows(all_players)
+        # Final CSV, rebuilt from the journal
+        csv_file = self.checkpoint.export_csv(f'BEAST_RESUME_FINAL_{timestamp}.csv')
         
         # Final stats
         self.stats['end_time'] = datetime.now()
         self.stats['total_runtime'] = (self.stats['end_time'] - self.stats['start_time']).total_seconds()
-        self.stats['final_player_count'] = len(all_players)
+        self.stats['final_player_count'] = self.checkpoint.total_records
         
         stats_file = f'BEAST_RESUME_FINAL_STATS_{timestamp}.json'
         with open(stats_file, 'w', encoding='utf-8') as f:
@@ -349,7 +355,7 @@ class BeastResumeCrawler:
         
         print(f"\\n🔥🔥🔥 BEAST RESUME COMPLETE! 🔥🔥🔥")
         print(f"✅ Total players collected (resume portion): {len(all_players)}")
-        print(f"✅ Grand total (including previous): {total_players + len(all_players)}")
+        print(f"✅ Grand total (including previous): {self.checkpoint.total_records}")
         print(f"✅ Runtime: {self.stats['total_runtime']:.1f} seconds")
         print(f"✅ Files saved: {csv_file}, {stats_file}")
 
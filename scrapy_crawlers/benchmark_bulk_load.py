@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Benchmark: row-by-row inserts vs. bulk_loader.BulkLoader
+
+Loads the same synthetic rows twice into fresh SQLite files in a temp
+directory and reports rows/s:
+
+- matches: the basketball_analytics.db matches table with the API indexes of
+  analytics_schema in place (a rebuild into an existing database), once with
+  one cursor.execute per row as build_basketball_analytics_db did, once through
+  BulkLoader (executemany batches, indexes deferred)
+- importer: the five upserts per CSV row of BasketballDataImporter, once with
+  a new cursor per upsert, once through BulkLoader
+
+Both runs must end with identical table contents.
+
+Usage:
+    python benchmark_bulk_load.py [--rows 200000] [--keep]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from analytics_schema import TOTAL_POINTS_EXPRESSION, create_indexes
+from bulk_loader import BulkLoader
+
+MATCHES_SCHEMA = f'''
+    CREATE TABLE matches (
+        id INTEGER PRIMARY KEY,
+        match_id INTEGER UNIQUE,
+        league_id INTEGER,
+        season_year INTEGER,
+        match_day INTEGER,
+        match_no INTEGER,
+        kickoff_date TEXT,
+        kickoff_time TEXT,
+        home_team_id INTEGER,
+        guest_team_id INTEGER,
+        home_team_name TEXT,
+        guest_team_name TEXT,
+        result TEXT,
+        home_score INTEGER,
+        guest_score INTEGER,
+        confirmed BOOLEAN,
+        cancelled BOOLEAN,
+        forfeit BOOLEAN,
+        has_boxscore BOOLEAN DEFAULT FALSE,
+        total_points INTEGER GENERATED ALWAYS AS ({TOTAL_POINTS_EXPRESSION}) STORED
+    )
+'''
+# Empty companion tables so create_indexes finds every indexed table
+COMPANION_TABLES = [
+    'CREATE TABLE seasons (season_year INTEGER, league_id INTEGER)',
+    'CREATE TABLE team_season_stats (team_permanent_id INTEGER, season_year INTEGER, '
+    'point_differential INTEGER, avg_points_for REAL, wins INTEGER)',
+]
+MATCHES_INSERT = '''
+    INSERT OR IGNORE INTO matches
+    (match_id, league_id, season_year, match_day, match_no, kickoff_date, kickoff_time,
+     home_team_id, guest_team_id, home_team_name, guest_team_name, result,
+     home_score, guest_score, confirmed, cancelled, forfeit)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+IMPORTER_SCHEMA = [
+    'CREATE TABLE players (id TEXT PRIMARY KEY, name TEXT)',
+    'CREATE TABLE teams (id TEXT PRIMARY KEY, name TEXT)',
+    'CREATE TABLE leagues (ligaId TEXT, seasonId TEXT, name TEXT, region TEXT, source TEXT, scraped_at TEXT, '
+    'PRIMARY KEY (ligaId, seasonId))',
+    'CREATE TABLE seasons (seasonId TEXT PRIMARY KEY, year INTEGER, ligaId TEXT)',
+    'CREATE TABLE season_stats (id TEXT PRIMARY KEY, playerId TEXT REFERENCES players (id), '
+    'seasonId TEXT REFERENCES seasons (seasonId), pts INTEGER, g INTEGER, pts_g REAL)',
+]
+IMPORTER_STATEMENTS = {
+    'players': 'INSERT OR IGNORE INTO players (id, name) VALUES (?, ?)',
+    'teams': 'INSERT OR IGNORE INTO teams (id, name) VALUES (?, ?)',
+    'leagues': 'INSERT OR IGNORE INTO leagues (ligaId, seasonId, name, region, source, scraped_at) VALUES (?, ?, ?, ?, ?, ?)',
+    'seasons': 'INSERT OR IGNORE INTO seasons (seasonId, year, ligaId) VALUES (?, ?, ?)',
+    'season_stats': 'INSERT OR REPLACE INTO season_stats (id, playerId, seasonId, pts, g, pts_g) VALUES (?, ?, ?, ?, ?, ?)',
+}
+
+
+def synthetic_matches(count: int):
+    rng = random.Random(7)
+    rows = []
+    for match_id in rng.sample(range(1, count * 10), count):
+        season = rng.randint(2003, 2024)
+        home, guest = rng.sample(range(1, 3000), 2)
+        home_score, guest_score = rng.randint(40, 110), rng.randint(40, 110)
+        rows.append((
+            match_id, rng.randint(40000, 40500), season, rng.randint(1, 22), match_id,
+            f"{season}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", '19:30',
+            home, guest, f"Team {home}", f"Team {guest}", f"{home_score}:{guest_score}",
+            home_score, guest_score, True, False, False
+        ))
+    return rows
+
+
+def synthetic_importer_rows(count: int):
+    """The five upserts BasketballDataImporter.process_player_row issues per CSV row"""
+    rng = random.Random(11)
+    rows = []
+    for _ in range(count):
+        player_name = f"Player {rng.randint(1, count // 3 + 1)}"
+        team_name = f"Team {rng.randint(1, 400)}"
+        season = str(rng.randint(2003, 2024))
+        liga_id = str(rng.randint(40000, 40300))
+        points, games = rng.randint(0, 600), rng.randint(1, 22)
+        player_id = hashlib.md5(f"player:{player_name.lower()}".encode()).hexdigest()
+        team_id = hashlib.md5(f"team:{team_name.lower()}".encode()).hexdigest()
+        stat_id = hashlib.md5(f"stat:{player_id}:{season}".encode()).hexdigest()
+        rows.append([
+            ('players', (player_id, player_name)),
+            ('teams', (team_id, team_name)),
+            ('leagues', (liga_id, season, 'Bezirksliga', 'Oberfranken', 'beast_crawler', '2025-10-02')),
+            ('seasons', (season, int(season), liga_id)),
+            ('season_stats', (stat_id, player_id, season, points, games, round(points / games, 1))),
+        ])
+    return rows
+
+
+def new_matches_db(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute(MATCHES_SCHEMA)
+    for sql in COMPANION_TABLES:
+        conn.execute(sql)
+    create_indexes(conn)
+    conn.commit()
+    return conn
+
+
+def new_importer_db(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    for sql in IMPORTER_SCHEMA:
+        conn.execute(sql)
+    conn.commit()
+    return conn
+
+
+def load_matches_row_by_row(conn, rows):
+    cursor = conn.cursor()
+    for row in rows:
+        cursor.execute(MATCHES_INSERT, row)
+    conn.commit()
+
+
+def load_matches_bulk(conn, rows):
+    with BulkLoader(conn, defer_indexes=['matches']) as loader:
+        loader.register('matches', MATCHES_INSERT)
+        loader.add_many('matches', rows)
+
+
+def load_importer_row_by_row(conn, rows):
+    for upserts in rows:
+        for name, values in upserts:
+            cursor = conn.cursor()
+            cursor.execute(IMPORTER_STATEMENTS[name], values)
+    conn.commit()
+
+
+def load_importer_bulk(conn, rows):
+    with BulkLoader(conn) as loader:
+        for name in ('players', 'teams', 'leagues', 'seasons', 'season_stats'):
+            loader.register(name, IMPORTER_STATEMENTS[name])
+        for upserts in rows:
+            for name, values in upserts:
+                loader.add(name, values)
+
+
+def table_digest(conn, tables):
+    digest = hashlib.sha1()
+    for table in tables:
+        for row in conn.execute(f'SELECT * FROM {table} ORDER BY 1, 2'):
+            digest.update(repr(row).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def run(label, new_db, loaders, rows, row_count, tables, workdir):
+    print(f"\n🏀 {label}: {row_count:,} rows")
+    timings = {}
+    digests = {}
+    for name, load in loaders:
+        path = os.path.join(workdir, f"{label}_{name}.db")
+        conn = new_db(path)
+        started = time.perf_counter()
+        load(conn, rows)
+        timings[name] = time.perf_counter() - started
+        digests[name] = table_digest(conn, tables)
+        conn.close()
+        print(f"   {name:<12} {timings[name]:7.2f}s  {row_count / timings[name]:>10,.0f} rows/s")
+
+    identical = len(set(digests.values())) == 1
+    speedup = timings['row-by-row'] / timings['bulk']
+    print(f"   {'✅' if identical else '❌'} identical tables, {speedup:.1f}x faster")
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark row-by-row inserts against BulkLoader')
+    parser.add_argument('--rows', type=int, default=200000, help='Match rows (importer: a quarter of it)')
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark databases')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bulk_load_benchmark_')
+    try:
+        matches = synthetic_matches(args.rows)
+        ok = run('matches', new_matches_db,
+                 [('row-by-row', load_matches_row_by_row), ('bulk', load_matches_bulk)],
+                 matches, len(matches), ['matches'], workdir)
+
+        importer_rows = synthetic_importer_rows(max(1, args.rows // 4))
+        ok &= run('importer', new_importer_db,
+                  [('row-by-row', load_importer_row_by_row), ('bulk', load_importer_bulk)],
+                  importer_rows, len(importer_rows) * 5,
+                  ['players', 'teams', 'leagues', 'seasons', 'season_stats'], workdir)
+    finally:
+        if args.keep:
+            print(f"\n📁 Databases kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Benchmark: statistik_parser (lxml) vs. the previous BeautifulSoup parsers
+
+Runs the four statistik table parsers on saved HTML pages, once with a copy
+of the BeautifulSoup(html.parser) code they used before and once as they are
+now (through statistik_parser), checks that both give identical output and
+reports the speedup.
+
+Fixtures: saved statistik pages (statistik_*.html) plus the saved
+action_106_page_*.html pages, which share the site's sportView table markup.
+When no saved statistik page is found, one is generated from an action_106
+page with a 150-row scorer table.
+
+Usage:
+    python benchmark_statistik_parser.py [--repeat 20] [fixture.html ...]
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import re
+import time
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from beast_oberfranken_crawler import BeastOberfrankenCrawler
+from beast_resume import BeastResumeCrawler
+from extract_players_proper import parse_player_statistics_page
+from paginated_historical_crawler import extract_players_from_statistik
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+
+FIXTURE_PATTERNS = [
+    os.path.join(HERE, 'statistik_*.html'),
+    os.path.join(REPO_ROOT, 'statistik_*.html'),
+    os.path.join(REPO_ROOT, 'action_106_page_*.html'),
+]
+
+LEAGUE = {
+    'id': '26212', 'season': '2018', 'bezirk': 'Oberfranken', 'spielklasse': 'Bezirksliga',
+    'altersklasse': 'Senioren', 'geschlecht': 'männlich', 'league_full_name': 'Bezirksliga Herren',
+    'full_name': 'Bezirksliga Herren', 'kreis': ''
+}
+
+
+class FixtureResponse:
+    def __init__(self, content: bytes):
+        self.status_code = 200
+        self.content = content
+        self.text = content.decode('utf-8', errors='replace')
+
+
+# -- previous BeautifulSoup implementations (as they were before statistik_parser) --
+
+def legacy_parse_players_response(response, league):
+    liga_id = league['id']
+    season = league['season']
+    if response.status_code != 200 or len(response.text) < 5000:
+        return []
+    soup = BeautifulSoup(response.text, 'html.parser')
+    players = []
+    for table in soup.find_all('table'):
+        for row in table.find_all('tr'):
+            cells = row.find_all(['td', 'th'])
+            if len(cells) >= 4:
+                cell_texts = [cell.get_text(strip=True) for cell in cells]
+                if any(h in ' '.join(cell_texts).lower() for h in ['platz', 'name', 'vorname']):
+                    continue
+                try:
+                    if cell_texts[0] and cell_texts[1]:
+                        if cell_texts[0].isdigit():
+                            lastname = cell_texts[1]
+                            firstname = cell_texts[2] if len(cell_texts) > 2 else ""
+                            team = cell_texts[3] if len(cell_texts) > 3 else ""
+                            points = cell_texts[4] if len(cell_texts) > 4 else ""
+                            games = cell_texts[5] if len(cell_texts) > 5 else ""
+                        else:
+                            lastname = cell_texts[0]
+                            firstname = cell_texts[1] if len(cell_texts) > 1 else ""
+                            team = cell_texts[2] if len(cell_texts) > 2 else ""
+                            points = cell_texts[3] if len(cell_texts) > 3 else ""
+                            games = cell_texts[4] if len(cell_texts) > 4 else ""
+                        if lastname and len(lastname) > 1 and not lastname.isdigit():
+                            players.append({
+                                'lastname': lastname, 'firstname': firstname, 'team': team,
+                                'points': points, 'games': games, 'liga_id': liga_id, 'season': season,
+                                'bezirk': league['bezirk'], 'spielklasse': league['spielklasse'],
+                                'altersklasse': league['altersklasse'], 'geschlecht': league['geschlecht'],
+                                'league_full_name': league['full_name'], 'kreis': league['kreis']
+                            })
+                except:
+                    continue
+    unique_players = []
+    seen = set()
+    for player in players:
+        key = f"{player['lastname']}_{player['firstname']}_{player['team']}"
+        if key not in seen:
+            seen.add(key)
+            unique_players.append(player)
+    return unique_players
+
+
+def legacy_extract_players_from_statistik(soup, liga_id, league_name, season, endpoint):
+    players = []
+    tables = soup.find_all('table')
+    for table_idx, table in enumerate(tables):
+        rows = table.find_all('tr')
+        if len(rows) < 2:
+            continue
+        header_cells = rows[0].find_all(['th', 'td'])
+        header_texts = [cell.get_text(strip=True).lower() for cell in header_cells]
+        player_indicators = ['name', 'spieler', 'punkte', 'spiele', 'team', 'mannschaft', 'quote', '3er']
+        if not any(indicator in ' '.join(header_texts) for indicator in player_indicators):
+            continue
+        for row_idx, row in enumerate(rows[1:], 1):
+            cells = row.find_all(['td', 'th'])
+            if len(cells) < 2:
+                continue
+            cell_texts = [cell.get_text(strip=True) for cell in cells]
+            if not cell_texts[0] or len(cell_texts[0]) < 2:
+                continue
+            if any(header_word in cell_texts[0].lower() for header_word in ['name', 'spieler', 'rang', 'pos']):
+                continue
+            player = {
+                'name': cell_texts[0], 'season_id': season, 'liga_id': str(liga_id),
+                'league_name': league_name, 'endpoint': endpoint, 'table_index': table_idx,
+                'row_index': row_idx, 'extracted_at': datetime.now().isoformat(), 'raw_data': cell_texts
+            }
+            for i, value in enumerate(cell_texts[1:], 1):
+                player[f'col_{i}'] = value
+            players.append(player)
+    return players
+
+
+def legacy_parse_league_players(response):
+    if response.status_code != 200:
+        return []
+    soup = BeautifulSoup(response.content, 'html.parser')
+    players = []
+    for table in soup.find_all('table'):
+        rows = table.find_all('tr')
+        if len(rows) < 2:
+            continue
+        header_text = rows[0].get_text()
+        if any(keyword in header_text.lower() for keyword in ['name', 'spiele', 'punkte', 'rebounds']):
+            team_name = "Unknown"
+            prev_elements = []
+            current = table.find_previous_sibling()
+            while current and len(prev_elements) < 5:
+                if hasattr(current, 'get_text'):
+                    text = current.get_text(strip=True)
+                    if text and len(text) > 5:
+                        prev_elements.append(text)
+                current = current.find_previous_sibling()
+            if prev_elements:
+                team_name = prev_elements[0]
+            for row in rows[1:]:
+                cells = row.find_all('td')
+                if len(cells) >= 4:
+                    try:
+                        name = cells[0].get_text(strip=True)
+                        if name and name not in ['Gesamt', 'Durchschnitt', '']:
+                            player_data = {
+                                'name': name, 'team': team_name,
+                                'spiele': cells[1].get_text(strip=True) if len(cells) > 1 else '',
+                                'punkte': cells[2].get_text(strip=True) if len(cells) > 2 else '',
+                                'punkte_pro_spiel': cells[3].get_text(strip=True) if len(cells) > 3 else ''
+                            }
+                            if len(cells) > 4:
+                                player_data['rebounds'] = cells[4].get_text(strip=True)
+                            if len(cells) > 5:
+                                player_data['assists'] = cells[5].get_text(strip=True)
+                            players.append(player_data)
+                    except:
+                        continue
+    return players
+
+
+def legacy_parse_player_statistics_page(html_content, endpoint_code, endpoint_name, source_url):
+    # The old code tested for an exact 'sportItem' class token, which the site never uses
+    # (rows are sportItemOdd/sportItemEven) - compared here with the intended prefix match.
+    soup = BeautifulSoup(html_content, 'html.parser')
+    players = []
+    player_rows = []
+    for row in soup.find_all('tr'):
+        cells = row.find_all('td')
+        if cells and any(css.startswith('sportItem') for cell in cells for css in cell.get('class', [])):
+            player_rows.append(row)
+    for row_idx, row in enumerate(player_rows):
+        cells = row.find_all('td')
+        if len(cells) >= 6:
+            player_data = {'source_url': source_url, 'endpoint': endpoint_code, 'statistic_type': endpoint_name,
+                           'extracted_at': datetime.now().isoformat(), 'row_index': row_idx}
+            cell_texts = [cell.get_text(strip=True) for cell in cells]
+            try:
+                player_data['rank'] = int(cell_texts[0].replace('&nbsp;', '').strip().rstrip('.'))
+            except:
+                pass
+            player_data['surname'] = cell_texts[1].replace('&nbsp;', '').strip()
+            player_data['first_name'] = cell_texts[2].replace('&nbsp;', '').strip()
+            player_data['team'] = cell_texts[3].replace('&nbsp;', '').strip()
+            if player_data['first_name'] and player_data['surname']:
+                player_data['full_name'] = f"{player_data['first_name']} {player_data['surname']}"
+            try:
+                player_data['points'] = int(cell_texts[4].replace('&nbsp;', '').strip())
+            except:
+                pass
+            try:
+                player_data['games'] = int(cell_texts[5].replace('&nbsp;', '').strip())
+            except:
+                pass
+            if len(cell_texts) >= 7:
+                try:
+                    player_data['average'] = float(cell_texts[6].replace('&nbsp;', '').strip().replace(',', '.'))
+                except:
+                    pass
+            if player_data.get('full_name') and player_data.get('team'):
+                players.append(player_data)
+    return players
+
+
+def without_timestamps(players):
+    return [{k: v for k, v in player.items() if k != 'extracted_at'} for player in players]
+
+
+# (name, old implementation, new implementation), each taking a FixtureResponse
+PARSERS = [
+    ('BeastOberfrankenCrawler.parse_players_response',
+     lambda r: legacy_parse_players_response(r, LEAGUE),
+     lambda r: BeastOberfrankenCrawler.parse_players_response(None, r, LEAGUE)),
+    ('paginated_historical_crawler.extract_players_from_statistik',
+     lambda r: without_timestamps(legacy_extract_players_from_statistik(
+         BeautifulSoup(r.text, 'html.parser'), LEAGUE['id'], '', 2018, 'statBesteWerferArchiv')),
+     lambda r: without_timestamps(extract_players_from_statistik(r.text, LEAGUE['id'], '', 2018, 'statBesteWerferArchiv'))),
+    ('BeastResumeCrawler.parse_league_players',
+     legacy_parse_league_players,
+     lambda r: BeastResumeCrawler.parse_league_players(None, r)),
+    ('extract_players_proper.parse_player_statistics_page',
+     lambda r: without_timestamps(legacy_parse_player_statistics_page(r.text, 'statBesteWerferArchiv', 'Best Shooters', '')),
+     lambda r: without_timestamps(parse_player_statistics_page(r.text, 'statBesteWerferArchiv', 'Best Shooters', ''))),
+]
+
+
+def generate_statistik_fixture(template_path, rows=150):
+    """Scorer page built from a saved action_106 page: same page chrome, player result rows"""
+    with open(template_path, 'r', encoding='utf-8', errors='replace') as f:
+        page = f.read()
+    header = ('<tr>' + ''.join(f'<td class="sportViewHeader">{name}&nbsp;</td>'
+                               for name in ['Platz', 'Name', 'Vorname', 'Mannschaft', 'Punkte', 'Spiele', 'Schnitt'])
+              + '</tr>')
+    body = []
+    for i in range(1, rows + 1):
+        css = 'sportItemOdd' if i % 2 else 'sportItemEven'
+        values = [f'{i}.', f'Spieler{i}', f'Vorname{i}', f'BG Team {i % 12}', str(400 - i), str(18 - i % 5),
+                  f'{(400 - i) / (18 - i % 5):.1f}'.replace('.', ',')]
+        body.append('<tr>' + ''.join(f'<td class="{css}"><NOBR>&nbsp;{value}<NOBR></td>' for value in values) + '</tr>')
+    table = f'<table class="sportView">{header}{"".join(body)}</table>'
+    return re.sub(r'<table width="100%" style="clear: left".*?</table>\s*</td>', table, page, count=1, flags=re.S).encode('utf-8')
+
+
+def load_fixtures(paths):
+    fixtures = []
+    for pattern in paths or FIXTURE_PATTERNS:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, 'rb') as f:
+                fixtures.append((os.path.basename(path), f.read()))
+    if not any(name.startswith('statistik_') for name, _ in fixtures):
+        templates = sorted(glob.glob(os.path.join(REPO_ROOT, 'action_106_page_*.html')))
+        if templates:
+            fixtures.append(('generated statistik page (150 rows)', generate_statistik_fixture(templates[0])))
+    return fixtures
+
+
+def timed(func, response, repeat):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            result = func(response)
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the lxml statistik parser against BeautifulSoup')
+    parser.add_argument('fixtures', nargs='*', help='HTML files or glob patterns')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per page and parser')
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print("❌ No fixtures found")
+        return
+
+    print(f"🏁 STATISTIK PARSER BENCHMARK ({len(fixtures)} pages, {args.repeat} runs each)")
+    print(f"Started: {datetime.now().isoformat()}")
+
+    mismatches = 0
+    for name, legacy, new in PARSERS:
+        legacy_total = new_total = 0.0
+        rows = 0
+        for fixture_name, content in fixtures:
+            response = FixtureResponse(content)
+            legacy_result, legacy_time = timed(legacy, response, args.repeat)
+            new_result, new_time = timed(new, response, args.repeat)
+            legacy_total += legacy_time
+            new_total += new_time
+            rows += len(new_result)
+            if legacy_result != new_result:
+                mismatches += 1
+                print(f"  ❌ {name}: output differs on {fixture_name} ({len(legacy_result)} vs {len(new_result)} rows)")
+
+        print(f"\n📊 {name}")
+        print(f"   BeautifulSoup: {legacy_total * 1000:8.1f} ms")
+        print(f"   lxml:          {new_total * 1000:8.1f} ms")
+        print(f"   Speedup:       {legacy_total / new_total:8.1f}×  ({rows} rows)")
+
+    print(f"\n{'✅ Identical output on all pages' if not mismatches else f'❌ {mismatches} mismatches'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,24 @@
 #!/usr/bin/env python3
-import json
 import sqlite3
-from collections import defaultdict
 from datetime import datetime
 import re
 
-def build_basketball_analytics_db():
+from analytics_schema import TOTAL_POINTS_EXPRESSION, ensure_seasons_key, tune_analytics_db
+from bulk_loader import BulkLoader, iter_json_array
+from league_standings import LeagueStandings
+from team_season_stats import MATCH_UPSERT, TeamSeasonStatsAggregator
+
+SOURCE_JSON = 'historical_production_data.json'
+DB_PATH = 'basketball_analytics.db'
+
+def build_basketball_analytics_db(source_path=SOURCE_JSON, db_path=DB_PATH):
     """Build comprehensive basketball analytics database from real match data"""
     
     print("🏀 BUILDING BASKETBALL ANALYTICS DATABASE")
     print("=" * 60)
     
-    # Load historical production data
-    with open('historical_production_data.json', 'r', encoding='utf-8') as f:
-        historical_data = json.load(f)
-    
     # Create database
-    conn = sqlite3.connect('basketball_analytics.db')
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Create comprehensive schema
@@ -59,7 +61,7 @@ def build_basketball_analytics_db():
         )
     ''')
     
-    cursor.execute('''
+    cursor.execute(f'''
         CREATE TABLE IF NOT EXISTS matches (
             id INTEGER PRIMARY KEY,
             match_id INTEGER UNIQUE,
@@ -80,6 +82,7 @@ def build_basketball_analytics_db():
             cancelled BOOLEAN,
             forfeit BOOLEAN,
             has_boxscore BOOLEAN DEFAULT FALSE,
+            total_points INTEGER GENERATED ALWAYS AS ({TOTAL_POINTS_EXPRESSION}) STORED,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (league_id) REFERENCES leagues (league_id),
             FOREIGN KEY (home_team_id) REFERENCES teams (team_permanent_id),
@@ -107,7 +110,10 @@ def build_basketball_analytics_db():
         )
     ''')
     
-    print(f"📊 Processing {len(historical_data)} league seasons...")
+    # A rebuild into an existing database updates its league seasons in place
+    ensure_seasons_key(conn)
+    
+    print(f"📊 Streaming league seasons from {source_path}...")
     
     leagues_added = 0
     seasons_added = 0
@@ -115,178 +121,149 @@ def build_basketball_analytics_db():
     matches_added = 0
     
     all_teams = {}
-    team_stats = defaultdict(lambda: defaultdict(dict))
     
-    for league_season in historical_data:
-        league_id = league_season.get('league_id')
-        season_year = league_season.get('season_year')
-        matches = league_season.get('matches', [])
-        league_name = league_season.get('found_league_name', '')
-        district_name = league_season.get('found_district_name', '')
+    # Team season stats and standings follow the matches table: on a rebuild only
+    # the keys of new or changed matches are recomputed, a new database is aggregated once
+    team_season_stats = TeamSeasonStatsAggregator(conn)
+    standings = LeagueStandings(conn)
+    fresh = not cursor.execute('SELECT 1 FROM matches LIMIT 1').fetchone()
+    full_refresh = fresh or team_season_stats.ensure_schema()
+    full_standings = fresh or standings.ensure_schema()
+    
+    # One transaction with executemany batches; secondary indexes are rebuilt once at the end
+    loader = BulkLoader(conn, defer_indexes=['matches', 'seasons', 'teams'])
+    loader.register('leagues', '''
+        INSERT OR IGNORE INTO leagues (league_id, name, district_name)
+        VALUES (?, ?, ?)
+    ''')
+    loader.register('matches', MATCH_UPSERT)
+    loader.register('seasons', '''
+        INSERT INTO seasons 
+        (season_year, league_id, total_matches, completed_matches, teams_count)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (season_year, league_id) DO UPDATE SET
+            total_matches = excluded.total_matches,
+            completed_matches = excluded.completed_matches,
+            teams_count = excluded.teams_count
+    ''')
+    loader.register('teams', '''
+        INSERT OR REPLACE INTO teams 
+        (team_permanent_id, team_name, team_name_small, club_id, 
+         first_seen_season, last_seen_season, total_seasons)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''')
+    
+    # Rolled back (deferred indexes restored) if reading or parsing the source fails
+    with loader:
+        for league_season in iter_json_array(source_path):
+            league_id = league_season.get('league_id')
+            season_year = league_season.get('season_year')
+            matches = league_season.get('matches', [])
+            league_name = league_season.get('found_league_name', '')
+            district_name = league_season.get('found_district_name', '')
         
-        if not matches or not league_id:
-            continue
+            if not matches or not league_id:
+                continue
         
-        # Insert league
-        cursor.execute('''
-            INSERT OR IGNORE INTO leagues (league_id, name, district_name)
-            VALUES (?, ?, ?)
-        ''', (league_id, league_name, district_name))
-        leagues_added += 1
+            # Insert league
+            loader.add('leagues', (league_id, league_name, district_name))
+            leagues_added += 1
         
-        # Process matches and extract teams
-        completed_matches = 0
-        teams_in_season = set()
+            # Process matches and extract teams
+            completed_matches = 0
+            teams_in_season = set()
         
-        for match in matches:
-            if not isinstance(match, dict):
-                continue
+            for match in matches:
+                if not isinstance(match, dict):
+                    continue
                 
-            match_id = match.get('matchId')
-            if not match_id:
-                continue
-            
-            home_team = match.get('homeTeam', {}) or {}
-            guest_team = match.get('guestTeam', {}) or {}
-            result = match.get('result', '')
+                match_id = match.get('matchId')
+                if not match_id:
+                    continue
             
-            # Extract team data
-            home_team_id = home_team.get('teamPermanentId')
-            guest_team_id = guest_team.get('teamPermanentId')
-            home_team_name = home_team.get('teamname', '')
-            guest_team_name = guest_team.get('teamname', '')
+                home_team = match.get('homeTeam', {}) or {}
+                guest_team = match.get('guestTeam', {}) or {}
+                result = match.get('result', '')
             
-            if home_team_id:
-                teams_in_season.add(home_team_id)
-                if home_team_id not in all_teams:
-                    all_teams[home_team_id] = {
-                        'name': home_team_name,
-                        'name_small': home_team.get('teamnameSmall', ''),
-                        'club_id': home_team.get('clubId'),
-                        'first_season': season_year,
-                        'last_season': season_year,
-                        'seasons': set([season_year])
-                    }
-                else:
-                    all_teams[home_team_id]['seasons'].add(season_year)
-                    all_teams[home_team_id]['last_season'] = max(all_teams[home_team_id]['last_season'], season_year)
+                # Extract team data
+                home_team_id = home_team.get('teamPermanentId')
+                guest_team_id = guest_team.get('teamPermanentId')
+                home_team_name = home_team.get('teamname', '')
+                guest_team_name = guest_team.get('teamname', '')
             
-            if guest_team_id:
-                teams_in_season.add(guest_team_id)
-                if guest_team_id not in all_teams:
-                    all_teams[guest_team_id] = {
-                        'name': guest_team_name,
-                        'name_small': guest_team.get('teamnameSmall', ''),
-                        'club_id': guest_team.get('clubId'),
-                        'first_season': season_year,
-                        'last_season': season_year,
-                        'seasons': set([season_year])
-                    }
-                else:
-                    all_teams[guest_team_id]['seasons'].add(season_year)
-                    all_teams[guest_team_id]['last_season'] = max(all_teams[guest_team_id]['last_season'], season_year)
+                if home_team_id:
+                    teams_in_season.add(home_team_id)
+                    if home_team_id not in all_teams:
+                        all_teams[home_team_id] = {
+                            'name': home_team_name,
+                            'name_small': home_team.get('teamnameSmall', ''),
+                            'club_id': home_team.get('clubId'),
+                            'first_season': season_year,
+                            'last_season': season_year,
+                            'seasons': set([season_year])
+                        }
+                    else:
+                        all_teams[home_team_id]['seasons'].add(season_year)
+                        all_teams[home_team_id]['last_season'] = max(all_teams[home_team_id]['last_season'], season_year)
             
-            # Parse scores
-            home_score = 0
-            guest_score = 0
-            if result and ':' in result:
-                try:
-                    scores = result.split(':')
-                    home_score = int(scores[0].strip())
-                    guest_score = int(scores[1].strip())
-                    completed_matches += 1
-                except ValueError:
-                    pass
+                if guest_team_id:
+                    teams_in_season.add(guest_team_id)
+                    if guest_team_id not in all_teams:
+                        all_teams[guest_team_id] = {
+                            'name': guest_team_name,
+                            'name_small': guest_team.get('teamnameSmall', ''),
+                            'club_id': guest_team.get('clubId'),
+                            'first_season': season_year,
+                            'last_season': season_year,
+                            'seasons': set([season_year])
+                        }
+                    else:
+                        all_teams[guest_team_id]['seasons'].add(season_year)
+                        all_teams[guest_team_id]['last_season'] = max(all_teams[guest_team_id]['last_season'], season_year)
             
-            # Insert match
-            cursor.execute('''
-                INSERT OR IGNORE INTO matches 
-                (match_id, league_id, season_year, match_day, match_no, kickoff_date, kickoff_time,
-                 home_team_id, guest_team_id, home_team_name, guest_team_name, result, 
-                 home_score, guest_score, confirmed, cancelled, forfeit)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                match_id, league_id, season_year, 
-                match.get('matchDay'), match.get('matchNo'),
-                match.get('kickoffDate'), match.get('kickoffTime'),
-                home_team_id, guest_team_id, home_team_name, guest_team_name,
-                result, home_score, guest_score,
-                match.get('ergebnisbestaetigt', False),
-                match.get('abgesagt', False),
-                match.get('verzicht', False)
-            ))
-            matches_added += 1
+                # Parse scores
+                home_score = 0
+                guest_score = 0
+                if result and ':' in result:
+                    try:
+                        scores = result.split(':')
+                        home_score = int(scores[0].strip())
+                        guest_score = int(scores[1].strip())
+                        completed_matches += 1
+                    except ValueError:
+                        pass
             
-            # Update team stats
-            if home_team_id and guest_team_id and result and ':' in result:
-                season_key = f"{season_year}_{league_id}"
-                
-                # Initialize team stats
-                for team_id in [home_team_id, guest_team_id]:
-                    if team_id not in team_stats[season_key]:
-                        team_stats[season_key][team_id] = {
-                            'games': 0, 'wins': 0, 'losses': 0,
-                            'points_for': 0, 'points_against': 0
-                        }
-                
-                # Update home team stats
-                team_stats[season_key][home_team_id]['games'] += 1
-                team_stats[season_key][home_team_id]['points_for'] += home_score
-                team_stats[season_key][home_team_id]['points_against'] += guest_score
-                if home_score > guest_score:
-                    team_stats[season_key][home_team_id]['wins'] += 1
-                else:
-                    team_stats[season_key][home_team_id]['losses'] += 1
-                
-                # Update guest team stats  
-                team_stats[season_key][guest_team_id]['games'] += 1
-                team_stats[season_key][guest_team_id]['points_for'] += guest_score
-                team_stats[season_key][guest_team_id]['points_against'] += home_score
-                if guest_score > home_score:
-                    team_stats[season_key][guest_team_id]['wins'] += 1
-                else:
-                    team_stats[season_key][guest_team_id]['losses'] += 1
+                # Insert match
+                loader.add('matches', (
+                    match_id, league_id, season_year, 
+                    match.get('matchDay'), match.get('matchNo'),
+                    match.get('kickoffDate'), match.get('kickoffTime'),
+                    home_team_id, guest_team_id, home_team_name, guest_team_name,
+                    result, home_score, guest_score,
+                    match.get('ergebnisbestaetigt', False),
+                    match.get('abgesagt', False),
+                    match.get('verzicht', False)
+                ))
+                matches_added += 1
         
-        # Insert season
-        cursor.execute('''
-            INSERT OR IGNORE INTO seasons 
-            (season_year, league_id, total_matches, completed_matches, teams_count)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (season_year, league_id, len(matches), completed_matches, len(teams_in_season)))
-        seasons_added += 1
+            # Insert season
+            loader.add('seasons', (season_year, league_id, len(matches), completed_matches, len(teams_in_season)))
+            seasons_added += 1
     
-    # Insert teams
-    for team_id, team_data in all_teams.items():
-        cursor.execute('''
-            INSERT OR REPLACE INTO teams 
-            (team_permanent_id, team_name, team_name_small, club_id, 
-             first_seen_season, last_seen_season, total_seasons)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            team_id, team_data['name'], team_data['name_small'], team_data['club_id'],
-            team_data['first_season'], team_data['last_season'], len(team_data['seasons'])
-        ))
-        teams_added += 1
-    
-    # Insert team season stats
-    for season_key, teams in team_stats.items():
-        season_year, league_id = map(int, season_key.split('_'))
-        for team_id, stats in teams.items():
-            cursor.execute('''
-                INSERT OR REPLACE INTO team_season_stats 
-                (team_permanent_id, season_year, league_id, games_played, wins, losses,
-                 points_for, points_against, point_differential, avg_points_for, avg_points_against)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                team_id, season_year, league_id,
-                stats['games'], stats['wins'], stats['losses'],
-                stats['points_for'], stats['points_against'],
-                stats['points_for'] - stats['points_against'],
-                stats['points_for'] / max(stats['games'], 1),
-                stats['points_against'] / max(stats['games'], 1)
+        # Insert teams
+        for team_id, team_data in all_teams.items():
+            loader.add('teams', (
+                team_id, team_data['name'], team_data['name_small'], team_data['club_id'],
+                team_data['first_season'], team_data['last_season'], len(team_data['seasons'])
             ))
+            teams_added += 1
+    
+    print(f"💾 Loaded {loader.summary()}")
+    team_season_stats.refresh(full=full_refresh)
+    standings.refresh(full=full_standings)
     
-    conn.commit()
+    # Indexes for the API queries, built once after the bulk insert
+    tune_analytics_db(conn)
     
     print(f"\n📊 DATABASE SUMMARY:")
     print(f"   🏆 Leagues: {leagues_added}")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Bulk SQLite Loader
+
+Batched, transactional inserts for the database builders and import scripts,
+instead of one cursor.execute per row with a new cursor per upsert:
+
+- rows are collected per named statement and written with executemany in
+  batches of BULK_BATCH_SIZE; batches are flushed in registration order, so
+  parent rows are written before the rows referencing them
+- the whole load is one transaction with synchronous=OFF and a large page
+  cache (both restored afterwards); the database is switched to WAL, which it keeps, so the
+  read-only API connections are not blocked while a load runs
+- secondary indexes of the loaded tables can be dropped for the load and
+  rebuilt once at the end
+- with an error handler, a failing batch is rolled back to a savepoint and
+  retried row by row, so one bad row does not cost the whole batch
+- iter_json_array() streams the elements of a (possibly huge) JSON array
+  without loading the whole file
+"""
+
+import json
+import sqlite3
+import time
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+BULK_BATCH_SIZE = 5000
+# Page cache for the load (KiB); keeps the UNIQUE indexes in memory while inserting
+LOAD_CACHE_SIZE_KIB = 256 * 1024
+JSON_READ_SIZE = 1024 * 1024
+# Characters that can continue a JSON number cut off at a chunk boundary
+NUMBER_CHARS = '0123456789.eE+-'
+
+
+class BulkLoader:
+    """
+    Usage:
+
+        with BulkLoader(conn, defer_indexes=['matches']) as loader:
+            loader.register('matches', 'INSERT OR IGNORE INTO matches (...) VALUES (?, ...)')
+            for row in rows:
+                loader.add('matches', row)
+        loader.changes['matches']  # rows inserted
+
+    Leaving the block with an exception rolls the load back. Without
+    error_handler(name, row, error) a failing row raises from add() / flush().
+    """
+
+    def __init__(self, conn: sqlite3.Connection, batch_size: int = BULK_BATCH_SIZE,
+                 defer_indexes: Sequence[str] = (),
+                 error_handler: Optional[Callable[[str, Sequence, Exception], None]] = None):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.defer_indexes = list(defer_indexes)
+        self.error_handler = error_handler
+        self.statements = {}
+        self.pending = {}
+        self.pending_rows = 0
+        self.rows_added = 0
+        self.changes = {}
+        self._dropped_indexes = []
+        self._saved_pragmas = None
+        self._started = None
+
+    def register(self, name: str, sql: str):
+        """Add a named INSERT statement (flushed in registration order)"""
+        if name not in self.statements:
+            self.statements[name] = sql
+            self.pending[name] = []
+            self.changes[name] = 0
+
+    def add(self, name: str, row: Sequence):
+        self.pending[name].append(row)
+        self.pending_rows += 1
+        self.rows_added += 1
+        if self.pending_rows >= self.batch_size:
+            self.flush()
+
+    def add_many(self, name: str, rows: Iterable[Sequence]):
+        for row in rows:
+            self.add(name, row)
+
+    def flush(self):
+        """Write all pending rows (inside the open transaction)"""
+        cursor = self.conn.cursor()
+        for name, rows in self.pending.items():
+            if not rows:
+                continue
+            if self.error_handler is None:
+                cursor.executemany(self.statements[name], rows)
+                self.changes[name] += max(cursor.rowcount, 0)
+            else:
+                self._write_guarded(cursor, name, rows)
+            rows.clear()
+        self.pending_rows = 0
+
+    def _write_guarded(self, cursor, name: str, rows):
+        cursor.execute('SAVEPOINT bulk_batch')
+        try:
+            cursor.executemany(self.statements[name], rows)
+            self.changes[name] += max(cursor.rowcount, 0)
+        except sqlite3.Error:
+            # Undo the partial batch, then find the failing rows one by one
+            cursor.execute('ROLLBACK TO bulk_batch')
+            for row in rows:
+                try:
+                    cursor.execute(self.statements[name], row)
+                    self.changes[name] += max(cursor.rowcount, 0)
+                except sqlite3.Error as e:
+                    self.error_handler(name, row, e)
+        finally:
+            cursor.execute('RELEASE bulk_batch')
+
+    def _pragma(self, name: str):
+        return self.conn.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def begin(self):
+        """Start the load transaction (use finish() / abort() to end it)"""
+        self.conn.commit()
+        self._saved_pragmas = (self._pragma('synchronous'), self._pragma('cache_size'))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=OFF')
+        self.conn.execute(f'PRAGMA cache_size=-{LOAD_CACHE_SIZE_KIB}')
+        self._started = time.perf_counter()
+        self.conn.execute('BEGIN')
+        self._drop_indexes()
+        return self
+
+    def finish(self):
+        """Write the remaining rows, rebuild deferred indexes and commit"""
+        try:
+            self.flush()
+            self._rebuild_indexes()
+            self.conn.commit()
+        finally:
+            self._restore_pragmas()
+
+    def abort(self):
+        """Roll the whole load back"""
+        try:
+            self.conn.rollback()
+            for rows in self.pending.values():
+                rows.clear()
+            self.pending_rows = 0
+            self._dropped_indexes = []
+        finally:
+            self._restore_pragmas()
+
+    def _restore_pragmas(self):
+        synchronous, cache_size = self._saved_pragmas
+        self.conn.execute(f'PRAGMA synchronous={int(synchronous)}')
+        self.conn.execute(f'PRAGMA cache_size={int(cache_size)}')
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finish()
+        else:
+            self.abort()
+        return False
+
+    def _drop_indexes(self):
+        if not self.defer_indexes:
+            return
+        placeholders = ', '.join('?' * len(self.defer_indexes))
+        # Automatic indexes (UNIQUE / PRIMARY KEY) have no sql and stay, and so
+        # do explicit unique indexes: they enforce keys that upserts rely on
+        self._dropped_indexes = self.conn.execute(f'''
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE INDEX%'
+              AND tbl_name IN ({placeholders})
+        ''', self.defer_indexes).fetchall()
+        for name, _ in self._dropped_indexes:
+            self.conn.execute(f'DROP INDEX {name}')
+
+    def _rebuild_indexes(self):
+        for _, sql in self._dropped_indexes:
+            self.conn.execute(sql)
+        self._dropped_indexes = []
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started if self._started else 0.0
+
+    def summary(self) -> str:
+        elapsed = self.elapsed
+        rate = self.rows_added / elapsed if elapsed else 0
+        return f"{self.rows_added:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)"
+
+
+def _skip_whitespace(buffer: str, position: int) -> int:
+    while position < len(buffer) and buffer[position] in ' \t\r\n':
+        position += 1
+    return position
+
+
+def _array_start(buffer: str, key: Optional[str], search_from: int):
+    """
+    (position after the opening bracket, 0) once found, else (None, offset to
+    continue searching from after more data was read)
+    """
+    if key is None:
+        start = _skip_whitespace(buffer, 0)
+        if start == len(buffer):
+            return None, 0
+        if buffer[start] != '[':
+            raise ValueError("File does not contain a JSON array")
+        return start + 1, 0
+
+    quoted_key = json.dumps(key)
+    while True:
+        key_position = buffer.find(quoted_key, search_from)
+        if key_position < 0:
+            # Keep a possibly cut-off key at the end of the buffer
+            return None, max(0, len(buffer) - len(quoted_key))
+        colon = _skip_whitespace(buffer, key_position + len(quoted_key))
+        bracket = _skip_whitespace(buffer, colon + 1)
+        if bracket >= len(buffer):
+            return None, key_position
+        if buffer[colon] == ':':
+            if buffer[bracket] != '[':
+                raise ValueError(f"'{key}' is not a JSON array")
+            return bracket + 1, 0
+        # The key text appeared as a value; look further
+        search_from = key_position + 1
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def iter_json_array(path: str, key: Optional[str] = None, read_size: int = JSON_READ_SIZE) -> Iterator:
+    """
+    Elements of the top-level JSON array in path, decoded one at a time. With
+    key, the array is the value of the first "key": [...] in the file (e.g.
+    the 'players' list of a crawl export).
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        position = None
+        search_from = 0
+        while position is None:
+            chunk = f.read(read_size)
+            if not chunk:
+                return
+            buffer += chunk
+            position, search_from = _array_start(buffer, key, search_from)
+
+        eof = False
+        while True:
+            position = _skip_whitespace(buffer, position)
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            if position < len(buffer) and buffer[position] == ',':
+                position = _skip_whitespace(buffer, position + 1)
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                # A number is only finished once a character follows that cannot
+                # continue it ("1." | "5e10" would otherwise decode as 1)
+                complete = eof or not _is_number(value) or bool(buffer[end:].lstrip(NUMBER_CHARS))
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield value
+            position = end
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Player Card Renderer
+
+Renders the vintage player cards of BasketballStatsEngine.generate_player_card.
+
+- the background, borders, header box and fixed labels of every style are
+  drawn once per process and cached; a card is a copy of that template with
+  only the player's text composited on top
+- fonts are loaded once per process
+- bulk renders are spread over a process pool
+- finished PNGs are kept in an on-disk cache keyed by player, season, style
+  and a hash of the rendered data, so repeat requests skip rendering; the
+  cache lives next to this module and is capped at max_cache_bytes, least
+  recently used cards are removed first
+
+The output is pixel-identical to drawing the whole card per player.
+"""
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+CARD_WIDTH, CARD_HEIGHT = 600, 850
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'card_cache')
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+# Pruning goes down to this share of the cap, so it does not run on every write
+PRUNE_TARGET = 0.8
+# Bump when the card design changes so stale cached cards are not served
+RENDERER_VERSION = 1
+# Below this many uncached cards, rendering inline beats starting workers
+MIN_POOL_JOBS = 4
+
+CATEGORY_COLORS = {
+    'statBesteWerferArchiv': '#FF6B35',
+    'statBesteFreiWerferArchiv': '#4ECDC4',
+    'statBeste3erWerferArchiv': '#45B7D1'
+}
+CATEGORY_NAMES = {
+    'statBesteWerferArchiv': 'BESTE WERFER',
+    'statBesteFreiWerferArchiv': 'FREIWURF EXPERTE',
+    'statBeste3erWerferArchiv': '3-PUNKTE SPEZIALIST'
+}
+
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w-]+')
+
+STATS_Y = 190
+STAT_ROW_HEIGHT = 35
+STAT_ROWS = 4
+CATEGORIES_Y = STATS_Y + (STAT_ROWS - 1) * STAT_ROW_HEIGHT + 80
+BADGE_Y = CATEGORIES_Y + 30
+
+
+class CardFonts:
+    def __init__(self, title, header, stat, small):
+        self.title = title
+        self.header = header
+        self.stat = stat
+        self.small = small
+
+
+@lru_cache(maxsize=1)
+def load_fonts() -> CardFonts:
+    """Card fonts, loaded once per process (default font if Arial is missing)"""
+    try:
+        return CardFonts(*(ImageFont.truetype("arial.ttf", size) for size in (32, 24, 18, 14)))
+    except OSError:
+        default = ImageFont.load_default()
+        return CardFonts(default, default, default, default)
+
+
+def card_template(style: str) -> Image.Image:
+    """Background, border and fixed labels of a style (treat as read-only)"""
+    # Every style but vintage shares the plain white template
+    return _build_template('vintage' if style == 'vintage' else 'plain')
+
+
+@lru_cache(maxsize=None)
+def _build_template(style: str) -> Image.Image:
+    fonts = load_fonts()
+    card = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), color='white')
+    draw = ImageDraw.Draw(card)
+
+    if style == 'vintage':
+        # Vintage Upper Deck style
+        # Background gradient effect
+        for y in range(CARD_HEIGHT):
+            color_intensity = int(240 - (y / CARD_HEIGHT) * 40)
+            draw.rectangle([(0, y), (CARD_WIDTH, y+1)], fill=(color_intensity, color_intensity-10, color_intensity-20))
+
+        # Border
+        draw.rectangle([(10, 10), (CARD_WIDTH-10, CARD_HEIGHT-10)], outline='#8B4513', width=8)
+        draw.rectangle([(15, 15), (CARD_WIDTH-15, CARD_HEIGHT-15)], outline='#DAA520', width=4)
+
+        # Header section
+        draw.rectangle([(25, 25), (CARD_WIDTH-25, 120)], fill='#1a237e', outline='#DAA520', width=2)
+
+    draw.text((50, 150), "SEASON STATISTICS", fill='#1a237e', font=fonts.header)
+    draw.text((50, CATEGORIES_Y), "CATEGORIES", fill='#1a237e', font=fonts.header)
+    draw.text((50, CARD_HEIGHT - 80), "Basketball-Bund.net Export", fill='#666666', font=fonts.small)
+    # Upper Deck style logo area
+    draw.text((CARD_WIDTH - 200, CARD_HEIGHT - 40), "BGL STATS", fill='#1a237e', font=fonts.header)
+    return card
+
+
+def render_card(player: Dict, advanced_stats: Dict, style: str = 'vintage') -> Image.Image:
+    """Template copy with the player's text drawn on top"""
+    fonts = load_fonts()
+    card = card_template(style).copy()
+    draw = ImageDraw.Draw(card)
+
+    if style == 'vintage':
+        # Player name
+        name = player.get('name', 'Unknown')
+        name_bbox = draw.textbbox((0, 0), name, font=fonts.title)
+        draw.text(((CARD_WIDTH - (name_bbox[2] - name_bbox[0])) // 2, 45), name, fill='white', font=fonts.title)
+
+        # Team and league
+        team_text = f"{player.get('team', 'Unknown Team')} | Liga {player.get('liga_id', '')}"
+        team_bbox = draw.textbbox((0, 0), team_text, font=fonts.header)
+        draw.text(((CARD_WIDTH - (team_bbox[2] - team_bbox[0])) // 2, 85), team_text,
+                  fill='#DAA520', font=fonts.header)
+
+    # Basic stats with mapped field names
+    stats_to_show = [
+        ("Punkte", player.get('points', 0)),
+        ("Spiele", player.get('games', 0)),
+        ("PPG", advanced_stats['PPG']),
+        ("FG%", advanced_stats['FG_PCT']),
+        ("3P%", advanced_stats['3P_PCT']),
+        ("FT%", advanced_stats['FT_PCT']),
+        ("Impact", advanced_stats['IMPACT']),
+        ("TS%", advanced_stats['TS_PCT']),
+    ]
+
+    # Draw stats in two columns
+    for i, (stat_name, stat_value) in enumerate(stats_to_show):
+        x_pos = 50 if i % 2 == 0 else 320
+        y_pos = STATS_Y + (i // 2) * STAT_ROW_HEIGHT
+        draw.text((x_pos, y_pos), f"{stat_name}:", fill='#333333', font=fonts.stat)
+        draw.text((x_pos + 120, y_pos), str(stat_value), fill='#1a237e', font=fonts.stat)
+
+    # Category badge
+    category = player.get('endpoint', '')
+    if category in CATEGORY_COLORS:
+        draw.rectangle([(50, BADGE_Y), (250, BADGE_Y + 30)],
+                       fill=CATEGORY_COLORS[category], outline='#333333', width=2)
+        draw.text((60, BADGE_Y + 8), CATEGORY_NAMES[category], fill='white', font=fonts.stat)
+
+    # Season info
+    draw.text((50, CARD_HEIGHT - 100), f"Saison: {player.get('season_id', '2018')}",
+              fill='#666666', font=fonts.small)
+    return card
+
+
+def render_card_png(job: Tuple[Dict, Dict, str]) -> bytes:
+    """Process pool entry point: (player, advanced_stats, style) -> PNG bytes"""
+    player, advanced_stats, style = job
+    buffer = BytesIO()
+    render_card(player, advanced_stats, style).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _card_fields(player: Dict) -> Dict:
+    # Keys attached by the API (e.g. advanced_stats) are not card data
+    return {key: value for key, value in player.items() if key != 'advanced_stats'}
+
+
+class CardRenderer:
+    """Renders cards through the on-disk cache and a lazily started process pool"""
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, max_workers: Optional[int] = None,
+                 max_cache_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_cache_bytes = max_cache_bytes
+        self._cache_bytes = None  # counted on the first write
+        self._pool = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_key(self, player: Dict, advanced_stats: Dict, style: str) -> str:
+        data = json.dumps([RENDERER_VERSION, _card_fields(player), advanced_stats, style],
+                          sort_keys=True, ensure_ascii=False, default=str)
+        data_hash = hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+        prefix = f"{player.get('name', 'unknown')}_{player.get('season_id', '')}_{style}"
+        return f"{UNSAFE_FILENAME_CHARS.sub('_', prefix)[:80]}_{data_hash}"
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _read_cache(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(key)
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+            # The modification time orders cards for LRU pruning
+            os.utime(path)
+            return png
+        except OSError:
+            return None
+
+    def _write_cache(self, key: str, png: bytes):
+        if not self.cache_dir:
+            return
+        path = self._cache_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Could not cache card {key}: {e}")
+            return
+        if self._cache_bytes is None:
+            self._cache_bytes = sum(size for _, size, _ in self._cached_files())
+        else:
+            self._cache_bytes += len(png)
+        if self._cache_bytes > self.max_cache_bytes:
+            self.prune()
+
+    def _cached_files(self) -> List[Tuple[float, int, str]]:
+        files = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.png'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def prune(self):
+        """Remove least recently used cards until the cache is below PRUNE_TARGET of the cap"""
+        files = sorted(self._cached_files())
+        total = sum(size for _, size, _ in files)
+        target = self.max_cache_bytes * PRUNE_TARGET
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._cache_bytes = total
+
+    def render_png(self, player: Dict, advanced_stats: Dict, style: str = 'vintage') -> bytes:
+        return self.render_many([(player, advanced_stats, style)])[0]
+
+    def render_many(self, jobs: List[Tuple[Dict, Dict, str]]) -> List[bytes]:
+        """PNG bytes for every (player, advanced_stats, style), in order"""
+        keys = [self.cache_key(*job) for job in jobs]
+        results = [self._read_cache(key) for key in keys]
+        missing = [i for i, png in enumerate(results) if png is None]
+
+        if self.max_workers > 1 and len(missing) >= MIN_POOL_JOBS:
+            rendered = list(self._get_pool().map(render_card_png, [jobs[i] for i in missing]))
+        else:
+            rendered = [render_card_png(jobs[i]) for i in missing]
+
+        for i, png in zip(missing, rendered):
+            results[i] = png
+            self._write_cache(keys[i], png)
+        return results
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
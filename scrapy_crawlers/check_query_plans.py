@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Query Plan Check
+
+Calls every route of enhanced_basketball_api.py (with the filter combinations
+of /api/matches and /api/analytics/top-teams) through the Flask test client,
+records the SQL it runs and prints EXPLAIN QUERY PLAN for each statement.
+
+Exits with status 1 if any query scans the matches table without an index.
+Index-only walks (COUNT(*) over a covering index, ORDER BY ... LIMIT along
+an index) are accepted.
+
+    python check_query_plans.py --db basketball_analytics.db
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+
+import enhanced_basketball_api as api
+from sqlite_access import ReadOnlyDatabase
+
+# "SCAN m" / "SCAN matches" without "USING ... INDEX"
+FULL_SCAN_RE = re.compile(r'^SCAN (?:matches|m)(?: AS \w+)?$')
+
+
+def sample_values(db: ReadOnlyDatabase):
+    team_id = db.scalar('SELECT team_permanent_id FROM teams ORDER BY team_permanent_id LIMIT 1')
+    season, league_id = db.one('SELECT season_year, league_id FROM seasons ORDER BY season_year DESC LIMIT 1') or (None, None)
+    # A keyset position a few pages deep
+    kickoff_date, match_id = db.one(f'SELECT kickoff_date, match_id FROM matches m ORDER BY {api.MATCH_ORDER} '
+                                    'LIMIT 1 OFFSET 500') or (None, 0)
+    cursor = api.encode_match_cursor(kickoff_date, match_id)
+    return team_id, season, league_id, cursor
+
+
+def api_urls(team_id, season, league_id, cursor):
+    urls = ['/health', '/api/dashboard', '/api/teams', f'/api/teams/{team_id}', '/api/leagues', '/api/seasons',
+            f'/api/leagues/{league_id}/standings?season={season}',
+            '/api/analytics/changes', '/api/analytics/changes?since=10&limit=50']
+    match_filters = ['', f'season={season}', f'league_id={league_id}', f'team_id={team_id}',
+                     f'season={season}&league_id={league_id}', f'team_id={team_id}&season={season}', 'page=5']
+    urls += [f'/api/matches?{query}' for query in match_filters]
+    urls += [f'/api/matches?{query}&cursor={cursor}' for query in match_filters[:-1]]
+    for metric in ('differential', 'ppg', 'wins'):
+        urls.append(f'/api/analytics/top-teams?metric={metric}')
+        urls.append(f'/api/analytics/top-teams?metric={metric}&season={season}')
+    return urls
+
+
+def collect_statements(db_path: str):
+    """SQL statements (with bound values) run by the API routes, in first-seen order"""
+    # One pooled connection, so every route's queries pass the trace callback
+    api.basketball_db = ReadOnlyDatabase(db_path, pool_size=1)
+    api.overview_cache.invalidate()
+    api.match_counts.invalidate()
+    urls = api_urls(*sample_values(api.basketball_db))
+    statements = []
+    with api.basketball_db.connection() as conn:
+        conn.set_trace_callback(statements.append)
+
+    client = api.app.test_client()
+    failed = []
+    for url in urls:
+        response = client.get(url)
+        if response.status_code != 200:
+            failed.append(f"{url} -> {response.status_code}")
+
+    seen = set()
+    unique = []
+    for sql in statements:
+        if sql.lstrip().upper().startswith('SELECT') and sql not in seen:
+            seen.add(sql)
+            unique.append(sql)
+    return unique, failed
+
+
+def query_plan(conn: sqlite3.Connection, sql: str):
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that no API query scans the matches table')
+    parser.add_argument('--db', default='basketball_analytics.db', help='Database file')
+    args = parser.parse_args()
+
+    statements, failed_routes = collect_statements(args.db)
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+
+    full_scans = 0
+    for sql in statements:
+        plan = query_plan(conn, sql)
+        scans = [line for line in plan if FULL_SCAN_RE.match(line.strip())]
+        full_scans += bool(scans)
+        print(f"{'❌' if scans else '✅'} {' '.join(sql.split())[:110]}")
+        for line in plan:
+            print(f"      {line}")
+    conn.close()
+
+    for route in failed_routes:
+        print(f"⚠️  {route}")
+    print(f"\n📊 {len(statements)} queries checked, {full_scans} with a full scan of matches")
+    if full_scans or failed_routes:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
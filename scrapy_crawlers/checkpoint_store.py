@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Streaming Checkpoint Store for long-running crawls
+
+Append-only journal replacing the "rewrite everything into a new timestamped
+CSV" checkpoints of the Beast crawlers:
+
+- each checkpoint writes only the records added since the previous one into a
+  new JSONL segment (fsync'd)
+- a manifest lists the committed segments, completed seasons and crawl stats;
+  it is replaced atomically and fsync'd after the segment is on disk, so a
+  crash never leaves the manifest pointing at a partial segment
+- read_players() streams the full record set back; export_csv() writes one
+  combined CSV at the end of a run
+- crawlers resume by skipping the manifest's completed seasons
+- appends from several processes are serialized by a lock file, and the
+  manifest is re-read under the lock before it is extended
+"""
+
+import csv
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+MANIFEST_FILE = 'manifest.json'
+LOCK_FILE = 'manifest.lock'
+STALE_LOCK_SECONDS = 60
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # not supported on Windows
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CheckpointStore:
+    """Append-only JSONL journal with an fsync'd manifest"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self.lock_path = os.path.join(directory, LOCK_FILE)
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {
+            'created_at': datetime.now().isoformat(),
+            'updated_at': None,
+            'total_records': 0,
+            'segments': [],
+            'completed_seasons': [],
+            'stats': {}
+        }
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock file (O_EXCL works on every platform)"""
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > STALE_LOCK_SECONDS:
+                        os.remove(self.lock_path)  # left behind by a crashed writer
+                        continue
+                except OSError:
+                    continue
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.remove(self.lock_path)
+
+    def _write_manifest(self):
+        self.manifest['updated_at'] = datetime.now().isoformat()
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+        _fsync_dir(self.directory)
+
+    @property
+    def total_records(self) -> int:
+        return self.manifest['total_records']
+
+    @property
+    def completed_seasons(self) -> List[str]:
+        return self.manifest['completed_seasons']
+
+    @property
+    def stats(self) -> Dict:
+        return self.manifest['stats']
+
+    def append(self, records: List[Dict], completed_seasons: Iterable = (),
+               stats: Optional[Dict] = None) -> Optional[str]:
+        """
+        Commit a checkpoint: write the new records as a segment, then update
+        the manifest. Returns the segment path (None if there were no records).
+        """
+        with self._locked():
+            self.manifest = self._load_manifest()
+            segment_path = None
+            if records:
+                segment_name = f"segment_{len(self.manifest['segments']):05d}.jsonl"
+                segment_path = os.path.join(self.directory, segment_name)
+                with open(segment_path, 'w', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False, default=str))
+                        f.write('\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                self.manifest['segments'].append({
+                    'file': segment_name,
+                    'records': len(records),
+                    'written_at': datetime.now().isoformat()
+                })
+                self.manifest['total_records'] += len(records)
+
+            for season in completed_seasons:
+                if str(season) not in self.manifest['completed_seasons']:
+                    self.manifest['completed_seasons'].append(str(season))
+            if stats is not None:
+                self.manifest['stats'] = stats
+
+            self._write_manifest()
+            return segment_path
+
+    def read_players(self) -> Iterator[Dict]:
+        """Stream every committed record in write order"""
+        for segment in self.manifest['segments']:
+            with open(os.path.join(self.directory, segment['file']), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def load_players(self) -> List[Dict]:
+        return list(self.read_players())
+
+    def export_csv(self, csv_path: str) -> Optional[str]:
+        """Write all committed records into one CSV (two streaming passes)"""
+        fieldnames = []
+        seen = set()
+        for record in self.read_players():
+            for key in record:
+                if key not in seen:
+                    seen.add(key)
+                    fieldnames.append(key)
+        if not fieldnames:
+            return None
+
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(self.read_players())
+        return csv_path
+
+    def reset(self):
+        """Discard the journal and start an empty one"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self.manifest = self._load_manifest()
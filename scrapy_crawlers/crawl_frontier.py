@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Resumable Crawl Frontier
+
+Persistent work queue shared by the historical crawlers
+(BeastOberfrankenCrawler, paginated_historical_crawler, MissingYearsRecovery)
+instead of hard-coded season lists in one-off resume scripts.
+
+- One row per (crawler, season, liga_id, endpoint) work item with status,
+  attempts, last_error and the ETag of the last successful fetch.
+- Season discovery is itself an item (liga_id '' and endpoint 'leagues'), so
+  a crashed run never re-fetches a league list it already has.
+- Parsed results are stored with the item; done items are never handed out
+  again, so a resumed run continues exactly where the previous one stopped.
+- Workers claim items inside a BEGIN IMMEDIATE transaction, so several
+  processes can drain one frontier. Claims held by a crashed worker expire
+  after the lease timeout and are handed out again; a worker restarted on
+  the same host takes back the claims of its dead predecessors right away.
+- A discovery is only completed with a league list that was read in full;
+  fetchers raise DiscoveryError on a failed, soft-failed or empty page.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crawl_frontier.db')
+
+DISCOVERY_ENDPOINT = 'leagues'
+
+PENDING = 'pending'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 3
+
+
+class DiscoveryError(Exception):
+    """A league list page failed; the discovery is retried instead of completed"""
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == 'nt':
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _liga_key(liga_id) -> str:
+    return '' if liga_id is None else str(liga_id)
+
+
+def _column_filter(column, value):
+    """SQL clause for a single value or a list of values (seasons, endpoints)"""
+    if isinstance(value, (str, int)):
+        return f'{column} = ?', [str(value)]
+    values = [str(v) for v in value]
+    return f"{column} IN ({', '.join('?' * len(values))})", values
+
+
+class FrontierItem:
+    """A claimed unit of work"""
+
+    def __init__(self, season, liga_id, endpoint, attempts, etag, payload):
+        self.season = season
+        self.liga_id = liga_id
+        self.endpoint = endpoint
+        self.attempts = attempts
+        self.etag = etag
+        self.payload = payload
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.season, self.liga_id, self.endpoint
+
+    def __repr__(self):
+        return f"FrontierItem({self.season}, {self.liga_id or '-'}, {self.endpoint}, attempt {self.attempts})"
+
+
+class CrawlFrontier:
+    """SQLite-backed frontier with atomic claims"""
+
+    def __init__(self, crawler: str, db_path: str = DEFAULT_DB_PATH,
+                 lease_seconds: float = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS,
+                 worker_id: Optional[str] = None):
+        self.crawler = crawler
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.host = socket.gethostname()
+        self.worker_id = worker_id or f"{self.host}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.setup_database()
+        self.reclaim_stale()
+
+    def setup_database(self):
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_frontier (
+                crawler TEXT NOT NULL,
+                season TEXT NOT NULL,
+                liga_id TEXT NOT NULL DEFAULT '',
+                endpoint TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                etag TEXT,
+                payload TEXT,
+                result TEXT,
+                claimed_by TEXT,
+                claimed_at REAL,
+                updated_at REAL,
+                PRIMARY KEY (crawler, season, liga_id, endpoint)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_frontier_claim
+            ON crawl_frontier (crawler, status, season, endpoint)
+        ''')
+
+    def close(self):
+        self.release()
+        self.conn.close()
+
+    # -- seeding ---------------------------------------------------------
+
+    def add(self, season, endpoint: str, liga_id='', payload: Optional[Dict] = None):
+        self.add_many([(season, liga_id, endpoint, payload)])
+
+    def add_many(self, items: Iterable[Tuple]):
+        """Add (season, liga_id, endpoint, payload) items; existing items are kept as they are"""
+        now = time.time()
+        rows = [
+            (self.crawler, str(season), _liga_key(liga_id), endpoint,
+             json.dumps(payload, ensure_ascii=False, default=str) if payload is not None else None, now)
+            for season, liga_id, endpoint, payload in items
+        ]
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.executemany('''
+                INSERT OR IGNORE INTO crawl_frontier (crawler, season, liga_id, endpoint, payload, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    # -- claiming --------------------------------------------------------
+
+    def claim(self, limit: int = 1, season=None, endpoint=None) -> List[FrontierItem]:
+        """
+        Atomically claim up to limit pending items (or items whose lease has
+        expired). Optionally restricted by season and/or endpoint (a single
+        value or a list).
+        """
+        now = time.time()
+        where = ['crawler = ?', 'attempts < ?', '(status = ? OR (status = ? AND claimed_at < ?))']
+        params = [self.crawler, self.max_attempts, PENDING, IN_PROGRESS, now - self.lease_seconds]
+        for column, value in (('season', season), ('endpoint', endpoint)):
+            if value is not None:
+                clause, values = _column_filter(column, value)
+                where.append(clause)
+                params.extend(values)
+
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Expired claims that used up their attempts are not handed out again
+            self.conn.execute('''
+                UPDATE crawl_frontier SET status = ?, last_error = COALESCE(last_error, 'lease expired')
+                WHERE crawler = ? AND status = ? AND claimed_at < ? AND attempts >= ?
+            ''', (FAILED, self.crawler, IN_PROGRESS, now - self.lease_seconds, self.max_attempts))
+            rows = self.conn.execute(f'''
+                SELECT season, liga_id, endpoint, attempts, etag, payload
+                FROM crawl_frontier
+                WHERE {' AND '.join(where)}
+                ORDER BY season, endpoint, liga_id
+                LIMIT ?
+            ''', params + [limit]).fetchall()
+            self.conn.executemany('''
+                UPDATE crawl_frontier
+                SET status = ?, attempts = attempts + 1, claimed_by = ?, claimed_at = ?, updated_at = ?
+                WHERE crawler = ? AND season = ? AND liga_id = ? AND endpoint = ?
+            ''', [(IN_PROGRESS, self.worker_id, now, now, self.crawler, season_id, liga_id, ep)
+                  for season_id, liga_id, ep, _, _, _ in rows])
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+        return [
+            FrontierItem(season_id, liga_id, ep, attempts + 1, etag, json.loads(payload) if payload else None)
+            for season_id, liga_id, ep, attempts, etag, payload in rows
+        ]
+
+    def claim_key(self, season, endpoint: str, liga_id='', payload: Optional[Dict] = None) -> Optional[FrontierItem]:
+        """Add the item if missing and claim exactly it; None if it is done or held by another worker"""
+        self.add(season, endpoint, liga_id, payload)
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute('''
+                SELECT attempts, etag, payload FROM crawl_frontier
+                WHERE crawler = ? AND season = ? AND liga_id = ? AND endpoint = ?
+                AND attempts < ? AND (status = ? OR (status = ? AND claimed_at < ?))
+            ''', (self.crawler, str(season), _liga_key(liga_id), endpoint, self.max_attempts,
+                  PENDING, IN_PROGRESS, now - self.lease_seconds)).fetchone()
+            if row is not None:
+                self.conn.execute('''
+                    UPDATE crawl_frontier
+                    SET status = ?, attempts = attempts + 1, claimed_by = ?, claimed_at = ?, updated_at = ?
+                    WHERE crawler = ? AND season = ? AND liga_id = ? AND endpoint = ?
+                ''', (IN_PROGRESS, self.worker_id, now, now, self.crawler, str(season), _liga_key(liga_id), endpoint))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+        if row is None:
+            return None
+        attempts, etag, item_payload = row
+        return FrontierItem(str(season), _liga_key(liga_id), endpoint, attempts + 1, etag,
+                            json.loads(item_payload) if item_payload else None)
+
+    # -- reporting results -----------------------------------------------
+
+    def complete(self, item: FrontierItem, result=None, etag: Optional[str] = None):
+        """Mark a claimed item done and store its parsed result"""
+        self.conn.execute('''
+            UPDATE crawl_frontier
+            SET status = ?, result = ?, etag = COALESCE(?, etag), last_error = NULL,
+                claimed_by = NULL, claimed_at = NULL, updated_at = ?
+            WHERE crawler = ? AND season = ? AND liga_id = ? AND endpoint = ?
+        ''', (DONE, json.dumps(result, ensure_ascii=False, default=str), etag, time.time(), self.crawler, *item.key))
+
+    def fail(self, item: FrontierItem, error: str):
+        """Return a claimed item to the queue, or mark it failed after max_attempts"""
+        status = FAILED if item.attempts >= self.max_attempts else PENDING
+        self.conn.execute('''
+            UPDATE crawl_frontier
+            SET status = ?, last_error = ?, claimed_by = NULL, claimed_at = NULL, updated_at = ?
+            WHERE crawler = ? AND season = ? AND liga_id = ? AND endpoint = ?
+        ''', (status, str(error)[:500], time.time(), self.crawler, *item.key))
+
+    def release(self):
+        """Hand back everything this worker still holds (e.g. on Ctrl+C)"""
+        self.conn.execute('''
+            UPDATE crawl_frontier
+            SET status = ?, attempts = MAX(attempts - 1, 0), claimed_by = NULL, claimed_at = NULL
+            WHERE crawler = ? AND status = ? AND claimed_by = ?
+        ''', (PENDING, self.crawler, IN_PROGRESS, self.worker_id))
+
+    def reclaim_stale(self) -> int:
+        """
+        Take back claims of crashed workers on this host (their process is
+        gone) without waiting for the lease to expire; returns the number of
+        items handed back
+        """
+        holders = [row[0] for row in self.conn.execute('''
+            SELECT DISTINCT claimed_by FROM crawl_frontier
+            WHERE crawler = ? AND status = ? AND claimed_by LIKE ?
+        ''', (self.crawler, IN_PROGRESS, f"{self.host}:%"))]
+        dead = []
+        for holder in holders:
+            parts = holder.rsplit(':', 2)
+            if (holder != self.worker_id and len(parts) == 3 and parts[0] == self.host
+                    and parts[1].isdigit() and not _process_alive(int(parts[1]))):
+                dead.append(holder)
+        if not dead:
+            return 0
+        placeholders = ', '.join('?' * len(dead))
+        cursor = self.conn.execute(f'''
+            UPDATE crawl_frontier
+            SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                last_error = COALESCE(last_error, 'worker died'), claimed_by = NULL, claimed_at = NULL, updated_at = ?
+            WHERE crawler = ? AND status = ? AND claimed_by IN ({placeholders})
+        ''', [self.max_attempts, FAILED, PENDING, time.time(), self.crawler, IN_PROGRESS] + dead)
+        if cursor.rowcount:
+            print(f"♻️ Reclaimed {cursor.rowcount} items from crashed workers on {self.host}")
+        return cursor.rowcount
+
+    def retry_failed(self, season=None):
+        """Give failed items a fresh set of attempts"""
+        query = 'UPDATE crawl_frontier SET status = ?, attempts = 0 WHERE crawler = ? AND status = ?'
+        params = [PENDING, self.crawler, FAILED]
+        if season is not None:
+            clause, values = _column_filter('season', season)
+            query += f' AND {clause}'
+            params.extend(values)
+        self.conn.execute(query, params)
+
+    # -- reading state ---------------------------------------------------
+
+    def result(self, season, endpoint: str, liga_id=''):
+        """Stored result of a done item, or None"""
+        row = self.conn.execute('''
+            SELECT result FROM crawl_frontier
+            WHERE crawler = ? AND season = ? AND liga_id = ? AND endpoint = ? AND status = ?
+        ''', (self.crawler, str(season), _liga_key(liga_id), endpoint, DONE)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def is_done(self, season, endpoint: str, liga_id='') -> bool:
+        row = self.conn.execute('''
+            SELECT 1 FROM crawl_frontier
+            WHERE crawler = ? AND season = ? AND liga_id = ? AND endpoint = ? AND status = ?
+        ''', (self.crawler, str(season), _liga_key(liga_id), endpoint, DONE)).fetchone()
+        return row is not None
+
+    def results(self, season=None, endpoint: Optional[str] = None) -> Iterator[Tuple[FrontierItem, object]]:
+        """Stream (item, result) for all done items, in a stable order"""
+        query = '''
+            SELECT season, liga_id, endpoint, attempts, etag, payload, result
+            FROM crawl_frontier WHERE crawler = ? AND status = ? AND liga_id != ''
+        '''
+        params = [self.crawler, DONE]
+        for column, value in (('season', season), ('endpoint', endpoint)):
+            if value is not None:
+                clause, values = _column_filter(column, value)
+                query += f' AND {clause}'
+                params.extend(values)
+        query += ' ORDER BY season, rowid'
+        for season_id, liga_id, ep, attempts, etag, payload, result in self.conn.execute(query, params).fetchall():
+            item = FrontierItem(season_id, liga_id, ep, attempts, etag, json.loads(payload) if payload else None)
+            yield item, json.loads(result) if result is not None else None
+
+    def counts(self, season=None, endpoint=None) -> Dict[str, int]:
+        """Number of items per status"""
+        query = 'SELECT status, COUNT(*) FROM crawl_frontier WHERE crawler = ?'
+        params = [self.crawler]
+        for column, value in (('season', season), ('endpoint', endpoint)):
+            if value is not None:
+                clause, values = _column_filter(column, value)
+                query += f' AND {clause}'
+                params.extend(values)
+        counts = {PENDING: 0, IN_PROGRESS: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(self.conn.execute(query + ' GROUP BY status', params).fetchall()))
+        return counts
+
+    def is_drained(self, season=None, endpoint=None) -> bool:
+        """True when nothing is pending or held by any worker"""
+        counts = self.counts(season, endpoint)
+        return counts[PENDING] == 0 and counts[IN_PROGRESS] == 0
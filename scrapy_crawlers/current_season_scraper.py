@@ -9,6 +9,12 @@ Features:
 - Player statistics
 - Team rosters
 - Weekly schedule updates
+- Incremental mode: only leagues/matches whose results changed since the
+  last run are re-fetched and written (use --full for a complete refresh);
+  league discovery re-runs every DISCOVERY_INTERVAL_DAYS days (or with
+  --discover) so leagues added mid-season are picked up
+- Changed leagues update team_season_stats and the standings of
+  basketball_analytics.db in place
 
 Run weekly to keep data fresh!
 """
@@ -16,10 +22,20 @@ Run weekly to keep data fresh!
 import requests
 import json
 import sqlite3
+import sys
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import hashlib
+import os
+
+from http_response_cache import CachedSession
+from league_id_index import AdaptiveLeagueIdIndex
+from league_standings import LeagueStandings
+from team_season_stats import TeamSeasonStatsAggregator, match_row_from_competition
+
+# Incremental runs re-run league discovery when the last one is older than this
+DISCOVERY_INTERVAL_DAYS = 14
 
 class CurrentSeasonScraper:
     def __init__(self):
@@ -52,14 +68,38 @@ class CurrentSeasonScraper:
             47960
         ]
         
-        self.session = requests.Session()
+        self.session = CachedSession()
         self.session.cookies.update(self.cookies)
         
-    def discover_current_leagues(self) -> List[int]:
-        """Discover active 2025/26 leagues"""
-        print("🔍 Discovering active 2025/26 leagues...")
+        self.db_path = "../league_cache.db"
+        self.analytics_db_path = "basketball_analytics.db"
         
-        active_leagues = []
+    def probe_league(self, league_id: int) -> Optional[Dict]:
+        """Return basic league info if the competition ID exists"""
+        try:
+            url = f"{self.base_url}/rest/competition/actual/id/{league_id}"
+            response = self.session.get(url, timeout=10)
+            if not getattr(response, 'from_cache', False):
+                time.sleep(0.1)  # Be polite
+            
+            if response.status_code == 200:
+                data = response.json()
+                season = data.get('season', {})
+                return {
+                    'id': league_id,
+                    'name': data.get('name', 'Unknown'),
+                    'season': season.get('name', '') if season else '',
+                    'matches': len(data.get('matches', []))
+                }
+        
+        except (requests.RequestException, json.JSONDecodeError):
+            pass
+        
+        return None
+    
+    def discover_current_leagues(self, miss_ttl_days: Optional[int] = None) -> List[int]:
+        """Discover active 2025/26 leagues (IDs that missed more than miss_ttl_days ago are probed again)"""
+        print("🔍 Discovering active 2025/26 leagues...")
         
         # Test current year patterns (higher IDs for newer seasons)
         test_ranges = [
@@ -68,43 +108,29 @@ class CurrentSeasonScraper:
             (49000, 49050),  # Future range
         ]
         
-        for start_id, end_id in test_ranges:
-            print(f"   Testing range {start_id}-{end_id}...")
+        # Probe adaptively: skip ID regions known to be empty, coarse stride
+        # first and refine around hits
+        if miss_ttl_days is None:
+            id_index = AdaptiveLeagueIdIndex(self.db_path)
+        else:
+            id_index = AdaptiveLeagueIdIndex(self.db_path, miss_ttl_days=miss_ttl_days)
+        found = id_index.discover(test_ranges, self.probe_league)
+        
+        active_leagues = []
+        for league_id in sorted(found):
+            league = found[league_id]
             
-            for league_id in range(start_id, end_id):
-                try:
-                    url = f"{self.base_url}/rest/competition/actual/id/{league_id}"
-                    response = self.session.get(url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        try:
-                            data = response.json()
-                            season = data.get('season', {})
-                            season_name = season.get('name', '') if season else ''
-                            
-                            # Look for 2025/2026 season
-                            if '2025' in season_name or '2026' in season_name:
-                                league_name = data.get('name', 'Unknown')
-                                matches = data.get('matches', [])
-                                
-                                active_leagues.append({
-                                    'id': league_id,
-                                    'name': league_name,
-                                    'season': season_name,
-                                    'matches': len(matches)
-                                })
-                                
-                                print(f"✅ Found: {league_id} - {league_name} ({len(matches)} matches)")
-                        
-                        except json.JSONDecodeError:
-                            pass
-                    
-                    time.sleep(0.1)  # Be polite
-                    
-                except requests.RequestException:
-                    pass
+            # Look for 2025/2026 season
+            if '2025' in league['season'] or '2026' in league['season']:
+                active_leagues.append(league)
+                print(f"✅ Found: {league_id} - {league['name']} ({league['matches']} matches)")
         
+        print(f"   📉 {id_index.stats['probes']} requests, "
+              f"{id_index.stats['skipped_buckets']} empty regions skipped, "
+              f"{id_index.stats['skipped_known']} known misses skipped")
         print(f"✅ Discovered {len(active_leagues)} active leagues")
+        if active_leagues:
+            self.record_discovery(len(active_leagues))
         return [league['id'] for league in active_leagues]
     
     def get_league_data(self, league_id: int) -> Optional[Dict]:
@@ -136,6 +162,166 @@ class CurrentSeasonScraper:
         
         return None
     
+    def build_game_info(self, league: Dict, match: Dict) -> Dict:
+        """Flatten a match of the competition payload into a game row"""
+        return {
+            'league_id': league['id'],
+            'league_name': league['name'],
+            'match_id': match.get('id'),
+            'date': match.get('date', ''),
+            'home_team': match.get('homeTeam', {}).get('name', ''),
+            'away_team': match.get('awayTeam', {}).get('name', ''),
+            'home_score': match.get('homeScore'),
+            'away_score': match.get('awayScore'),
+            'status': match.get('status', ''),
+            'venue': match.get('venue', {}),
+            'box_score_available': bool(match.get('boxScore'))
+        }
+    
+    def match_result_hash(self, match: Dict) -> str:
+        """Hash of the result-relevant fields of one match"""
+        result = [
+            match.get('id'),
+            match.get('date'),
+            match.get('status'),
+            match.get('homeScore'),
+            match.get('awayScore'),
+            bool(match.get('boxScore')),
+        ]
+        return hashlib.sha1(json.dumps(result, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    
+    def fingerprint_league(self, league_data: Dict) -> Dict:
+        """Fingerprint of a /rest/competition/actual/id/{id} payload"""
+        matches = league_data.get('matches', [])
+        match_hashes = {str(match.get('id')): self.match_result_hash(match) for match in matches}
+        match_list_hash = hashlib.sha1(
+            json.dumps(sorted(match_hashes.items())).encode('utf-8')
+        ).hexdigest()
+        results_entered = len([
+            m for m in matches
+            if m.get('homeScore') is not None and m.get('awayScore') is not None
+        ])
+        
+        return {
+            'match_list_hash': match_list_hash,
+            'results_entered': results_entered,
+            'match_count': len(matches),
+            'match_hashes': match_hashes
+        }
+    
+    def ensure_fingerprint_tables(self, conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS current_league_fingerprints (
+                league_id INTEGER PRIMARY KEY,
+                match_list_hash TEXT NOT NULL,
+                results_entered INTEGER NOT NULL,
+                match_count INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS current_league_discoveries (
+                discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                leagues_found INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS current_match_fingerprints (
+                league_id INTEGER NOT NULL,
+                match_id TEXT NOT NULL,
+                result_hash TEXT NOT NULL,
+                PRIMARY KEY (league_id, match_id)
+            )
+        """)
+    
+    def load_fingerprints(self) -> Dict[int, Dict]:
+        """Load stored league fingerprints with their per-match hashes"""
+        conn = sqlite3.connect(self.db_path)
+        self.ensure_fingerprint_tables(conn)
+        
+        fingerprints = {}
+        for league_id, match_list_hash, results_entered, match_count in conn.execute(
+            "SELECT league_id, match_list_hash, results_entered, match_count FROM current_league_fingerprints"
+        ):
+            fingerprints[league_id] = {
+                'match_list_hash': match_list_hash,
+                'results_entered': results_entered,
+                'match_count': match_count,
+                'match_hashes': {}
+            }
+        
+        for league_id, match_id, result_hash in conn.execute(
+            "SELECT league_id, match_id, result_hash FROM current_match_fingerprints"
+        ):
+            if league_id in fingerprints:
+                fingerprints[league_id]['match_hashes'][match_id] = result_hash
+        
+        conn.close()
+        return fingerprints
+    
+    def discovery_due(self) -> bool:
+        """True when no league discovery succeeded within DISCOVERY_INTERVAL_DAYS"""
+        conn = sqlite3.connect(self.db_path)
+        self.ensure_fingerprint_tables(conn)
+        recent = conn.execute(
+            "SELECT MAX(discovered_at) > datetime('now', ?) FROM current_league_discoveries",
+            (f'-{DISCOVERY_INTERVAL_DAYS} days',)
+        ).fetchone()[0]
+        conn.close()
+        return not recent
+    
+    def record_discovery(self, leagues_found: int):
+        conn = sqlite3.connect(self.db_path)
+        self.ensure_fingerprint_tables(conn)
+        with conn:
+            conn.execute("INSERT INTO current_league_discoveries (leagues_found) VALUES (?)", (leagues_found,))
+        conn.close()
+    
+    def save_fingerprints(self, fingerprints: Dict[int, Dict]):
+        """Persist fingerprints of the leagues processed in this run"""
+        if not fingerprints:
+            return
+        
+        conn = sqlite3.connect(self.db_path)
+        self.ensure_fingerprint_tables(conn)
+        
+        with conn:
+            conn.executemany("""
+                INSERT INTO current_league_fingerprints
+                (league_id, match_list_hash, results_entered, match_count, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(league_id) DO UPDATE SET
+                    match_list_hash = excluded.match_list_hash,
+                    results_entered = excluded.results_entered,
+                    match_count = excluded.match_count,
+                    updated_at = excluded.updated_at
+            """, [
+                (league_id, fp['match_list_hash'], fp['results_entered'], fp['match_count'])
+                for league_id, fp in fingerprints.items()
+            ])
+            conn.executemany("""
+                INSERT INTO current_match_fingerprints (league_id, match_id, result_hash)
+                VALUES (?, ?, ?)
+                ON CONFLICT(league_id, match_id) DO UPDATE SET result_hash = excluded.result_hash
+            """, [
+                (league_id, match_id, result_hash)
+                for league_id, fp in fingerprints.items()
+                for match_id, result_hash in fp['match_hashes'].items()
+            ])
+        
+        conn.close()
+    
+    def get_changed_games(self, league_data: Dict, fingerprint: Dict, previous: Optional[Dict]) -> List[Dict]:
+        """Game rows for matches that are new or whose result changed"""
+        previous_hashes = previous['match_hashes'] if previous else {}
+        
+        changed_games = []
+        for match in league_data.get('matches', []):
+            match_id = str(match.get('id'))
+            if previous_hashes.get(match_id) != fingerprint['match_hashes'].get(match_id):
+                changed_games.append(self.build_game_info(league_data, match))
+        return changed_games
+    
     def get_current_week_games(self, leagues_data: List[Dict]) -> List[Dict]:
         """Extract games from current week"""
         print("📅 Extracting current week games...")
@@ -155,20 +341,7 @@ class CurrentSeasonScraper:
                         match_date = datetime.fromisoformat(match_date_str.replace('Z', '+00:00'))
                         
                         if week_start <= match_date <= week_end:
-                            game_info = {
-                                'league_id': league['id'],
-                                'league_name': league['name'],
-                                'match_id': match.get('id'),
-                                'date': match_date_str,
-                                'home_team': match.get('homeTeam', {}).get('name', ''),
-                                'away_team': match.get('awayTeam', {}).get('name', ''),
-                                'home_score': match.get('homeScore'),
-                                'away_score': match.get('awayScore'),
-                                'status': match.get('status', ''),
-                                'venue': match.get('venue', {}),
-                                'box_score_available': bool(match.get('boxScore'))
-                            }
-                            current_week_games.append(game_info)
+                            current_week_games.append(self.build_game_info(league, match))
                     
                     except (ValueError, TypeError):
                         continue
@@ -198,8 +371,7 @@ class CurrentSeasonScraper:
         print("💾 Saving to database...")
         
         try:
-            db_path = "../league_cache.db"
-            conn = sqlite3.connect(db_path)
+            conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
             # Create current_season table
@@ -233,31 +405,48 @@ class CurrentSeasonScraper:
                 )
             """)
             
-            # Insert league data
-            for league in leagues_data:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO current_season_leagues
-                    (id, name, season, teams_count, matches_count, data)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
+            # Upsert league data
+            cursor.executemany("""
+                INSERT INTO current_season_leagues
+                (id, name, season, teams_count, matches_count, last_updated, data)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    name = excluded.name,
+                    season = excluded.season,
+                    teams_count = excluded.teams_count,
+                    matches_count = excluded.matches_count,
+                    last_updated = excluded.last_updated,
+                    data = excluded.data
+            """, [
+                (
                     league['id'],
                     league['name'],
                     league['season'],
                     len(league.get('teams', [])),
                     len(league.get('matches', [])),
                     json.dumps(league)
-                ))
+                )
+                for league in leagues_data
+            ])
             
-            # Insert games data
-            for game in games_data:
-                game_id = f"{game['league_id']}_{game['match_id']}"
-                cursor.execute("""
-                    INSERT OR REPLACE INTO current_games
-                    (id, league_id, match_id, date, home_team, away_team, 
-                     home_score, away_score, status, venue)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    game_id,
+            # Upsert games data; keep a stored box score unless a new one was fetched
+            cursor.executemany("""
+                INSERT INTO current_games
+                (id, league_id, match_id, date, home_team, away_team, 
+                 home_score, away_score, status, venue, box_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    date = excluded.date,
+                    home_team = excluded.home_team,
+                    away_team = excluded.away_team,
+                    home_score = excluded.home_score,
+                    away_score = excluded.away_score,
+                    status = excluded.status,
+                    venue = excluded.venue,
+                    box_score = COALESCE(excluded.box_score, current_games.box_score)
+            """, [
+                (
+                    f"{game['league_id']}_{game['match_id']}",
                     game['league_id'],
                     game['match_id'],
                     game['date'],
@@ -266,53 +455,119 @@ class CurrentSeasonScraper:
                     game['home_score'],
                     game['away_score'],
                     game['status'],
-                    json.dumps(game.get('venue', {}))
-                ))
+                    json.dumps(game.get('venue', {})),
+                    json.dumps(game['box_score']) if game.get('box_score') else None
+                )
+                for game in games_data
+            ])
             
             conn.commit()
             conn.close()
             
             print(f"   ✅ Saved {len(leagues_data)} leagues and {len(games_data)} games")
+            return True
             
         except Exception as e:
             print(f"   ❌ Database error: {e}")
+            return False
     
-    def run_weekly_update(self):
+    def update_analytics_db(self, leagues_data: List[Dict]):
+        """Write the matches of changed leagues to the analytics DB and refresh the affected team stats and standings"""
+        if not leagues_data or not os.path.exists(self.analytics_db_path):
+            return
+        
+        rows = []
+        for league in leagues_data:
+            for match in league.get('matches', []):
+                row = match_row_from_competition(league, match)
+                if row:
+                    rows.append(row)
+        
+        conn = sqlite3.connect(self.analytics_db_path)
+        try:
+            TeamSeasonStatsAggregator(conn).apply_matches(rows)
+            LeagueStandings(conn).refresh()
+        except sqlite3.Error as e:
+            print(f"   ⚠️ Analytics DB not updated: {e}")
+        finally:
+            conn.close()
+    
+    def fetch_box_scores(self, games: List[Dict]):
+        """Attach box scores to finished games"""
+        print("📋 Fetching box scores for completed games...")
+        for game in games:
+            if game['status'] == 'FINISHED' and game['box_score_available']:
+                box_score = self.get_box_score(game['match_id'])
+                if box_score:
+                    game['box_score'] = box_score
+                    print(f"   ✅ Box score for {game['home_team']} vs {game['away_team']}")
+                time.sleep(0.5)  # Rate limiting
+    
+    def run_weekly_update(self, incremental: bool = True, discover: bool = False):
         """Main function for weekly data update"""
         print("🏀 CURRENT SEASON WEEKLY UPDATE")
         print("=" * 50)
         print(f"📅 Update date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("🏆 Season: 2025/26")
+        print(f"🔁 Mode: {'incremental' if incremental else 'full'}")
         print()
         
-        # Discover current leagues
-        active_league_ids = self.discover_current_leagues()
+        previous_fingerprints = self.load_fingerprints() if incremental else {}
+        
+        # Discover current leagues (incremental runs reuse the leagues seen before
+        # and merge in a fresh discovery every DISCOVERY_INTERVAL_DAYS days)
+        if previous_fingerprints:
+            active_league_ids = sorted(previous_fingerprints)
+            if discover or self.discovery_due():
+                # Misses from before the last discovery are probed again: new leagues get unused IDs
+                discovered = self.discover_current_leagues(miss_ttl_days=DISCOVERY_INTERVAL_DAYS)
+                new_league_ids = set(discovered) - set(active_league_ids)
+                print(f"🆕 {len(new_league_ids)} leagues added since the last discovery")
+                active_league_ids = sorted(set(active_league_ids) | new_league_ids)
+        else:
+            active_league_ids = self.discover_current_leagues()
         if not active_league_ids:
             active_league_ids = self.current_leagues  # Fallback to known IDs
         
         # Get league data
         leagues_data = []
+        changed_leagues = []
+        changed_games = []
+        fingerprints = {}
         for league_id in active_league_ids:
             league_data = self.get_league_data(league_id)
-            if league_data:
-                leagues_data.append(league_data)
             time.sleep(1)  # Rate limiting
+            if not league_data:
+                continue
+            leagues_data.append(league_data)
+            
+            fingerprint = self.fingerprint_league(league_data)
+            previous = previous_fingerprints.get(league_id)
+            if previous and previous['match_list_hash'] == fingerprint['match_list_hash']:
+                print(f"   ⏭️ League {league_id} unchanged ({fingerprint['results_entered']} results)")
+                continue
+            
+            fingerprints[league_id] = fingerprint
+            changed_leagues.append(league_data)
+            if incremental:
+                changed_games.extend(self.get_changed_games(league_data, fingerprint, previous))
         
         # Get current week games
         current_games = self.get_current_week_games(leagues_data)
         
         # Enhance games with box scores (for completed games)
-        print("📋 Fetching box scores for completed games...")
-        for i, game in enumerate(current_games):
-            if game['status'] == 'FINISHED' and game['box_score_available']:
-                box_score = self.get_box_score(game['match_id'])
-                if box_score:
-                    game['box_score'] = box_score
-                    print(f"   ✅ Box score for {game['home_team']} vs {game['away_team']}")
-                time.sleep(0.5)  # Rate limiting
+        if incremental:
+            print(f"🔁 {len(changed_leagues)} changed leagues, {len(changed_games)} changed games")
+            self.fetch_box_scores(changed_games)
+            saved = self.save_to_database(changed_leagues, changed_games)
+        else:
+            self.fetch_box_scores(current_games)
+            saved = self.save_to_database(leagues_data, current_games)
         
-        # Save to database
-        self.save_to_database(leagues_data, current_games)
+        # Only remember fingerprints once the rows they describe are stored
+        if saved:
+            self.save_fingerprints(fingerprints)
+            self.update_analytics_db(changed_leagues)
         
         # Save to files for backup
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -349,7 +604,7 @@ class CurrentSeasonScraper:
 def main():
     """Main execution"""
     scraper = CurrentSeasonScraper()
-    scraper.run_weekly_update()
+    scraper.run_weekly_update(incremental='--full' not in sys.argv, discover='--discover' in sys.argv)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Dashboard Charts
+
+Materializes the statistics dashboard once per data version instead of
+recomputing advanced stats and regenerating three Plotly HTML pages on every
+request:
+
+- the chart data is aggregated up front: PPG histogram bins, category
+  averages and a bounded sample of scatter points
+- the payload is either the Plotly HTML page per chart ('html', the shape of
+  /api/dashboard/charts) or the Plotly figure specs as JSON ('spec', served by
+  /api/dashboard/chart-specs, much smaller)
+- DashboardCache keeps the serialized payloads per data version in memory and
+  in dashboard_cache/ next to this module, so a request is a version check
+  plus a cached string, and a restart with unchanged data skips the
+  computation; files of older data versions are removed when a new one is
+  written
+"""
+
+import glob
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Bump when the chart definitions change so stale payloads are not served
+CHARTS_VERSION = 1
+DASHBOARD_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard_cache')
+PAYLOAD_FORMATS = ('html', 'spec')
+PPG_BINS = 20
+MAX_SCATTER_POINTS = 2000
+TEMPLATE = 'plotly_white'
+
+
+def _first_column(df: pd.DataFrame, *names) -> Optional[str]:
+    return next((name for name in names if name in df.columns), None)
+
+
+def ppg_histogram(df: pd.DataFrame) -> go.Figure:
+    ppg = pd.to_numeric(df['PPG'], errors='coerce').dropna().to_numpy(dtype=float)
+    counts, edges = np.histogram(ppg, bins=PPG_BINS) if len(ppg) else (np.array([]), np.array([0.0]))
+    fig = go.Figure(go.Bar(
+        x=((edges[:-1] + edges[1:]) / 2).round(2).tolist(),
+        y=counts.tolist(),
+        width=np.diff(edges).tolist(),
+        hovertext=[f"{low:.1f}–{high:.1f}" for low, high in zip(edges[:-1], edges[1:])],
+    ))
+    fig.update_layout(title='Points Per Game Distribution', template=TEMPLATE, bargap=0,
+                      xaxis_title='PPG', yaxis_title='count')
+    return fig
+
+
+def efficiency_scatter(df: pd.DataFrame) -> Optional[go.Figure]:
+    efficiency_column = _first_column(df, 'PER', 'IMPACT')
+    if efficiency_column is None:
+        return None
+    team_column = _first_column(df, 'mannschaft', 'team')
+    columns = ['PPG', efficiency_column] + [c for c in ('name', team_column) if c and c in df.columns]
+    points = df[columns].dropna(subset=['PPG'])
+
+    # Evenly spaced sample along PPG keeps the payload bounded
+    if len(points) > MAX_SCATTER_POINTS:
+        points = points.sort_values('PPG', kind='stable')
+        points = points.iloc[np.linspace(0, len(points) - 1, MAX_SCATTER_POINTS).astype(int)]
+
+    hover = points['name'].astype(str) if 'name' in points else pd.Series('', index=points.index)
+    if team_column:
+        hover = hover + ' (' + points[team_column].astype(str) + ')'
+    fig = go.Figure(go.Scattergl(
+        x=points['PPG'].tolist(),
+        y=points[efficiency_column].tolist(),
+        mode='markers',
+        text=hover.tolist(),
+    ))
+    fig.update_layout(title='Player Efficiency vs Points Per Game', template=TEMPLATE,
+                      xaxis_title='PPG', yaxis_title=efficiency_column)
+    return fig
+
+
+def category_performance(df: pd.DataFrame) -> Optional[go.Figure]:
+    category_column = _first_column(df, 'kategorie', 'endpoint')
+    if category_column is None:
+        return None
+    category_stats = df.groupby(category_column)['PPG'].agg(['mean', 'count']).reset_index()
+    fig = go.Figure(go.Bar(
+        x=category_stats[category_column].astype(str).tolist(),
+        y=category_stats['mean'].round(2).tolist(),
+        customdata=category_stats['count'].tolist(),
+        hovertemplate='%{x}: %{y} PPG (%{customdata} players)<extra></extra>',
+    ))
+    fig.update_layout(title='Average PPG by Category', template=TEMPLATE,
+                      xaxis_title=category_column, yaxis_title='PPG')
+    return fig
+
+
+def build_chart_figures(df: pd.DataFrame) -> Dict[str, go.Figure]:
+    """Dashboard figures for a player frame that already has the advanced stat columns"""
+    figures = {'ppg_distribution': ppg_histogram(df)}
+    for name, builder in (('efficiency_scatter', efficiency_scatter),
+                          ('category_performance', category_performance)):
+        figure = builder(df)
+        if figure is not None:
+            figures[name] = figure
+    return figures
+
+
+def build_dashboard_payload(df: pd.DataFrame, data_version: str, payload_format: str = 'spec') -> str:
+    """
+    Serialized dashboard response: {name: html page} for 'html', figure specs
+    plus the data version for 'spec'
+    """
+    figures = build_chart_figures(df)
+    if payload_format == 'html':
+        return json.dumps({name: figure.to_html(include_plotlyjs='cdn') for name, figure in figures.items()},
+                          ensure_ascii=False)
+    return json.dumps({
+        'data_version': data_version,
+        'players_count': len(df),
+        'charts': {name: json.loads(figure.to_json()) for name, figure in figures.items()}
+    }, ensure_ascii=False)
+
+
+class DashboardCache:
+    """Dashboard payload per data version, in memory and on disk"""
+
+    def __init__(self, cache_dir: Optional[str] = DASHBOARD_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        # Per format (data version, payload), swapped as one object so readers never mix the two
+        self._cached = {payload_format: (None, None) for payload_format in PAYLOAD_FORMATS}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, version: str, payload_format: str) -> str:
+        return os.path.join(self.cache_dir, f"charts_v{CHARTS_VERSION}_{payload_format}_{version}.json")
+
+    def _remove_stale(self, current_path: str):
+        """Payload files of other data versions (or chart definitions) than the current one"""
+        version_suffix = current_path[current_path.rindex('_'):]
+        for path in glob.glob(os.path.join(self.cache_dir, 'charts_v*.json')):
+            current_charts = os.path.basename(path).startswith(f"charts_v{CHARTS_VERSION}_")
+            if current_charts and path.endswith(version_suffix):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def charts_json(self, engine, payload_format: str = 'spec') -> str:
+        """Payload for the engine's current data (computed once per data version and format)"""
+        # One snapshot for the version and the frames, so a concurrent reload cannot mix them
+        snapshot = engine.snapshot
+        version = snapshot.data_version
+        cached_version, cached_payload = self._cached[payload_format]
+        if cached_version == version:
+            return cached_payload
+
+        with self.lock:
+            cached_version, cached_payload = self._cached[payload_format]
+            if cached_version == version:
+                return cached_payload
+
+            payload = None
+            path = self._cache_path(version, payload_format) if self.cache_dir else None
+            if path and os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    payload = f.read()
+
+            if payload is None:
+                advanced_stats = snapshot.advanced_stats_frame()
+                df = snapshot.df.drop(columns=advanced_stats.columns, errors='ignore')
+                payload = build_dashboard_payload(df.join(advanced_stats), version, payload_format)
+                if path:
+                    tmp_path = f"{path}.tmp"
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        f.write(payload)
+                    os.replace(tmp_path, path)
+                    self._remove_stale(path)
+
+            self._cached[payload_format] = (version, payload)
+            return payload
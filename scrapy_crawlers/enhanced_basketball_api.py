@@ -4,13 +4,17 @@ Enhanced Basketball Analytics API Bridge
 Serves real basketball data for player-centric analytics platform
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
-import sqlite3
+import base64
 import json
 from datetime import datetime
 import logging
 
+from sqlite_access import LatencyHistogram, ReadOnlyDatabase, TTLCache, VersionedCache
+from streaming_export import (EXPORT_FORMATS, ExportError, fit_schema_to_table, gzip_chunks, iter_cursor_rows,
+                              iter_export, schema_from_declared_types)
+
 app = Flask(__name__)
 CORS(app)
 
@@ -18,31 +22,50 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_basketball_db():
-    """Get basketball analytics database connection"""
-    return sqlite3.connect('basketball_analytics.db')
+# Shared read-only connections (one per thread) instead of a connect per request
+basketball_db = ReadOnlyDatabase('basketball_analytics.db')
+crawl_db = ReadOnlyDatabase('crawl_logs.db')
+
+# The overview counters scan whole tables; a few seconds of staleness is fine
+OVERVIEW_TTL_SECONDS = 30
+overview_cache = TTLCache(OVERVIEW_TTL_SECONDS)
+
+latency = LatencyHistogram().install(app)
 
-def get_crawl_db():
-    """Get crawl logs database connection"""
-    return sqlite3.connect('crawl_logs.db')
+def overview_counters():
+    """Table counters of /health and /api/dashboard in one query, cached"""
+    def compute():
+        row = basketball_db.one('''
+            SELECT (SELECT COUNT(*) FROM matches),
+                   (SELECT COUNT(*) FROM matches WHERE total_points > 0),
+                   (SELECT COUNT(*) FROM teams),
+                   (SELECT COUNT(DISTINCT league_id) FROM leagues),
+                   (SELECT COUNT(DISTINCT season_year) FROM seasons),
+                   (SELECT MIN(season_year) FROM seasons),
+                   (SELECT MAX(season_year) FROM seasons)
+        ''')
+        return {
+            'total_matches': row[0],
+            'completed_matches': row[1],
+            'total_teams': row[2],
+            'total_leagues': row[3],
+            'total_seasons': row[4],
+            'min_year': row[5],
+            'max_year': row[6]
+        }
+    return overview_cache.get_or_compute('overview', compute)
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
     try:
-        conn = get_basketball_db()
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM matches')
-        match_count = cursor.fetchone()[0]
-        cursor.execute('SELECT COUNT(*) FROM teams')
-        team_count = cursor.fetchone()[0]
-        conn.close()
+        counters = overview_counters()
         
         return jsonify({
             'status': 'healthy',
             'database': 'connected',
-            'matches': match_count,
-            'teams': team_count,
+            'matches': counters['total_matches'],
+            'teams': counters['total_teams'],
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -51,63 +74,47 @@ def health():
             'message': str(e)
         }), 500
 
+@app.route('/api/metrics/latency')
+def latency_metrics():
+    """Request latency histogram per route"""
+    return jsonify(latency.snapshot())
+
 @app.route('/api/dashboard')
 def dashboard():
     """Dashboard overview with real basketball statistics"""
     try:
-        conn = get_basketball_db()
-        cursor = conn.cursor()
-        
         # Overall statistics
-        cursor.execute('SELECT COUNT(*) FROM matches')
-        total_matches = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM matches WHERE home_score > 0 OR guest_score > 0')
-        completed_matches = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM teams')
-        total_teams = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(DISTINCT league_id) FROM leagues')
-        total_leagues = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(DISTINCT season_year) FROM seasons')
-        total_seasons = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT MIN(season_year), MAX(season_year) FROM seasons')
-        min_year, max_year = cursor.fetchone()
+        counters = overview_counters()
+        total_matches = counters['total_matches']
+        completed_matches = counters['completed_matches']
         
-        # Recent activity
-        cursor.execute('''
+        # Recent activity (unary + keeps the planner walking the kickoff index)
+        recent_matches = basketball_db.rows('''
             SELECT m.kickoff_date, m.home_team_name, m.guest_team_name, m.result
             FROM matches m
-            WHERE m.home_score > 0 OR m.guest_score > 0
+            WHERE +m.total_points > 0
             ORDER BY m.kickoff_date DESC
             LIMIT 10
         ''')
-        recent_matches = cursor.fetchall()
         
         # Top scoring matches
-        cursor.execute('''
+        top_scoring = basketball_db.rows('''
             SELECT m.home_team_name, m.guest_team_name, m.result, 
-                   (m.home_score + m.guest_score) as total_points
+                   m.total_points
             FROM matches m
             WHERE m.home_score > 0 AND m.guest_score > 0
-            ORDER BY total_points DESC
+            ORDER BY m.total_points DESC
             LIMIT 10
         ''')
-        top_scoring = cursor.fetchall()
-        
-        conn.close()
         
         return jsonify({
             'overview': {
                 'total_matches': total_matches,
                 'completed_matches': completed_matches,
-                'total_teams': total_teams,
-                'total_leagues': total_leagues,
-                'seasons_covered': total_seasons,
-                'year_range': f"{min_year}-{max_year}",
+                'total_teams': counters['total_teams'],
+                'total_leagues': counters['total_leagues'],
+                'seasons_covered': counters['total_seasons'],
+                'year_range': f"{counters['min_year']}-{counters['max_year']}",
                 'completion_rate': round(completed_matches / max(total_matches, 1) * 100, 1)
             },
             'recent_matches': [
@@ -136,11 +143,8 @@ def dashboard():
 def teams():
     """Get all teams with their statistics"""
     try:
-        conn = get_basketball_db()
-        cursor = conn.cursor()
-        
         # Get teams with their latest season stats
-        cursor.execute('''
+        teams_data = basketball_db.rows('''
             SELECT t.team_permanent_id, t.team_name, t.team_name_small,
                    t.first_seen_season, t.last_seen_season, t.total_seasons,
                    ts.games_played, ts.wins, ts.losses, ts.avg_points_for, ts.avg_points_against
@@ -149,7 +153,6 @@ def teams():
                 AND ts.season_year = t.last_seen_season
             ORDER BY t.team_name
         ''')
-        teams_data = cursor.fetchall()
         
         teams = []
         for team in teams_data:
@@ -170,7 +173,6 @@ def teams():
                 }
             })
         
-        conn.close()
         return jsonify(teams)
         
     except Exception as e:
@@ -181,22 +183,18 @@ def teams():
 def team_detail(team_id):
     """Get detailed team information including season history"""
     try:
-        conn = get_basketball_db()
-        cursor = conn.cursor()
-        
         # Team basic info
-        cursor.execute('''
+        team_info = basketball_db.one('''
             SELECT team_permanent_id, team_name, team_name_small, club_id,
                    first_seen_season, last_seen_season, total_seasons
             FROM teams WHERE team_permanent_id = ?
         ''', (team_id,))
-        team_info = cursor.fetchone()
         
         if not team_info:
             return jsonify({'error': 'Team not found'}), 404
         
         # Season history
-        cursor.execute('''
+        season_stats = basketball_db.rows('''
             SELECT season_year, league_id, games_played, wins, losses,
                    points_for, points_against, avg_points_for, avg_points_against,
                    point_differential
@@ -204,23 +202,20 @@ def team_detail(team_id):
             WHERE team_permanent_id = ?
             ORDER BY season_year DESC
         ''', (team_id,))
-        season_stats = cursor.fetchall()
         
         # Recent matches
-        cursor.execute('''
+        recent_matches = basketball_db.rows('''
             SELECT match_id, season_year, kickoff_date, 
                    CASE WHEN home_team_id = ? THEN guest_team_name ELSE home_team_name END as opponent,
                    CASE WHEN home_team_id = ? THEN 'home' ELSE 'away' END as venue,
                    result, home_score, guest_score
             FROM matches
             WHERE (home_team_id = ? OR guest_team_id = ?) 
-                AND (home_score > 0 OR guest_score > 0)
+                AND total_points > 0
             ORDER BY kickoff_date DESC
             LIMIT 20
         ''', (team_id, team_id, team_id, team_id))
-        recent_matches = cursor.fetchall()
         
-        conn.close()
         
         return jsonify({
             'team': {
@@ -268,21 +263,17 @@ def team_detail(team_id):
 def leagues():
     """Get all leagues with statistics"""
     try:
-        conn = get_basketball_db()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        leagues_data = basketball_db.rows('''
             SELECT l.league_id, l.name, l.district_name,
                    COUNT(DISTINCT s.season_year) as seasons,
                    COUNT(DISTINCT m.match_id) as total_matches,
-                   COUNT(DISTINCT CASE WHEN m.home_score > 0 OR m.guest_score > 0 THEN m.match_id END) as completed_matches
+                   COUNT(DISTINCT CASE WHEN m.total_points > 0 THEN m.match_id END) as completed_matches
             FROM leagues l
             LEFT JOIN seasons s ON l.league_id = s.league_id
             LEFT JOIN matches m ON l.league_id = m.league_id
             GROUP BY l.league_id, l.name, l.district_name
             ORDER BY seasons DESC, completed_matches DESC
         ''')
-        leagues_data = cursor.fetchall()
         
         leagues = []
         for league in leagues_data:
@@ -296,7 +287,6 @@ def leagues():
                 'completion_rate': round((league[5] or 0) / max(league[4] or 1, 1) * 100, 1)
             })
         
-        conn.close()
         return jsonify(leagues)
         
     except Exception as e:
@@ -307,10 +297,7 @@ def leagues():
 def seasons():
     """Get all seasons with statistics"""
     try:
-        conn = get_basketball_db()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        seasons_data = basketball_db.rows('''
             SELECT s.season_year, COUNT(DISTINCT s.league_id) as leagues,
                    SUM(s.total_matches) as total_matches,
                    SUM(s.completed_matches) as completed_matches,
@@ -320,7 +307,6 @@ def seasons():
             GROUP BY s.season_year
             ORDER BY s.season_year DESC
         ''')
-        seasons_data = cursor.fetchall()
         
         seasons = []
         for season in seasons_data:
@@ -333,62 +319,187 @@ def seasons():
                 'completion_rate': round((season[3] or 0) / max(season[2] or 1, 1) * 100, 1)
             })
         
-        conn.close()
         return jsonify(seasons)
         
     except Exception as e:
         logger.error(f"Seasons error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/matches')
-def matches():
-    """Get matches with optional filtering"""
+@app.route('/api/leagues/<int:league_id>/standings')
+def league_standings(league_id):
+    """League table of a season from the match results (standings table, league_standings.py)"""
     try:
-        page = int(request.args.get('page', 1))
-        limit = min(int(request.args.get('limit', 50)), 200)
-        team_id = request.args.get('team_id')
-        season = request.args.get('season')
-        league_id = request.args.get('league_id')
-        
-        offset = (page - 1) * limit
-        
-        conn = get_basketball_db()
-        cursor = conn.cursor()
-        
-        # Build query with filters
-        where_conditions = []
-        params = []
-        
-        if team_id:
-            where_conditions.append('(m.home_team_id = ? OR m.guest_team_id = ?)')
-            params.extend([team_id, team_id])
-        
-        if season:
-            where_conditions.append('m.season_year = ?')
-            params.append(season)
-            
-        if league_id:
-            where_conditions.append('m.league_id = ?')
-            params.append(league_id)
+        season = request.args.get('season', type=int)
+        if not season:
+            return jsonify({'error': 'season parameter is required'}), 400
+        
+        # One primary key range read
+        table = basketball_db.rows('''
+            SELECT rank, team_permanent_id, team_name, games_played, wins, losses,
+                   points_for, points_against, point_differential, standing_points,
+                   h2h_wins, h2h_differential
+            FROM standings
+            WHERE league_id = ? AND season_year = ?
+            ORDER BY rank
+        ''', (league_id, season))
+        if not table:
+            return jsonify({'error': 'No standings for this league season'}), 404
         
-        where_clause = ' AND '.join(where_conditions) if where_conditions else '1=1'
+        return jsonify({
+            'league_id': league_id,
+            'season': season,
+            'teams_count': len(table),
+            'standings': [{
+                'rank': row[0],
+                'team_id': row[1],
+                'team_name': row[2],
+                'games': row[3],
+                'wins': row[4],
+                'losses': row[5],
+                'points_for': row[6],
+                'points_against': row[7],
+                'point_differential': row[8],
+                'standing_points': row[9],
+                'h2h_wins': row[10],
+                'h2h_differential': row[11]
+            } for row in table]
+        })
         
-        # Get matches
-        cursor.execute(f'''
-            SELECT m.match_id, m.season_year, m.league_id, m.kickoff_date, m.kickoff_time,
-                   m.home_team_name, m.guest_team_name, m.result, m.home_score, m.guest_score,
-                   m.confirmed, m.cancelled, m.forfeit
+    except Exception as e:
+        logger.error(f"Standings error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+MATCH_COLUMNS = '''
+    m.match_id, m.season_year, m.league_id, m.kickoff_date, m.kickoff_time,
+    m.home_team_name, m.guest_team_name, m.result, m.home_score, m.guest_score,
+    m.confirmed, m.cancelled, m.forfeit
+'''
+# Newest first; matches without a date sort last (NULL is the smallest value)
+MATCH_ORDER = 'm.kickoff_date DESC, m.match_id DESC'
+
+# Total per filter set, recomputed only after the database was written
+match_counts = VersionedCache()
+
+
+def encode_match_cursor(kickoff_date, match_id) -> str:
+    """Opaque token for the position after (kickoff_date, match_id)"""
+    raw = json.dumps([kickoff_date, match_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_match_cursor(token: str):
+    """(kickoff_date, match_id) of a cursor token; ValueError if it is not one"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        kickoff_date, match_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not (kickoff_date is None or isinstance(kickoff_date, str)) or not isinstance(match_id, int):
+        raise ValueError('Invalid cursor')
+    return kickoff_date, match_id
+
+
+def _filter_value(name: str):
+    """Query parameter as int where possible, so '2024' and '02024' share a count"""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def match_filters():
+    """WHERE clause, parameters and normalized cache key of the match filters"""
+    filters = {name: _filter_value(name) for name in ('team_id', 'season', 'league_id')}
+    where_conditions = []
+    params = []
+
+    if filters['team_id'] is not None:
+        where_conditions.append('(m.home_team_id = ? OR m.guest_team_id = ?)')
+        params.extend([filters['team_id'], filters['team_id']])
+
+    if filters['season'] is not None:
+        where_conditions.append('m.season_year = ?')
+        params.append(filters['season'])
+
+    if filters['league_id'] is not None:
+        where_conditions.append('m.league_id = ?')
+        params.append(filters['league_id'])
+
+    where_clause = ' AND '.join(where_conditions) if where_conditions else '1=1'
+    key = tuple((name, value) for name, value in filters.items() if value is not None)
+    return where_clause, params, key
+
+
+def matches_after(where_clause: str, params: list, cursor, limit: int):
+    """
+    Up to limit matches following cursor in MATCH_ORDER, as range seeks on
+    the (..., kickoff_date, match_id) indexes: the dated matches after the
+    cursor, then the undated ones
+    """
+    kickoff_date, match_id = cursor
+    rows = []
+    if kickoff_date is not None:
+        rows = basketball_db.rows(f'''
+            SELECT {MATCH_COLUMNS}
             FROM matches m
-            WHERE {where_clause}
-            ORDER BY m.kickoff_date DESC, m.kickoff_time DESC
-            LIMIT ? OFFSET ?
-        ''', params + [limit, offset])
-        
-        matches_data = cursor.fetchall()
-        
-        # Get total count
-        cursor.execute(f'SELECT COUNT(*) FROM matches m WHERE {where_clause}', params)
-        total_count = cursor.fetchone()[0]
+            WHERE {where_clause} AND (m.kickoff_date, m.match_id) < (?, ?)
+            ORDER BY {MATCH_ORDER}
+            LIMIT ?
+        ''', params + [kickoff_date, match_id, limit])
+    if len(rows) < limit:
+        # Undated matches follow every dated one
+        seek, seek_params = ('AND m.match_id < ?', [match_id]) if kickoff_date is None else ('', [])
+        rows += basketball_db.rows(f'''
+            SELECT {MATCH_COLUMNS}
+            FROM matches m
+            WHERE {where_clause} AND m.kickoff_date IS NULL {seek}
+            ORDER BY m.match_id DESC
+            LIMIT ?
+        ''', params + seek_params + [limit - len(rows)])
+    return rows
+
+
+@app.route('/api/matches')
+def matches():
+    """
+    Get matches with optional filtering, newest first. Pass pagination.next_cursor
+    back as ?cursor= for the next page (the same cost at any depth); ?page= still
+    works with an offset.
+    """
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 200))
+        cursor_token = request.args.get('cursor')
+        page = None
+        cursor = None
+        if cursor_token:
+            try:
+                cursor = decode_match_cursor(cursor_token)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            page = max(1, int(request.args.get('page', 1)))
+
+        where_clause, params, filter_key = match_filters()
+
+        # Get matches
+        if cursor is not None:
+            matches_data = matches_after(where_clause, params, cursor, limit)
+        else:
+            matches_data = basketball_db.rows(f'''
+                SELECT {MATCH_COLUMNS}
+                FROM matches m
+                WHERE {where_clause}
+                ORDER BY {MATCH_ORDER}
+                LIMIT ? OFFSET ?
+            ''', params + [limit, (page - 1) * limit])
+
+        # Get total count (cached per filter set until the data changes)
+        total_count = match_counts.get_or_compute(
+            basketball_db.data_version(), filter_key,
+            lambda: basketball_db.scalar(f'SELECT COUNT(*) FROM matches m WHERE {where_clause}', params))
         
         matches = []
         for match in matches_data:
@@ -408,7 +519,9 @@ def matches():
                 'forfeit': bool(match[12])
             })
         
-        conn.close()
+        next_cursor = None
+        if len(matches_data) == limit:
+            next_cursor = encode_match_cursor(matches_data[-1][3], matches_data[-1][0])
         
         return jsonify({
             'matches': matches,
@@ -416,7 +529,8 @@ def matches():
                 'page': page,
                 'limit': limit,
                 'total': total_count,
-                'pages': (total_count + limit - 1) // limit
+                'pages': (total_count + limit - 1) // limit,
+                'next_cursor': next_cursor
             }
         })
         
@@ -424,6 +538,59 @@ def matches():
         logger.error(f"Matches error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/matches/export/<export_format>')
+def export_matches(export_format):
+    """
+    Stream the filtered matches (team_id, season, league_id) as CSV, NDJSON or
+    Parquet straight from the SQLite cursor (gzip if the client accepts it)
+    """
+    try:
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"Unsupported format '{export_format}'",
+                            'formats': list(EXPORT_FORMATS)}), 400
+        
+        where_clause, params, _ = match_filters()
+        # Checked out for the whole streamed response, returned when it is closed
+        conn = basketball_db.acquire()
+        try:
+            cursor = conn.execute(f'''
+                SELECT {MATCH_COLUMNS}
+                FROM matches m
+                WHERE {where_clause}
+                ORDER BY {MATCH_ORDER}
+            ''', params)
+            fieldnames = [column[0] for column in cursor.description]
+            
+            schema = None
+            if export_format == 'parquet':
+                # Parquet column types from the table definition, not from sampled rows
+                declared = {row[1]: row[2] for row in conn.execute('PRAGMA table_xinfo(matches)')}
+                schema = schema_from_declared_types((name, declared.get(name)) for name in fieldnames)
+                # Checked before the response starts, so a stray value cannot abort the stream
+                schema = fit_schema_to_table(conn, schema, f'matches m WHERE {where_clause}', params)
+            chunks = iter_export(iter_cursor_rows(cursor), export_format, fieldnames, schema=schema)
+            
+            headers = {
+                'Content-Disposition': f'attachment; filename="matches.{EXPORT_FORMATS[export_format]["extension"]}"',
+                'Vary': 'Accept-Encoding'
+            }
+            if 'gzip' in request.headers.get('Accept-Encoding', ''):
+                chunks = gzip_chunks(chunks)
+                headers['Content-Encoding'] = 'gzip'
+            
+            response = Response(chunks, content_type=EXPORT_FORMATS[export_format]['mimetype'], headers=headers)
+        except BaseException:
+            basketball_db.release(conn)
+            raise
+        response.call_on_close(lambda: basketball_db.release(conn))
+        return response
+    
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Match export error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/analytics/top-teams')
 def top_teams():
     """Get top performing teams by various metrics"""
@@ -432,8 +599,6 @@ def top_teams():
         season = request.args.get('season')
         limit = min(int(request.args.get('limit', 20)), 100)
         
-        conn = get_basketball_db()
-        cursor = conn.cursor()
         
         # Build query based on metric
         order_by = 'ts.point_differential DESC'
@@ -449,7 +614,7 @@ def top_teams():
             where_clause += ' AND ts.season_year = ?'
             params.append(season)
         
-        cursor.execute(f'''
+        teams_data = basketball_db.rows(f'''
             SELECT t.team_name, ts.season_year, ts.league_id, ts.games_played,
                    ts.wins, ts.losses, ts.avg_points_for, ts.avg_points_against,
                    ts.point_differential, (ts.wins * 1.0 / ts.games_played * 100) as win_pct
@@ -460,8 +625,6 @@ def top_teams():
             LIMIT ?
         ''', params + [limit])
         
-        teams_data = cursor.fetchall()
-        
         teams = []
         for team in teams_data:
             teams.append({
@@ -477,27 +640,66 @@ def top_teams():
                 'win_pct': round(team[9], 1)
             })
         
-        conn.close()
         return jsonify(teams)
         
     except Exception as e:
         logger.error(f"Top teams error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/analytics/changes')
+def team_stats_changes():
+    """Team season stats written since a change id (team_season_stats_changes)"""
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', 500)), 5000)
+        
+        changes_data = basketball_db.rows('''
+            SELECT c.change_id, c.team_permanent_id, t.team_name, c.season_year, c.league_id,
+                   c.change_type, c.games_played, c.wins, c.losses, c.points_for, c.points_against,
+                   c.changed_at
+            FROM team_season_stats_changes c
+            LEFT JOIN teams t ON c.team_permanent_id = t.team_permanent_id
+            WHERE c.change_id > ?
+            ORDER BY c.change_id
+            LIMIT ?
+        ''', (since, limit))
+        
+        changes = []
+        for change in changes_data:
+            changes.append({
+                'change_id': change[0],
+                'team_id': change[1],
+                'team_name': change[2],
+                'season': change[3],
+                'league_id': change[4],
+                'type': change[5],
+                'games': change[6],
+                'wins': change[7],
+                'losses': change[8],
+                'points_for': change[9],
+                'points_against': change[10],
+                'changed_at': change[11]
+            })
+        
+        return jsonify({
+            'changes': changes,
+            'next_since': changes[-1]['change_id'] if changes else since
+        })
+        
+    except Exception as e:
+        logger.error(f"Team stats changes error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/crawl/sessions')
 def crawl_sessions():
     """Get crawl session information"""
     try:
-        conn = get_crawl_db()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        sessions = crawl_db.rows('''
             SELECT session_name, spider_name, start_time, end_time, status,
                    total_requests, successful_requests, items_scraped
             FROM crawl_sessions
             ORDER BY start_time DESC
         ''')
-        sessions = cursor.fetchall()
         
         session_list = []
         for session in sessions:
@@ -512,7 +714,6 @@ def crawl_sessions():
                 'items': session[7]
             })
         
-        conn.close()
         return jsonify(session_list)
         
     except Exception as e:
@@ -529,9 +730,13 @@ if __name__ == '__main__':
     print("  GET /api/teams/<id> - Team details")
     print("  GET /api/leagues - All leagues")
     print("  GET /api/seasons - All seasons")
-    print("  GET /api/matches - Matches (with filtering)")
+    print("  GET /api/leagues/<id>/standings?season=<year> - League table from match results")
+    print("  GET /api/matches?cursor=<next_cursor> - Matches (with filtering)")
+    print("  GET /api/matches/export/<csv|ndjson|parquet> - Stream filtered matches")
     print("  GET /api/analytics/top-teams - Top performing teams")
+    print("  GET /api/analytics/changes?since=<id> - Team season stats changes")
     print("  GET /api/crawl/sessions - Crawl sessions")
+    print("  GET /api/metrics/latency - Request latency per route")
     print("=" * 50)
     
     app.run(host='0.0.0.0', port=5001, debug=True)
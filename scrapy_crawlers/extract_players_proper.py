@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
 import requests
-from bs4 import BeautifulSoup
 import json
 from datetime import datetime
 import re
 
+from statistik_parser import parse_result_rows
+
 def extract_all_players_properly():
     """Extract players using the correct HTML structure understanding"""
     
@@ -133,83 +134,46 @@ def parse_player_statistics_page(html_content, endpoint_code, endpoint_name, sou
     """Parse player statistics page with proper understanding of HTML structure"""
     
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Rows of the main data table ('sportItem' CSS classes), typed by the shared parser
+        player_rows = parse_result_rows(html_content, min_cells=0)
         players = []
         
-        # Find the main data table by looking for rows with 'sportItem' CSS classes
-        rows_with_data = soup.find_all('tr')
-        
-        player_rows = []
-        for row in rows_with_data:
-            cells = row.find_all('td')
-            
-            # Look for rows that contain player data (have sportItemOdd/Even classes)
-            if cells and any('sportItem' in cell.get('class', []) for cell in cells):
-                player_rows.append(row)
-        
         print(f"      Found {len(player_rows)} player data rows")
         
         # Parse each player row
-        for row_idx, row in enumerate(player_rows):
-            cells = row.find_all('td')
-            
-            if len(cells) >= 6:  # Minimum expected columns
-                try:
-                    player_data = {
-                        'source_url': source_url,
-                        'endpoint': endpoint_code,
-                        'statistic_type': endpoint_name,
-                        'extracted_at': datetime.now().isoformat(),
-                        'row_index': row_idx
-                    }
-                    
-                    # Parse cells based on known structure
-                    cell_texts = [cell.get_text(strip=True) for cell in cells]
-                    
-                    # Column mapping based on the HTML structure we observed
-                    if len(cell_texts) >= 6:
-                        # Remove ranking indicators like "18." to get just the number
-                        rank_text = cell_texts[0].replace('&nbsp;', '').strip().rstrip('.')
-                        try:
-                            player_data['rank'] = int(rank_text)
-                        except:
-                            pass
-                        
-                        # Names and team
-                        player_data['surname'] = cell_texts[1].replace('&nbsp;', '').strip()
-                        player_data['first_name'] = cell_texts[2].replace('&nbsp;', '').strip()
-                        player_data['team'] = cell_texts[3].replace('&nbsp;', '').strip()
-                        
-                        # Create full name
-                        if player_data['first_name'] and player_data['surname']:
-                            player_data['full_name'] = f"{player_data['first_name']} {player_data['surname']}"
-                        
-                        # Statistics
-                        try:
-                            player_data['points'] = int(cell_texts[4].replace('&nbsp;', '').strip())
-                        except:
-                            pass
-                        
-                        try:
-                            player_data['games'] = int(cell_texts[5].replace('&nbsp;', '').strip())
-                        except:
-                            pass
-                        
-                        # Average (if available)
-                        if len(cell_texts) >= 7:
-                            try:
-                                avg_text = cell_texts[6].replace('&nbsp;', '').strip().replace(',', '.')
-                                player_data['average'] = float(avg_text)
-                            except:
-                                pass
-                    
-                    # Only add if we have meaningful data
-                    if player_data.get('full_name') and player_data.get('team'):
-                        players.append(player_data)
-                        
-                except Exception as e:
-                    # Skip problematic rows but continue processing
-                    continue
+        for row in player_rows:
+            if len(row.cells) >= 6:  # Minimum expected columns
+                player_data = {
+                    'source_url': source_url,
+                    'endpoint': endpoint_code,
+                    'statistic_type': endpoint_name,
+                    'extracted_at': datetime.now().isoformat(),
+                    'row_index': row.row_index
+                }
+                
+                if row.rank is not None:
+                    player_data['rank'] = row.rank
+                
+                # Names and team
+                player_data['surname'] = row.surname
+                player_data['first_name'] = row.first_name
+                player_data['team'] = row.team
+                
+                # Create full name
+                if row.full_name:
+                    player_data['full_name'] = row.full_name
+                
+                # Statistics
+                if row.points is not None:
+                    player_data['points'] = row.points
+                if row.games is not None:
+                    player_data['games'] = row.games
+                if row.average is not None:
+                    player_data['average'] = row.average
+                
+                # Only add if we have meaningful data
+                if player_data.get('full_name') and player_data.get('team'):
+                    players.append(player_data)
         
         return players
         
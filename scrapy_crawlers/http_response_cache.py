@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+HTTP Response Cache for basketball-bund.net fetches
+
+Content-addressed on-disk cache shared by the requests-based crawlers
+(CachedSession, AsyncFetchEngine) and the Scrapy project
+(basketball_scrapers.httpcache.ResponseCacheStorage).
+
+- Entries are keyed by method + normalized URL + normalized form body, so the
+  Action=106 POSTs for different saison_id/startrow values are kept apart.
+- Bodies are zlib-compressed and stored once per content hash.
+- Freshness follows per-URL-class TTL rules: archive seasons never expire,
+  the current season expires after 6h, session setup pages are never cached.
+- Stale entries carrying an ETag/Last-Modified are revalidated with a
+  conditional request instead of being downloaded again.
+- The site answers failures with status 200 ("Keine Einträge gefunden",
+  expired sessions, truncated pages). A validator (looks_complete by default,
+  or one passed in by the caller) rejects those bodies; they are not cached,
+  or only for soft_failure_ttl seconds, so the next crawl fetches them again.
+  response_failure() applies the same check before a crawler stores a page
+  as the final result of a crawl frontier item.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.http_cache')
+
+CURRENT_SEASON_TTL = 6 * 3600
+DEFAULT_TTL = 6 * 3600
+
+# Pages that establish server-side session state must always hit the site
+SESSION_SETUP_RE = re.compile(r'(index\.jsp|ergebnis_aktuell\.do)\?Action=100\b|index\.jsp\?Action=106$')
+SEASON_PARAMS = ('saison_id', 'Saison', 'season')
+
+# The crawlers treat smaller HTML pages as empty (len(response.text) < 5000)
+SOFT_FAILURE_MIN_BYTES = 5000
+SOFT_FAILURE_RE = re.compile(
+    rb'Keine Eintr(?:\xc3\xa4|\xe4|&auml;)ge gefunden|(?:Sitzung|Session)\s+(?:ist\s+)?abgelaufen',
+    re.IGNORECASE
+)
+# Seconds a rejected body is kept; 0 means it is not cached at all
+SOFT_FAILURE_TTL = 0
+
+
+def current_season_year(now: Optional[datetime] = None) -> int:
+    """Season id of the running season (seasons start in August)"""
+    now = now or datetime.now()
+    return now.year if now.month >= 8 else now.year - 1
+
+
+def normalize_url(url: str) -> str:
+    """Sort query parameters so equivalent URLs share a cache key"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ''))
+
+
+def normalize_body(data) -> str:
+    """Normalize a form body given as dict, list of pairs, str or bytes"""
+    if not data:
+        return ''
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', errors='replace')
+    if isinstance(data, str):
+        pairs = parse_qsl(data, keep_blank_values=True)
+    elif isinstance(data, dict):
+        pairs = [(str(k), str(v)) for k, v in data.items()]
+    else:
+        pairs = [(str(k), str(v)) for k, v in data]
+    return urlencode(sorted(pairs))
+
+
+def cache_key(method: str, url: str, data=None) -> str:
+    raw = f"{method.upper()}\n{normalize_url(url)}\n{normalize_body(data)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def extract_season(url: str, data=None) -> Optional[int]:
+    """Find the season id in the query string or form body"""
+    params = dict(parse_qsl(urlsplit(url).query))
+    params.update(parse_qsl(normalize_body(data)))
+    for name in SEASON_PARAMS:
+        value = params.get(name)
+        if value and str(value).isdigit():
+            return int(value)
+    return None
+
+
+def looks_complete(url: str, headers: Dict[str, str], content: bytes) -> bool:
+    """
+    Default validator: False for the soft failures the site returns with
+    status 200 (empty result pages, expired sessions, truncated HTML pages).
+    JSON answers of the REST endpoints are only checked for the markers.
+    """
+    if SOFT_FAILURE_RE.search(content):
+        return False
+    content_type = (_header(headers, 'Content-Type') or '').lower()
+    if 'html' in content_type or (not content_type and content.lstrip()[:1] == b'<'):
+        return len(content) >= SOFT_FAILURE_MIN_BYTES
+    return True
+
+
+def response_failure(response) -> Optional[str]:
+    """
+    Why a fetched page must not be stored as a crawl result, None for a usable
+    page: transport errors, 4xx/5xx answers (429 included) and status-200 soft
+    failures rejected by looks_complete. Takes requests or fetch engine responses.
+    """
+    error = getattr(response, 'error', None)
+    if error:
+        return str(error)
+    if not 200 <= response.status_code < 400:
+        return f"HTTP {response.status_code}"
+    if not looks_complete(response.url, response.headers, response.content):
+        return f"incomplete page (HTTP {response.status_code}, {len(response.content)} bytes)"
+    return None
+
+
+class CacheEntry:
+    """A cached response as read back from the index"""
+
+    def __init__(self, key, url, status, headers, encoding, content, etag,
+                 last_modified, expires_at):
+        self.key = key
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.encoding = encoding
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at is None or self.expires_at > time.time()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """SQLite index plus compressed, content-addressed body files"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 current_season_ttl: float = CURRENT_SEASON_TTL,
+                 default_ttl: float = DEFAULT_TTL,
+                 validator: Optional[Callable[[str, Dict[str, str], bytes], bool]] = looks_complete,
+                 soft_failure_ttl: float = SOFT_FAILURE_TTL):
+        """validator(url, headers, content) -> False marks a 200 response as a soft failure"""
+        self.cache_dir = cache_dir
+        self.bodies_dir = os.path.join(cache_dir, 'bodies')
+        self.current_season_ttl = current_season_ttl
+        self.default_ttl = default_ttl
+        self.validator = validator
+        self.soft_failure_ttl = soft_failure_ttl
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'rejected': 0}
+
+        os.makedirs(self.bodies_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                body TEXT,
+                status INTEGER NOT NULL,
+                headers TEXT,
+                encoding TEXT,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                expires_at REAL
+            )
+        ''')
+        self.conn.commit()
+
+    def ttl_for(self, method: str, url: str, data=None) -> Optional[float]:
+        """
+        Seconds an entry stays fresh: None means forever, 0 means never cache.
+        """
+        if not data and SESSION_SETUP_RE.search(url):
+            return 0
+        season = extract_season(url, data)
+        if season is not None:
+            return None if season < current_season_year() else self.current_season_ttl
+        return self.default_ttl
+
+    def _body_path(self, content_hash: str) -> str:
+        return os.path.join(self.bodies_dir, content_hash[:2], f"{content_hash}.z")
+
+    def lookup(self, method: str, url: str, data=None) -> Optional[CacheEntry]:
+        """Return the cached entry (fresh or stale), or None"""
+        key = cache_key(method, url, data)
+        row = self.conn.execute('''
+            SELECT url, status, headers, encoding, content_hash, etag, last_modified, expires_at
+            FROM responses WHERE key = ?
+        ''', (key,)).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+
+        cached_url, status, headers, encoding, content_hash, etag, last_modified, expires_at = row
+        try:
+            with open(self._body_path(content_hash), 'rb') as f:
+                content = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            self.stats['misses'] += 1
+            return None
+
+        entry = CacheEntry(key, cached_url, status, json.loads(headers or '{}'), encoding,
+                           content, etag, last_modified, expires_at)
+        if expires_at is None and self.validator is not None and not self.validator(cached_url, entry.headers, content):
+            # A soft failure stored forever before it was validated: drop it
+            self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self.conn.commit()
+            self.stats['misses'] += 1
+            return None
+        if entry.fresh:
+            self.stats['hits'] += 1
+        return entry
+
+    def store(self, method: str, url: str, data, status: int, headers: Dict[str, str],
+              content: bytes, encoding: Optional[str] = None,
+              validator: Optional[Callable[[str, Dict[str, str], bytes], bool]] = None):
+        """
+        Store a 200 response according to the TTL rules; a body the validator
+        (this call's or the cache's) rejects gets soft_failure_ttl instead
+        """
+        ttl = self.ttl_for(method, url, data)
+        if status != 200 or ttl == 0:
+            return
+        validator = validator or self.validator
+        if validator is not None and not validator(url, headers, content):
+            self.stats['rejected'] += 1
+            ttl = self.soft_failure_ttl
+            if not ttl:
+                return
+
+        content_hash = hashlib.sha256(content).hexdigest()
+        path = self._body_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(content, 6))
+            os.replace(tmp_path, path)
+
+        headers = {k: v for k, v in headers.items() if k.lower() not in ('set-cookie', 'content-encoding', 'content-length', 'transfer-encoding')}
+        now = time.time()
+        self.conn.execute('''
+            INSERT OR REPLACE INTO responses
+            (key, method, url, body, status, headers, encoding, content_hash,
+             etag, last_modified, stored_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            cache_key(method, url, data),
+            method.upper(),
+            url,
+            normalize_body(data),
+            status,
+            json.dumps(headers),
+            encoding,
+            content_hash,
+            _header(headers, 'ETag'),
+            _header(headers, 'Last-Modified'),
+            now,
+            None if ttl is None else now + ttl
+        ))
+        self.conn.commit()
+        self.stats['stored'] += 1
+
+    def mark_revalidated(self, entry: CacheEntry, method: str, url: str, data=None):
+        """Extend an entry's lifetime after a 304 Not Modified"""
+        ttl = self.ttl_for(method, url, data)
+        expires_at = None if ttl is None else time.time() + ttl
+        self.conn.execute('UPDATE responses SET expires_at = ? WHERE key = ?', (expires_at, entry.key))
+        self.conn.commit()
+        entry.expires_at = expires_at
+        self.stats['revalidated'] += 1
+
+    def close(self):
+        self.conn.close()
+
+
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+class CachedSession(requests.Session):
+    """requests.Session that answers from the response cache when it can"""
+
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        super().__init__()
+        self.cache = cache or ResponseCache()
+
+    def request(self, method, url, params=None, data=None, headers=None, **kwargs):
+        if params:
+            url = requests.Request(method, url, params=params).prepare().url
+
+        entry = self.cache.lookup(method, url, data)
+        if entry is not None and entry.fresh:
+            return self._build_response(entry, url)
+
+        if entry is not None:
+            headers = {**(headers or {}), **entry.conditional_headers()}
+
+        response = super().request(method, url, data=data, headers=headers, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            self.cache.mark_revalidated(entry, method, url, data)
+            return self._build_response(entry, url)
+
+        self.cache.store(method, url, data, response.status_code, dict(response.headers),
+                         response.content, response.encoding)
+        response.from_cache = False
+        return response
+
+    def _build_response(self, entry: CacheEntry, url: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry.status
+        response._content = entry.content
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.encoding = entry.encoding
+        response.url = url
+        response.from_cache = True
+        return response
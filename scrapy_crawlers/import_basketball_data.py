@@ -15,6 +15,8 @@ from datetime import datetime
 from collections import defaultdict
 import hashlib
 
+from bulk_loader import BulkLoader
+
 class BasketballDataImporter:
     def __init__(self, db_path="../../league_cache.db"):
         self.db_path = db_path
@@ -35,6 +37,32 @@ class BasketballDataImporter:
         self.team_aliases = {}
         self.player_aliases = {}
         
+        # Rows are batched and written with executemany in one transaction;
+        # statements are flushed in this order so referenced rows come first
+        self.loader = BulkLoader(self.conn, error_handler=self.record_write_error)
+        self.loader.register('players', """
+            INSERT OR IGNORE INTO players (id, name) 
+            VALUES (?, ?)
+        """)
+        self.loader.register('teams', """
+            INSERT OR IGNORE INTO teams (id, name) 
+            VALUES (?, ?)
+        """)
+        self.loader.register('leagues', """
+            INSERT OR IGNORE INTO leagues (ligaId, seasonId, name, region, source, scraped_at) 
+            VALUES (?, ?, ?, ?, ?, ?)
+        """)
+        # For now, use a default liga_id since seasons are linked to leagues
+        self.loader.register('seasons', """
+            INSERT OR IGNORE INTO seasons (seasonId, year, ligaId) 
+            VALUES (?, ?, ?)
+        """)
+        self.loader.register('season_stats', """
+            INSERT OR REPLACE INTO season_stats 
+            (id, playerId, seasonId, pts, g, pts_g) 
+            VALUES (?, ?, ?, ?, ?, ?)
+        """)
+        
     def setup_database(self):
         """Create missing tables if needed"""
         print("🔧 Setting up database schema...")
@@ -191,68 +219,35 @@ class BasketballDataImporter:
             return default
     
     def upsert_player(self, player_id, name):
-        """Insert or update player"""
-        cursor = self.conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR IGNORE INTO players (id, name) 
-            VALUES (?, ?)
-        """, (player_id, name))
-        
-        if cursor.rowcount > 0:
-            self.stats['players_imported'] += 1
+        """Queue a player insert"""
+        self.loader.add('players', (player_id, name))
     
     def upsert_team(self, team_id, name):
-        """Insert or update team"""
-        cursor = self.conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR IGNORE INTO teams (id, name) 
-            VALUES (?, ?)
-        """, (team_id, name))
-        
-        if cursor.rowcount > 0:
-            self.stats['teams_imported'] += 1
+        """Queue a team insert"""
+        self.loader.add('teams', (team_id, name))
     
     def upsert_season(self, season_id, year):
-        """Insert or update season"""
-        cursor = self.conn.cursor()
-        
-        # For now, use a default liga_id since seasons are linked to leagues
-        cursor.execute("""
-            INSERT OR IGNORE INTO seasons (seasonId, year, ligaId) 
-            VALUES (?, ?, ?)
-        """, (season_id, year, "default"))
+        """Queue a season insert"""
+        self.loader.add('seasons', (season_id, year, "default"))
         
     def upsert_league(self, liga_id, season_id, name, region):
-        """Insert or update league"""
-        cursor = self.conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR IGNORE INTO leagues (ligaId, seasonId, name, region, source, scraped_at) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (liga_id, season_id, name, region, "beast_crawler", datetime.now()))
-        
-        if cursor.rowcount > 0:
-            self.stats['leagues_imported'] += 1
+        """Queue a league insert"""
+        self.loader.add('leagues', (liga_id, season_id, name, region, "beast_crawler", datetime.now()))
     
     def upsert_season_stat(self, player_id, season_id, points, games, team_id=None):
-        """Insert or update season statistics"""
-        cursor = self.conn.cursor()
-        
+        """Queue a season statistics upsert"""
         # Calculate points per game
         ppg = round(points / games, 1) if games > 0 else 0.0
         
         stat_id = self.generate_id("stat", player_id, season_id)
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO season_stats 
-            (id, playerId, seasonId, pts, g, pts_g) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (stat_id, player_id, season_id, points, games, ppg))
-        
-        if cursor.rowcount > 0:
-            self.stats['season_stats_imported'] += 1
+        self.loader.add('season_stats', (stat_id, player_id, season_id, points, games, ppg))
+    
+    def record_write_error(self, table, row, error):
+        """Rows the database rejected while flushing a batch"""
+        error_msg = f"Error writing {table} row {row[0]}: {error}"
+        print(f"⚠️ {error_msg}")
+        self.stats['errors'].append(error_msg)
     
     def import_all_csv_files(self):
         """Import all available CSV files"""
@@ -267,14 +262,19 @@ class BasketballDataImporter:
             "sample_export.csv"
         ]
         
-        for csv_file in csv_files:
-            if os.path.exists(csv_file):
-                self.import_csv_file(csv_file)
-            else:
-                print(f"⚠️ File not found: {csv_file}")
-        
-        # Commit all changes
-        self.conn.commit()
+        # One transaction: the remaining batches are written and committed
+        # when the block ends, an interrupted import is rolled back
+        with self.loader:
+            for csv_file in csv_files:
+                if os.path.exists(csv_file):
+                    self.import_csv_file(csv_file)
+                else:
+                    print(f"⚠️ File not found: {csv_file}")
+        print(f"💾 Wrote {self.loader.summary()}")
+        self.stats['players_imported'] = self.loader.changes['players']
+        self.stats['teams_imported'] = self.loader.changes['teams']
+        self.stats['leagues_imported'] = self.loader.changes['leagues']
+        self.stats['season_stats_imported'] = self.loader.changes['season_stats']
         
         # Print summary
         self.print_import_summary()
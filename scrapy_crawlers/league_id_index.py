@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Adaptive League ID Index
+
+Learns which parts of the basketball-bund.net league ID space are populated so
+discovery does not have to probe every integer in hard-coded ranges.
+
+- Known hits/misses are loaded from league_cache.db (league_cache) and
+  extended_league_cache.db (extended_league_cache) plus the index's own
+  league_id_map table.
+- The ID space is split into buckets; buckets whose probes were all misses
+  (and are recent enough) are skipped entirely.
+- Remaining buckets are probed on a coarse stride first; every hit is refined
+  outward until a few consecutive misses, since leagues are allocated in runs.
+- Every probe result is persisted back to league_id_map.
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'league_cache.db')
+DEFAULT_EXTENDED_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extended_league_cache.db')
+
+BUCKET_SIZE = 50
+COARSE_STRIDE = 10
+REFINE_GAP = 3           # consecutive misses that end a refinement walk
+MIN_EMPTY_PROBES = 3     # misses needed before a bucket counts as empty
+MISS_TTL_DAYS = 30       # misses older than this are probed again
+
+
+class AdaptiveLeagueIdIndex:
+    """Persistent map of league ID hits/misses with adaptive probing"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH,
+                 extra_sources: Optional[List[str]] = None,
+                 bucket_size: int = BUCKET_SIZE,
+                 coarse_stride: int = COARSE_STRIDE,
+                 refine_gap: int = REFINE_GAP,
+                 miss_ttl_days: int = MISS_TTL_DAYS):
+        self.db_path = db_path
+        self.extra_sources = extra_sources if extra_sources is not None else [DEFAULT_EXTENDED_DB_PATH]
+        self.bucket_size = bucket_size
+        self.coarse_stride = coarse_stride
+        self.refine_gap = refine_gap
+        self.miss_cutoff = datetime.now() - timedelta(days=miss_ttl_days)
+
+        # league_id -> (exists, checked_at)
+        self.id_map: Dict[int, Tuple[bool, datetime]] = {}
+        self.pending: Dict[int, Tuple[bool, datetime]] = {}
+        self.stats = {'probes': 0, 'hits': 0, 'skipped_known': 0, 'skipped_buckets': 0}
+
+        self.setup_database()
+        self.load()
+
+    def setup_database(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS league_id_map (
+                league_id INTEGER PRIMARY KEY,
+                league_exists BOOLEAN NOT NULL,
+                probed_at TIMESTAMP NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _merge(self, league_id, exists, checked_at):
+        try:
+            league_id = int(league_id)
+            checked = datetime.fromisoformat(checked_at) if checked_at else datetime.min
+        except (TypeError, ValueError):
+            return
+        current = self.id_map.get(league_id)
+        # A hit for any season marks the ID as populated
+        if current is None or (exists and not current[0]) or (exists == current[0] and checked > current[1]):
+            self.id_map[league_id] = (bool(exists), checked)
+
+    def _load_table(self, path: str, query: str):
+        if not os.path.exists(path):
+            return
+        conn = sqlite3.connect(path)
+        try:
+            for league_id, exists, checked_at in conn.execute(query):
+                self._merge(league_id, exists, checked_at)
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            conn.close()
+
+    def load(self):
+        """Learn from every league cache we have"""
+        self._load_table(self.db_path, 'SELECT league_id, league_exists, last_checked FROM league_cache')
+        for path in self.extra_sources:
+            self._load_table(path, 'SELECT league_id, league_exists, last_checked FROM extended_league_cache')
+        self._load_table(self.db_path, 'SELECT league_id, league_exists, probed_at FROM league_id_map')
+
+    def save(self):
+        """Persist probe results gathered since the last save"""
+        if not self.pending:
+            return
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO league_id_map (league_id, league_exists, probed_at)
+                VALUES (?, ?, ?)
+            ''', [(league_id, exists, checked.isoformat()) for league_id, (exists, checked) in self.pending.items()])
+        conn.close()
+        self.pending = {}
+
+    def record(self, league_id: int, exists: bool):
+        entry = (bool(exists), datetime.now())
+        self.id_map[int(league_id)] = entry
+        self.pending[int(league_id)] = entry
+
+    def known(self, league_id: int) -> Optional[bool]:
+        """True/False for a trusted previous result, None if the ID must be probed"""
+        entry = self.id_map.get(league_id)
+        if entry is None:
+            return None
+        exists, checked = entry
+        if not exists and checked < self.miss_cutoff:
+            return None
+        return exists
+
+    def bucket_state(self, bucket_start: int) -> str:
+        """'dense', 'empty' or 'unknown' for the bucket starting at bucket_start"""
+        hits = misses = 0
+        for league_id in range(bucket_start, bucket_start + self.bucket_size):
+            state = self.known(league_id)
+            if state is True:
+                hits += 1
+            elif state is False:
+                misses += 1
+        if hits:
+            return 'dense'
+        if misses >= MIN_EMPTY_PROBES:
+            return 'empty'
+        return 'unknown'
+
+    def _buckets(self, ranges: Iterable[Tuple[int, int]]):
+        for start, end in ranges:
+            bucket_start = start - start % self.bucket_size
+            while bucket_start < end:
+                yield max(start, bucket_start), min(end, bucket_start + self.bucket_size), bucket_start
+                bucket_start += self.bucket_size
+
+    def plan_seeds(self, ranges: Iterable[Tuple[int, int]]) -> List[int]:
+        """
+        IDs worth probing in ranges: known hits plus a coarse grid over buckets
+        that are not known to be empty. Fresh misses are left out.
+        """
+        seeds = []
+        for lo, hi, bucket_start in self._buckets(ranges):
+            if self.bucket_state(bucket_start) == 'empty':
+                self.stats['skipped_buckets'] += 1
+                continue
+            candidates = set(range(lo, hi, self.coarse_stride))
+            candidates.update(i for i in range(lo, hi) if self.known(i) is True)
+            for league_id in sorted(candidates):
+                if self.known(league_id) is False:
+                    self.stats['skipped_known'] += 1
+                    continue
+                seeds.append(league_id)
+        return seeds
+
+    def discover(self, ranges: Iterable[Tuple[int, int]],
+                 probe: Callable[[int], Optional[dict]]) -> Dict[int, dict]:
+        """
+        Probe ranges adaptively. probe(league_id) returns league info for an
+        existing league or None. Returns {league_id: info} for all hits.
+        """
+        ranges = list(ranges)
+        found: Dict[int, dict] = {}
+        probed = set()
+
+        def in_ranges(league_id):
+            return any(start <= league_id < end for start, end in ranges)
+
+        def run_probe(league_id):
+            probed.add(league_id)
+            if self.known(league_id) is False:
+                self.stats['skipped_known'] += 1
+                return None
+            self.stats['probes'] += 1
+            info = probe(league_id)
+            self.record(league_id, info is not None)
+            if info is not None:
+                self.stats['hits'] += 1
+                found[league_id] = info
+            return info
+
+        for seed in self.plan_seeds(ranges):
+            if seed in probed:
+                continue
+            if run_probe(seed) is None:
+                continue
+
+            # Refine outward around the hit
+            for step in (-1, 1):
+                league_id = seed + step
+                misses = 0
+                while misses < self.refine_gap and in_ranges(league_id) and league_id not in probed:
+                    misses = 0 if run_probe(league_id) is not None else misses + 1
+                    league_id += step
+
+        self.save()
+        return found
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+League Standings
+
+Standings per (league_id, season_year) from the match results of
+basketball_analytics.db, materialized in the standings table:
+
+- one grouped SQL pass sums games, wins, losses and points for / against per
+  team of the leagues to compute
+- ranking follows the DBB table: standing points (2 per win, 1 per loss),
+  teams level on points are separated by their head-to-head games (wins,
+  then point difference among the tied teams), re-applied to any subset
+  that is still level, then by the overall point difference and the points
+  scored
+- triggers on matches queue the league seasons touched by an inserted,
+  updated or deleted match in standings_dirty; refresh() recomputes only
+  those leagues
+- the standings table is keyed by (league_id, season_year, rank), so a
+  league table is one primary key range read
+
+The played-match rule is the one of team_season_stats: both teams known and
+a result containing ':'.
+"""
+
+import argparse
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from team_season_stats import STATS_MATCH_COLUMNS
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS standings (
+        league_id INTEGER,
+        season_year INTEGER,
+        rank INTEGER,
+        team_permanent_id INTEGER,
+        team_name TEXT,
+        games_played INTEGER,
+        wins INTEGER,
+        losses INTEGER,
+        points_for INTEGER,
+        points_against INTEGER,
+        point_differential INTEGER,
+        standing_points INTEGER,
+        h2h_wins INTEGER,
+        h2h_differential INTEGER,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (league_id, season_year, rank)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS standings_dirty (
+        league_id INTEGER,
+        season_year INTEGER,
+        PRIMARY KEY (league_id, season_year)
+    ) WITHOUT ROWID
+    ''',
+]
+
+
+def _queue_league(row: str) -> str:
+    # DO NOTHING instead of OR IGNORE: see team_season_stats._queue_keys
+    return f'''
+        INSERT INTO standings_dirty (league_id, season_year)
+        SELECT {row}.league_id, {row}.season_year WHERE {row}.league_id IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    '''
+
+
+TRIGGERS = {
+    'matches_standings_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS matches_standings_insert AFTER INSERT ON matches
+        BEGIN {_queue_league('NEW')} END
+    ''',
+    'matches_standings_update': f'''
+        CREATE TRIGGER IF NOT EXISTS matches_standings_update
+        AFTER UPDATE OF {', '.join(STATS_MATCH_COLUMNS)} ON matches
+        BEGIN {_queue_league('OLD')} {_queue_league('NEW')} END
+    ''',
+    'matches_standings_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS matches_standings_delete AFTER DELETE ON matches
+        BEGIN {_queue_league('OLD')} END
+    ''',
+}
+
+PLAYED = "home_team_id AND guest_team_id AND result LIKE '%:%'"
+
+# Per team of a league season, from the home and the guest side
+TEAM_TOTALS = f'''
+    SELECT league_id, season_year, team_permanent_id, MAX(team_name),
+           COUNT(*), SUM(points_for > points_against), SUM(points_for <= points_against),
+           SUM(points_for), SUM(points_against)
+    FROM (
+        SELECT league_id, season_year, home_team_id AS team_permanent_id, home_team_name AS team_name,
+               COALESCE(home_score, 0) AS points_for, COALESCE(guest_score, 0) AS points_against
+        FROM matches WHERE {PLAYED} {{filter}}
+        UNION ALL
+        SELECT league_id, season_year, guest_team_id, guest_team_name,
+               COALESCE(guest_score, 0), COALESCE(home_score, 0)
+        FROM matches WHERE {PLAYED} {{filter}}
+    )
+    GROUP BY league_id, season_year, team_permanent_id
+'''
+ALL_TEAM_TOTALS = TEAM_TOTALS.format(filter='')
+LEAGUE_TEAM_TOTALS = TEAM_TOTALS.format(filter='AND league_id = :league AND season_year = :season')
+
+MATCHES = f'''
+    SELECT league_id, season_year, home_team_id, guest_team_id, COALESCE(home_score, 0), COALESCE(guest_score, 0)
+    FROM matches
+    WHERE {PLAYED} {{filter}}
+'''
+ALL_MATCHES = MATCHES.format(filter='')
+LEAGUE_MATCHES = MATCHES.format(filter='AND league_id = :league AND season_year = :season')
+
+
+def head_to_head(team_ids, matches) -> Dict[int, Tuple[int, int]]:
+    """(wins, point difference) per team in the games among team_ids"""
+    tied = set(team_ids)
+    record = {team_id: [0, 0] for team_id in tied}
+    for home_id, guest_id, home_score, guest_score in matches:
+        if home_id in tied and guest_id in tied:
+            record[home_id][0] += home_score > guest_score
+            record[guest_id][0] += guest_score > home_score
+            record[home_id][1] += home_score - guest_score
+            record[guest_id][1] += guest_score - home_score
+    return {team_id: tuple(values) for team_id, values in record.items()}
+
+
+def break_tie(group: List[Dict], matches) -> List[Dict]:
+    """
+    Teams level on standing points in table order: head-to-head among the
+    group, re-applied to every subgroup that is still level, then the overall
+    point difference and the points scored once head-to-head no longer
+    separates anyone
+    """
+    if len(group) < 2:
+        return group
+    h2h = head_to_head([team['team_permanent_id'] for team in group], matches)
+    subgroups = defaultdict(list)
+    for team in group:
+        team['h2h_wins'], team['h2h_differential'] = h2h[team['team_permanent_id']]
+        subgroups[h2h[team['team_permanent_id']]].append(team)
+
+    if len(subgroups) == 1:
+        return sorted(group, key=lambda team: (
+            -team['point_differential'], -team['points_for'], team['team_permanent_id']
+        ))
+    table = []
+    for key in sorted(subgroups, key=lambda values: (-values[0], -values[1])):
+        table.extend(break_tie(subgroups[key], matches))
+    return table
+
+
+def rank_league(teams: List[Dict], load_matches) -> List[Dict]:
+    """
+    Teams of one league season in table order, with rank and the head-to-head
+    values that decided the team's place; load_matches() returns the league's
+    played matches and is only called when teams are level on standing points
+    """
+    by_points = defaultdict(list)
+    for team in teams:
+        team['standing_points'] = 2 * team['wins'] + team['losses']
+        team['point_differential'] = team['points_for'] - team['points_against']
+        team['h2h_wins'], team['h2h_differential'] = 0, 0
+        by_points[team['standing_points']].append(team)
+
+    matches = None
+    table = []
+    for standing_points in sorted(by_points, reverse=True):
+        group = by_points[standing_points]
+        if len(group) > 1 and matches is None:
+            matches = load_matches()
+        table.extend(break_tie(group, matches))
+
+    for rank, team in enumerate(table, start=1):
+        team['rank'] = rank
+    return table
+
+
+class LeagueStandings:
+    """Materialized standings on an open analytics connection"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._all_matches = None
+
+    def ensure_schema(self) -> bool:
+        """
+        Tables and triggers; returns True when the triggers were just installed
+        (earlier match changes were not tracked and need a full refresh)
+        """
+        existing = {row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        for sql in SCHEMA:
+            self.conn.execute(sql)
+        for sql in TRIGGERS.values():
+            self.conn.execute(sql)
+        self.conn.commit()
+        return not set(TRIGGERS) <= existing
+
+    def _league_matches(self, league_id, season_year, full: bool):
+        """Played matches of a league season (home, guest, home score, guest score)"""
+        if not full:
+            return [row[2:] for row in self.conn.execute(LEAGUE_MATCHES, {'league': league_id, 'season': season_year})]
+        # A full refresh reads all matches once instead of one query per league
+        if self._all_matches is None:
+            self._all_matches = defaultdict(list)
+            for row in self.conn.execute(ALL_MATCHES):
+                self._all_matches[row[:2]].append(row[2:])
+        return self._all_matches[(league_id, season_year)]
+
+    def refresh(self, full: bool = False) -> Dict[str, int]:
+        """Recompute the queued league seasons (all with full=True)"""
+        started = time.perf_counter()
+        if self.ensure_schema():
+            full = True
+
+        leagues = defaultdict(list)
+        if full:
+            self.conn.execute('''
+                INSERT OR IGNORE INTO standings_dirty (league_id, season_year)
+                SELECT DISTINCT league_id, season_year FROM matches WHERE league_id IS NOT NULL
+                UNION
+                SELECT league_id, season_year FROM standings
+            ''')
+            totals = self.conn.execute(ALL_TEAM_TOTALS).fetchall()
+        else:
+            totals = []
+            for league_id, season_year in self.conn.execute('SELECT league_id, season_year FROM standings_dirty').fetchall():
+                totals.extend(self.conn.execute(
+                    LEAGUE_TEAM_TOTALS, {'league': league_id, 'season': season_year}).fetchall())
+        for league_id, season_year, team_id, team_name, games, wins, losses, points_for, points_against in totals:
+            leagues[(league_id, season_year)].append({
+                'team_permanent_id': team_id, 'team_name': team_name, 'games_played': games,
+                'wins': wins, 'losses': losses, 'points_for': points_for, 'points_against': points_against,
+            })
+
+        dirty = self.conn.execute('SELECT league_id, season_year FROM standings_dirty').fetchall()
+        rows = []
+        for league_id, season_year in dirty:
+            table = rank_league(leagues.get((league_id, season_year), []),
+                                lambda: self._league_matches(league_id, season_year, full))
+            rows.extend((
+                league_id, season_year, team['rank'], team['team_permanent_id'], team['team_name'],
+                team['games_played'], team['wins'], team['losses'], team['points_for'],
+                team['points_against'], team['point_differential'], team['standing_points'],
+                team['h2h_wins'], team['h2h_differential']
+            ) for team in table)
+
+        self.conn.executemany('DELETE FROM standings WHERE league_id = ? AND season_year = ?', dirty)
+        self.conn.executemany('''
+            INSERT INTO standings
+            (league_id, season_year, rank, team_permanent_id, team_name, games_played, wins, losses,
+             points_for, points_against, point_differential, standing_points, h2h_wins, h2h_differential)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.conn.execute('DELETE FROM standings_dirty')
+        self.conn.commit()
+        self._all_matches = None
+
+        print(f"🏆 Standings: {len(dirty)} league seasons, {len(rows)} table rows "
+              f"({time.perf_counter() - started:.2f}s)")
+        return {'leagues': len(dirty), 'rows': len(rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute league standings in basketball_analytics.db')
+    parser.add_argument('--db', default='basketball_analytics.db', help='Database file')
+    parser.add_argument('--full', action='store_true', help='Recompute every league season')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        LeagueStandings(conn).refresh(full=args.full)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,19 @@ import time
 import random
 import re
 
-def crawl_historical_paginated():
+from async_fetch_engine import FetchRequest, fetch_all
+from http_response_cache import CachedSession, response_failure
+from crawl_frontier import CrawlFrontier, DiscoveryError, DISCOVERY_ENDPOINT
+from statistik_parser import parse_tables
+
+# Load budget for the concurrent league fan-out
+CONCURRENT_REQUESTS = 4
+REQUESTS_PER_SECOND = 3.0
+
+STATISTIK_ENDPOINTS = ['statBesteWerferArchiv', 'statBesteFreiWerferArchiv', 'statBeste3erWerferArchiv']
+LEAGUE_ENDPOINTS = STATISTIK_ENDPOINTS + ['standings', 'results']
+
+def crawl_historical_paginated(concurrent_requests=CONCURRENT_REQUESTS, requests_per_second=REQUESTS_PER_SECOND):
     """
     Historical crawler with proper pagination handling
     1. Action=106 POST → Get league list (handle pagination)
@@ -25,67 +37,50 @@ def crawl_historical_paginated():
     target_seasons = list(range(2003, 2025))
     
     session = create_session_with_cookies()
+    frontier = CrawlFrontier('paginated_historical')
     
     all_players = []
     season_summary = {}
     
-    for season in target_seasons:
-        print(f"\n📅 SEASON {season}")
+    try:
+        for season in target_seasons:
+            print(f"\n📅 SEASON {season}")
         
-        # Step 1: Get ALL liga_ids from all pages
-        liga_ids = get_all_liga_ids_paginated(session, season)
+            # Step 1: Get ALL liga_ids from all pages (once - kept in the frontier)
+            liga_ids = discover_liga_ids(session, season, frontier)
         
-        if not liga_ids:
-            print(f"  ❌ No leagues found for season {season}")
-            continue
+            if liga_ids is None:
+                print(f"  ⏭️ Season {season} is being discovered by another worker")
+                continue
         
-        print(f"  ✅ Found {len(liga_ids)} leagues across all pages")
+            if not liga_ids:
+                print(f"  ❌ No leagues found for season {season}")
+                continue
         
-        # Step 2: Crawl each league for all endpoints
-        season_results = []
-        for i, liga_info in enumerate(liga_ids, 1):
-            liga_id = liga_info['liga_id']
-            league_name = liga_info['name']
-            print(f"  🏀 League {i}/{len(liga_ids)}: {league_name} (ID: {liga_id})")
-
-            league_result = {
-                'season': season,
-                'liga_id': liga_id,
-                'league_name': league_name,
-                'statBesteWerferArchiv': None,
-                'statBesteFreiWerferArchiv': None,
-                'statBeste3erWerferArchiv': None,
-                'standings': None,
-                'results': None
-            }
-
-            # Crawl statBesteWerferArchiv
-            league_result['statBesteWerferArchiv'] = crawl_statistik_endpoint(session, liga_id, season, 'statBesteWerferArchiv')
-            # Crawl statBesteFreiWerferArchiv
-            league_result['statBesteFreiWerferArchiv'] = crawl_statistik_endpoint(session, liga_id, season, 'statBesteFreiWerferArchiv')
-            # Crawl statBeste3erWerferArchiv
-            league_result['statBeste3erWerferArchiv'] = crawl_statistik_endpoint(session, liga_id, season, 'statBeste3erWerferArchiv')
-            # Crawl Action=107 (standings)
-            league_result['standings'] = crawl_league_players(session, liga_id, league_name, season)
-            # Crawl Action=108 (results)
-            league_result['results'] = crawl_league_results(session, liga_id, league_name, season)
-
-            season_results.append(league_result)
-            print(f"    ✅ Endpoints crawled for league {liga_id}")
-            time.sleep(random.uniform(1, 2))
+            print(f"  ✅ Found {len(liga_ids)} leagues across all pages")
+        
+            # Step 2: Crawl each league for all endpoints, several leagues at once
+            season_results = crawl_leagues_concurrently(
+                session, liga_ids, season, frontier,
+                concurrent_requests=concurrent_requests,
+                requests_per_second=requests_per_second
+            )
 
-        # Save season results
-        if season_results:
-            all_players.extend(season_results)
-            season_summary[season] = {
-                'total_leagues': len(liga_ids),
-                'leagues': [liga['name'] for liga in liga_ids]
-            }
-            save_season_players(season, season_results, liga_ids)
-            print(f"  📊 Season {season} complete: {len(season_results)} leagues crawled")
+            # Save season results
+            if season_results:
+                all_players.extend(season_results)
+                season_summary[season] = {
+                    'total_leagues': len(liga_ids),
+                    'leagues': [liga['name'] for liga in liga_ids]
+                }
+                save_season_players(season, season_results, liga_ids)
+                print(f"  📊 Season {season} complete: {len(season_results)} leagues crawled")
 
-        print(f"  ⏱️  Waiting before next season...")
-        time.sleep(random.uniform(3, 6))
+            print(f"  ⏱️  Waiting before next season...")
+            time.sleep(random.uniform(3, 6))
+    finally:
+        # Hand back unfinished claims, also on Ctrl+C or a crash
+        frontier.close()
     
     # Save comprehensive dataset
     if all_players:
@@ -98,7 +93,7 @@ def crawl_historical_paginated():
 
 def create_session_with_cookies():
     """Create session with proper cookies for authentication"""
-    session = requests.Session()
+    session = CachedSession()
     # Set headers from working curl
     session.headers.update({
         'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
@@ -141,9 +136,129 @@ def create_session_with_cookies():
     session.cookies.update(cookies)
     return session
 
+def discover_liga_ids(session, season, frontier):
+    """
+    League list of a season, discovered once and stored in the frontier.
+    Returns None while another worker is discovering the season.
+    """
+    if frontier.is_done(season, DISCOVERY_ENDPOINT):
+        return frontier.result(season, DISCOVERY_ENDPOINT)
+    
+    item = frontier.claim_key(season, DISCOVERY_ENDPOINT)
+    if item is None:
+        return None
+    
+    try:
+        liga_ids = get_all_liga_ids_paginated(session, season)
+    except DiscoveryError as e:
+        # Not completed: the next run discovers the season again
+        print(f"  💥 League list of season {season} incomplete: {e}")
+        frontier.fail(item, e)
+        return []
+    except Exception as e:
+        frontier.fail(item, e)
+        raise
+    frontier.complete(item, liga_ids)
+    return liga_ids
+
+def league_endpoint_url(liga_id, season, endpoint):
+    if endpoint == 'standings':
+        return league_players_url(liga_id, season)
+    if endpoint == 'results':
+        return league_results_url(liga_id, season)
+    return statistik_endpoint_url(liga_id, season, endpoint)
+
+def parse_league_endpoint_response(response, liga_info, season, endpoint):
+    liga_id = liga_info['liga_id']
+    if endpoint == 'standings':
+        return parse_league_players_response(response, liga_id, liga_info['name'], season)
+    if endpoint == 'results':
+        return parse_league_results_response(response, liga_id)
+    return parse_statistik_response(response, liga_id, season, endpoint)
+
+def crawl_leagues_concurrently(session, liga_ids, season, frontier, concurrent_requests=CONCURRENT_REQUESTS,
+                               requests_per_second=REQUESTS_PER_SECOND):
+    """
+    Fetch all endpoints of all leagues in a season through the async fetch engine.
+    Work is drawn from the frontier, so endpoints fetched by an earlier (crashed)
+    run or by another worker are not downloaded again.
+    """
+    
+    frontier.add_many(
+        (season, liga_info['liga_id'], endpoint, liga_info)
+        for liga_info in liga_ids
+        for endpoint in LEAGUE_ENDPOINTS
+    )
+    
+    print(f"  🚀 Fetching pending pages ({concurrent_requests} at once, {requests_per_second}/s)")
+    while True:
+        items = frontier.claim(concurrent_requests * 5, season=season, endpoint=LEAGUE_ENDPOINTS)
+        if not items:
+            break
+        fetch_frontier_items(session, frontier, items, concurrent_requests, requests_per_second)
+    
+    if not frontier.is_drained(season, LEAGUE_ENDPOINTS):
+        print(f"  ⏭️ Other workers are still crawling season {season}")
+        return []
+    
+    return assemble_season_results(frontier, liga_ids, season)
+
+def fetch_frontier_items(session, frontier, items, concurrent_requests=CONCURRENT_REQUESTS,
+                         requests_per_second=REQUESTS_PER_SECOND):
+    """Fetch and parse a batch of claimed league endpoint items, reporting each back to the frontier"""
+    responses = fetch_all(
+        [FetchRequest(league_endpoint_url(item.liga_id, item.season, item.endpoint)) for item in items],
+        session=session,
+        max_per_host=concurrent_requests,
+        requests_per_second=requests_per_second
+    )
+    done = 0
+    for item, response in zip(items, responses):
+        # Only a validated page completes an item; anything else is retried
+        failure = response_failure(response)
+        if failure:
+            frontier.fail(item, failure)
+            continue
+        frontier.complete(
+            item,
+            parse_league_endpoint_response(response, item.payload, int(item.season), item.endpoint),
+            etag=response.header('ETag')
+        )
+        done += 1
+    return done
+
+def assemble_season_results(frontier, liga_ids, season, verbose=True):
+    """Build the per-league result dicts of a season from the stored frontier results"""
+    league_results = {}
+    for item, result in frontier.results(season):
+        if item.endpoint in LEAGUE_ENDPOINTS:
+            league_results.setdefault(item.liga_id, {})[item.endpoint] = result
+    
+    season_results = []
+    for i, liga_info in enumerate(liga_ids, 1):
+        liga_id = liga_info['liga_id']
+        league_name = liga_info['name']
+        results = league_results.get(str(liga_id), {})
+        if verbose:
+            print(f"  🏀 League {i}/{len(liga_ids)}: {league_name} (ID: {liga_id})")
+            print(f"    ✅ Endpoints crawled for league {liga_id} ({len(results)}/{len(LEAGUE_ENDPOINTS)})")
+
+        league_result = {
+            'season': season,
+            'liga_id': liga_id,
+            'league_name': league_name,
+        }
+        for endpoint in LEAGUE_ENDPOINTS:
+            league_result[endpoint] = results.get(endpoint, [])
+
+        season_results.append(league_result)
+    
+    return season_results
+
 def get_all_liga_ids_paginated(session, season):
     """
-    Get ALL liga_ids by following pagination
+    Get ALL liga_ids by following pagination. Raises DiscoveryError when a
+    page fails or has no leagues, so a partial list is never stored as final.
     """
     
     all_liga_ids = []
@@ -166,40 +281,39 @@ def get_all_liga_ids_paginated(session, season):
         }
         try:
             response = session.post(url, data=post_data, timeout=30)
-            if response.status_code != 200:
-                print(f"      ❌ HTTP {response.status_code}")
-                break
-            print(f"      ✅ Response: {len(response.text):,} chars")
-            page_filename = f'action_106_page_{page}_{season}_startrow_{startrow}.html'
-            with open(page_filename, 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            page_liga_ids = extract_liga_ids_from_page(soup)
-            if not page_liga_ids:
-                print(f"      ❌ No liga_ids found on page {page}")
-                break
-            print(f"      📋 Found {len(page_liga_ids)} liga_ids on page {page}")
-            all_liga_ids.extend(page_liga_ids)
-            visited_startrows.add(startrow)
-            # Find all possible startrow links on the page
-            next_startrows = set()
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '')
-                match = re.search(r'startrow=(\d+)', href)
-                if match:
-                    sr = int(match.group(1))
-                    if sr not in visited_startrows:
-                        next_startrows.add(sr)
-            if next_startrows:
-                startrow = min(next_startrows)
-                page += 1
-                time.sleep(random.uniform(1, 2))
-                continue
-            print(f"      ✅ Last page reached")
-            break
         except Exception as e:
-            print(f"      💥 Error on page {page}: {str(e)[:50]}")
-            break
+            raise DiscoveryError(f"page {page}: {str(e)[:100]}") from e
+        if response.status_code != 200:
+            raise DiscoveryError(f"page {page}: HTTP {response.status_code}")
+        print(f"      ✅ Response: {len(response.text):,} chars")
+        page_filename = f'action_106_page_{page}_{season}_startrow_{startrow}.html'
+        with open(page_filename, 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        soup = BeautifulSoup(response.text, 'html.parser')
+        page_liga_ids = extract_liga_ids_from_page(soup)
+        if not page_liga_ids:
+            # An empty first page or a linked page without leagues is a soft failure
+            # (expired session, error page), not the end of the list
+            raise DiscoveryError(f"no liga_ids on page {page}")
+        print(f"      📋 Found {len(page_liga_ids)} liga_ids on page {page}")
+        all_liga_ids.extend(page_liga_ids)
+        visited_startrows.add(startrow)
+        # Find all possible startrow links on the page
+        next_startrows = set()
+        for link in soup.find_all('a', href=True):
+            href = link.get('href', '')
+            match = re.search(r'startrow=(\d+)', href)
+            if match:
+                sr = int(match.group(1))
+                if sr not in visited_startrows:
+                    next_startrows.add(sr)
+        if next_startrows:
+            startrow = min(next_startrows)
+            page += 1
+            time.sleep(random.uniform(1, 2))
+            continue
+        print(f"      ✅ Last page reached")
+        break
     print(f"    📊 Total liga_ids found: {len(all_liga_ids)} across {page} pages")
     return all_liga_ids
 
@@ -293,49 +407,44 @@ def check_has_next_page(soup, current_page):
     
     return False
 
+def league_players_url(liga_id, season):
+    return f'https://www.basketball-bund.net/index.jsp?Action=107&liga_id={liga_id}&saison_id={season}'
+
 def crawl_league_players(session, liga_id, league_name, season):
     """
     Crawl individual league for player data using Action=107
     """
     
-    url = f'https://www.basketball-bund.net/index.jsp?Action=107&liga_id={liga_id}&saison_id={season}'
-    
     try:
-        response = session.get(url, timeout=30)
-        
-        if response.status_code != 200 or not response.text:
-            print(f"      💥 Error crawling league {liga_id}: HTTP {response.status_code}")
-            return []
-        soup = BeautifulSoup(response.text, 'html.parser')
-        players = extract_players_from_statistik(soup, liga_id, league_name, season, 'Action=107')
-        
-        return players
+        response = session.get(league_players_url(liga_id, season), timeout=30)
+        return parse_league_players_response(response, liga_id, league_name, season)
         
     except Exception as e:
         print(f"      💥 Error crawling league {liga_id}: {str(e)[:50]}")
         return []
 
-def extract_players_from_statistik(soup, liga_id, league_name, season, endpoint):
+def parse_league_players_response(response, liga_id, league_name, season):
+    if response.status_code != 200 or not response.text:
+        print(f"      💥 Error crawling league {liga_id}: HTTP {response.status_code}")
+        return []
+    return extract_players_from_statistik(response.text, liga_id, league_name, season, 'Action=107')
+
+def extract_players_from_statistik(content, liga_id, league_name, season, endpoint):
     """
     Extract player data from statistik.do endpoints
     """
     players = []
-    tables = soup.find_all('table')
-    for table_idx, table in enumerate(tables):
-        rows = table.find_all('tr')
+    for table in parse_tables(content):
+        rows = table.rows
         if len(rows) < 2:
             continue
-        header_row = rows[0]
-        header_cells = header_row.find_all(['th', 'td'])
-        header_texts = [cell.get_text(strip=True).lower() for cell in header_cells]
+        header_texts = [text.lower() for text in rows[0]]
         player_indicators = ['name', 'spieler', 'punkte', 'spiele', 'team', 'mannschaft', 'quote', '3er']
         if not any(indicator in ' '.join(header_texts) for indicator in player_indicators):
             continue
-        for row_idx, row in enumerate(rows[1:], 1):
-            cells = row.find_all(['td', 'th'])
-            if len(cells) < 2:
+        for row_idx, cell_texts in enumerate(rows[1:], 1):
+            if len(cell_texts) < 2:
                 continue
-            cell_texts = [cell.get_text(strip=True) for cell in cells]
             if not cell_texts[0] or len(cell_texts[0]) < 2:
                 continue
             if any(header_word in cell_texts[0].lower() for header_word in ['name', 'spieler', 'rang', 'pos']):
@@ -346,7 +455,7 @@ def extract_players_from_statistik(soup, liga_id, league_name, season, endpoint)
                 'liga_id': str(liga_id),
                 'league_name': league_name,
                 'endpoint': endpoint,
-                'table_index': table_idx,
+                'table_index': table.index,
                 'row_index': row_idx,
                 'extracted_at': datetime.now().isoformat(),
                 'raw_data': cell_texts
@@ -356,40 +465,49 @@ def extract_players_from_statistik(soup, liga_id, league_name, season, endpoint)
             players.append(player)
     return players
 
+def statistik_endpoint_url(liga_id, season, endpoint):
+    return f'https://www.basketball-bund.net/statistik.do?reqCode={endpoint}&liga_id={liga_id}&saison_id={season}&_top=-1'
+
 def crawl_statistik_endpoint(session, liga_id, season, endpoint):
-    url = f'https://www.basketball-bund.net/statistik.do?reqCode={endpoint}&liga_id={liga_id}&saison_id={season}&_top=-1'
     try:
-        response = session.get(url, timeout=30)
-        if response.status_code != 200:
-            return []
-        soup = BeautifulSoup(response.text, 'html.parser')
-        return extract_players_from_statistik(soup, liga_id, '', season, endpoint)
+        response = session.get(statistik_endpoint_url(liga_id, season, endpoint), timeout=30)
+        return parse_statistik_response(response, liga_id, season, endpoint)
     except Exception as e:
         print(f"      💥 Error crawling {endpoint} for liga {liga_id}: {str(e)[:50]}")
         return []
 
+def parse_statistik_response(response, liga_id, season, endpoint):
+    if response.status_code != 200:
+        return []
+    return extract_players_from_statistik(response.text, liga_id, '', season, endpoint)
+
+def league_results_url(liga_id, season):
+    return f'https://www.basketball-bund.net/index.jsp?Action=108&liga_id={liga_id}&saison_id={season}&defaultview=1'
+
 def crawl_league_results(session, liga_id, league_name, season):
-    url = f'https://www.basketball-bund.net/index.jsp?Action=108&liga_id={liga_id}&saison_id={season}&defaultview=1'
     try:
-        response = session.get(url, timeout=30)
-        if response.status_code != 200:
-            return []
-        soup = BeautifulSoup(response.text, 'html.parser')
-        # Extract results table rows
-        tables = soup.find_all('table')
-        results = []
-        for table in tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                cell_texts = [cell.get_text(strip=True) for cell in cells]
-                if cell_texts:
-                    results.append(cell_texts)
-        return results
+        response = session.get(league_results_url(liga_id, season), timeout=30)
+        return parse_league_results_response(response, liga_id)
     except Exception as e:
         print(f"      💥 Error crawling results for liga {liga_id}: {str(e)[:50]}")
         return []
 
+def parse_league_results_response(response, liga_id):
+    if response.status_code != 200:
+        return []
+    soup = BeautifulSoup(response.text, 'html.parser')
+    # Extract results table rows
+    tables = soup.find_all('table')
+    results = []
+    for table in tables:
+        rows = table.find_all('tr')
+        for row in rows:
+            cells = row.find_all(['td', 'th'])
+            cell_texts = [cell.get_text(strip=True) for cell in cells]
+            if cell_texts:
+                results.append(cell_texts)
+    return results
+
 def save_season_players(season, players, liga_ids):
     """Save individual season data"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
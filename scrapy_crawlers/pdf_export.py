@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+PDF Table Export
+
+Renders large stat tables into PDFs without one giant reportlab Table:
+
+- rows are split into page-sized Table chunks; each chunk repeats the header
+  row (repeatRows) and shares one style and one set of column widths, so
+  reportlab never measures or splits a table with thousands of rows
+- cell texts are built from df.itertuples(), long values are shortened
+- optional column selection and sorting
+- PdfExportJobs runs exports in background threads with progress and hands
+  out a job id to poll and download the finished file; files live in
+  pdf_exports/ next to this module (or a given directory) and expire after
+  JOB_TTL_SECONDS
+"""
+
+import glob
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Fixed row heights: reportlab does not measure every cell, and chunks can be sized to fill a page
+HEADER_ROW_HEIGHT = 24
+ROW_HEIGHT = 14
+TITLE_BLOCK_HEIGHT = 80
+MAX_CELL_CHARS = 40
+LANDSCAPE_MIN_COLUMNS = 7
+SAMPLE_ROWS_FOR_WIDTHS = 200
+
+DEFAULT_EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdf_exports')
+JOB_TTL_SECONDS = 3600
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a237e')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+
+def _cell_text(value) -> str:
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    text = str(value)
+    if len(text) > MAX_CELL_CHARS:
+        return text[:MAX_CELL_CHARS - 1] + '…'
+    return text
+
+
+def prepare_table_frame(df: pd.DataFrame, columns: Optional[List[str]] = None,
+                        sort_by: Optional[str] = None, ascending: bool = False) -> pd.DataFrame:
+    """Select and sort the exported columns (unknown names are ignored)"""
+    if columns:
+        df = df[[column for column in columns if column in df.columns]]
+    if sort_by and sort_by in df.columns:
+        numeric = pd.to_numeric(df[sort_by], errors='coerce')
+        key = numeric if numeric.notna().any() else df[sort_by].astype(str)
+        order = key.reset_index(drop=True).sort_values(ascending=ascending, kind='stable', na_position='last').index
+        df = df.iloc[order]
+    return df
+
+
+def _column_widths(header: List[str], rows: List[tuple], available_width: float) -> List[float]:
+    """Widths proportional to the longest text of a sample, scaled to the page"""
+    lengths = [max(4, len(name)) for name in header]
+    for row in rows[:SAMPLE_ROWS_FOR_WIDTHS]:
+        for i, text in enumerate(row):
+            lengths[i] = max(lengths[i], len(text))
+    total = sum(lengths)
+    return [available_width * length / total for length in lengths]
+
+
+def build_pdf_table(df: pd.DataFrame, output_path: str, columns: Optional[List[str]] = None,
+                    sort_by: Optional[str] = None, ascending: bool = False,
+                    title: str = "Basketball Statistiken Export", rows_per_chunk: Optional[int] = None,
+                    progress: Optional[Callable[[float], None]] = None) -> str:
+    """
+    Write df as a chunked PDF table, one Table per page unless rows_per_chunk
+    is given. progress (if given) is called with the fraction done.
+    """
+    df = prepare_table_frame(df, columns, sort_by, ascending)
+    header = [str(column) for column in df.columns]
+    rows = [tuple(_cell_text(value) for value in row) for row in df.itertuples(index=False, name=None)]
+    if progress:
+        progress(0.25)
+
+    pagesize = landscape(A4) if len(header) >= LANDSCAPE_MIN_COLUMNS else A4
+    doc = SimpleDocTemplate(output_path, pagesize=pagesize,
+                            leftMargin=0.5 * inch, rightMargin=0.5 * inch)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#1a237e'),
+        alignment=TA_CENTER,
+        spaceAfter=20
+    )
+    story = [Paragraph(title, title_style), Spacer(1, 12)]
+
+    if header:
+        col_widths = _column_widths(header, rows, doc.width)
+        rows_per_page = rows_per_chunk or max(1, int((doc.height - HEADER_ROW_HEIGHT) // ROW_HEIGHT) - 1)
+        # The first page also holds the title
+        first_chunk = rows_per_chunk or max(1, rows_per_page - TITLE_BLOCK_HEIGHT // ROW_HEIGHT)
+        starts = [0] + list(range(first_chunk, len(rows), rows_per_page))
+        for start, end in zip(starts, starts[1:] + [len(rows)]):
+            chunk = rows[start:end]
+            table = Table([header] + chunk, colWidths=col_widths,
+                          rowHeights=[HEADER_ROW_HEIGHT] + [ROW_HEIGHT] * len(chunk), repeatRows=1)
+            table.setStyle(TABLE_STYLE)
+            story.append(table)
+        if progress:
+            progress(0.5)
+
+    if progress:
+        chunks = max(1, len(story))
+
+        def on_build_progress(kind, value):
+            if kind == 'PROGRESS':
+                progress(0.5 + 0.5 * min(1.0, value / chunks))
+        doc.setProgressCallBack(on_build_progress)
+
+    doc.build(story)
+    if progress:
+        progress(1.0)
+    return output_path
+
+
+class PdfExportJobs:
+    """Background PDF exports with progress, addressed by job id"""
+
+    def __init__(self, export_dir: str = DEFAULT_EXPORT_DIR, max_workers: int = 2):
+        # Created on the first submit, so importing the API does not touch the disk
+        self.export_dir = export_dir
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pdf-export')
+
+    def submit(self, players: List[Dict], filename: str = 'basketball_export', **options) -> str:
+        """Queue an export of players; options are passed to build_pdf_table"""
+        self._prune()
+        os.makedirs(self.export_dir, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'progress': 0.0,
+            'rows': len(players),
+            'filename': f"{filename}.pdf",
+            'path': os.path.join(self.export_dir, f"{job_id}.pdf"),
+            'error': None,
+            'created_at': time.time(),
+            'finished_at': None
+        }
+        with self.lock:
+            self.jobs[job_id] = job
+        self.executor.submit(self._run, job, players, options)
+        return job_id
+
+    def _update(self, job, **fields):
+        with self.lock:
+            job.update(fields)
+
+    def _run(self, job, players, options):
+        self._update(job, status='running')
+        started = time.monotonic()
+        try:
+            build_pdf_table(pd.DataFrame(players), job['path'],
+                            progress=lambda fraction: self._update(job, progress=round(fraction, 3)),
+                            **options)
+            self._update(job, status='done', progress=1.0, finished_at=time.time())
+            print(f"📄 PDF export {job['id']}: {job['rows']:,} rows in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            self._update(job, status='failed', error=str(e), finished_at=time.time())
+            print(f"💥 PDF export {job['id']} failed: {e}")
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        self._prune()
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {
+                'id': job['id'],
+                'status': job['status'],
+                'progress': job['progress'],
+                'rows': job['rows'],
+                'filename': job['filename'],
+                'error': job['error'],
+                'created_at': datetime.fromtimestamp(job['created_at']).isoformat()
+            }
+
+    def result_path(self, job_id: str) -> Optional[str]:
+        """Path of a finished export (None while running or if unknown)"""
+        self._prune()
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] != 'done':
+                return None
+            return job['path']
+
+    def _prune(self):
+        """
+        Forget finished jobs older than JOB_TTL_SECONDS and delete their files,
+        plus files of expired jobs from earlier runs
+        """
+        cutoff = time.time() - JOB_TTL_SECONDS
+        with self.lock:
+            expired = [job for job in self.jobs.values()
+                       if job['finished_at'] is not None and job['finished_at'] < cutoff]
+            for job in expired:
+                del self.jobs[job['id']]
+            known_paths = {job['path'] for job in self.jobs.values()}
+        paths = [job['path'] for job in expired]
+        for path in glob.glob(os.path.join(self.export_dir, '*.pdf')):
+            try:
+                if path not in known_paths and os.path.getmtime(path) < cutoff:
+                    paths.append(path)
+            except OSError:
+                pass
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Player Index
+
+In-memory indexes over the players of real_players_extracted.json, built once
+when the data is loaded, so the API endpoints stop scanning and re-sorting the
+full player list on every request:
+
+- name:              normalized (case-insensitive) name -> first matching player
+- team:              team -> players
+- (liga_id, season): league season -> players
+- endpoint:          statistik endpoint -> players
+- season:            season_id -> players
+- rank arrays:       players pre-sorted by a numeric stat (descending, stable),
+                     so top-N is a slice
+
+Index entries are positions into the player list; every lookup returns players
+in their original order.
+"""
+
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_RANK_STATS = ('points', 'average', 'games')
+
+
+def normalize_name(name) -> str:
+    return (name or '').strip().lower()
+
+
+def stat_value(player: Dict, stat: str) -> float:
+    """Numeric value of a stat; missing or malformed values count as 0"""
+    try:
+        return float(player.get(stat, 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _league_key(liga_id, season_id):
+    return (str(liga_id), str(season_id))
+
+
+class PlayerIndex:
+    """Hash, composite and rank indexes over a list of player dicts"""
+
+    def __init__(self, players: List[Dict], rank_stats: Iterable[str] = DEFAULT_RANK_STATS):
+        self.players = players
+        self._positions = {}
+        self._by_name = {}
+        self._by_team = {}
+        self._by_league = {}
+        self._by_endpoint = {}
+        self._by_season = {}
+        self._team_league_counts = Counter()
+        self._rank = {}
+        self._rank_values = {}
+
+        for position, player in enumerate(players):
+            self._positions[id(player)] = position
+            self._by_name.setdefault(normalize_name(player.get('name')), position)
+            team = player.get('team', '')
+            league_key = _league_key(player.get('liga_id'), player.get('season_id'))
+            self._by_team.setdefault(team, []).append(position)
+            self._by_league.setdefault(league_key, []).append(position)
+            self._by_endpoint.setdefault(player.get('endpoint'), []).append(position)
+            self._by_season.setdefault(league_key[1], []).append(position)
+            self._team_league_counts[(team,) + league_key] += 1
+
+        for stat in rank_stats:
+            self._build_rank(stat)
+
+    def __len__(self):
+        return len(self.players)
+
+    def _players(self, positions: List[int], limit: Optional[int] = None) -> List[Dict]:
+        if limit is not None:
+            positions = positions[:limit]
+        return [self.players[position] for position in positions]
+
+    def _build_rank(self, stat: str) -> List[int]:
+        values = [stat_value(player, stat) for player in self.players]
+        # Stable like sorted(..., reverse=True): ties keep their original order
+        order = sorted(range(len(values)), key=lambda position: -values[position])
+        self._rank[stat] = order
+        # Ascending negated values for bisect
+        self._rank_values[stat] = [-values[position] for position in order]
+        return order
+
+    def position_of(self, player: Dict) -> Optional[int]:
+        """Position of a player dict of this index (None for other dicts)"""
+        position = self._positions.get(id(player))
+        if position is not None and self.players[position] is player:
+            return position
+        return None
+
+    def find(self, name) -> Optional[Dict]:
+        """First player whose name matches case-insensitively"""
+        position = self._by_name.get(normalize_name(name))
+        return self.players[position] if position is not None else None
+
+    def by_team(self, team: str, limit: Optional[int] = None) -> List[Dict]:
+        return self._players(self._by_team.get(team, []), limit)
+
+    def by_league(self, liga_id, season_id, limit: Optional[int] = None) -> List[Dict]:
+        return self._players(self._by_league.get(_league_key(liga_id, season_id), []), limit)
+
+    def by_endpoint(self, endpoint: str, limit: Optional[int] = None) -> List[Dict]:
+        return self._players(self._by_endpoint.get(endpoint, []), limit)
+
+    def filter(self, team: Optional[str] = None, season_id=None, liga_id=None,
+               endpoint: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Players matching every given filter, in original order. The most
+        selective index narrows the candidates; the other filters are checked
+        per candidate.
+        """
+        candidates = []
+        if liga_id is not None and season_id is not None:
+            candidates.append(self._by_league.get(_league_key(liga_id, season_id), []))
+        if team is not None:
+            candidates.append(self._by_team.get(team, []))
+        if endpoint is not None:
+            candidates.append(self._by_endpoint.get(endpoint, []))
+        if season_id is not None:
+            candidates.append(self._by_season.get(str(season_id), []))
+        positions = min(candidates, key=len) if candidates else range(len(self.players))
+
+        for position in positions:
+            player = self.players[position]
+            if team is not None and player.get('team', '') != team:
+                continue
+            if season_id is not None and str(player.get('season_id')) != str(season_id):
+                continue
+            if liga_id is not None and str(player.get('liga_id')) != str(liga_id):
+                continue
+            if endpoint is not None and player.get('endpoint') != endpoint:
+                continue
+            yield player
+
+    def top(self, count: int, stat: str = 'points') -> List[Dict]:
+        """Top players by a stat, highest first"""
+        order = self._rank.get(stat)
+        if order is None:
+            order = self._build_rank(stat)
+        return self._players(order, max(0, count))
+
+    def count_at_least(self, value: float, stat: str = 'points') -> int:
+        """Number of players with stat >= value (binary search on the rank array)"""
+        if stat not in self._rank:
+            self._build_rank(stat)
+        return bisect_right(self._rank_values[stat], -value)
+
+    def teams(self) -> List[str]:
+        return list(self._by_team.keys())
+
+    def league_team_counts(self, liga_id, season_id) -> Dict[str, int]:
+        """Players per team in a league season"""
+        counts = {}
+        for position in self._by_league.get(_league_key(liga_id, season_id), []):
+            team = self.players[position].get('team', '')
+            counts[team] = counts.get(team, 0) + 1
+        return counts
+
+    @property
+    def team_league_count(self) -> int:
+        """Number of distinct (team, liga_id, season_id) combinations"""
+        return len(self._team_league_counts)
+
+    def players_of_teams_matching(self, text: str, limit: Optional[int] = None) -> List[Dict]:
+        """Players (in original order) of every team whose name contains text"""
+        text = text.lower()
+        positions = sorted(
+            position
+            for team, team_positions in self._by_team.items()
+            if text in (team or '').lower()
+            for position in team_positions
+        )
+        return self._players(positions, limit)
@@ -11,6 +11,11 @@ import time
 import csv
 from datetime import datetime
 
+from crawl_frontier import CrawlFrontier, DiscoveryError, DISCOVERY_ENDPOINT
+from http_response_cache import response_failure
+
+LEAGUE_ENDPOINT = 'teams'
+
 class MissingYearsRecovery:
     def __init__(self):
         self.session = requests.Session()
@@ -37,6 +42,9 @@ class MissingYearsRecovery:
         }
         
         self.all_players = []
+        
+        # Resumable work queue: finished seasons/leagues are not fetched again
+        self.frontier = CrawlFrontier('missing_years_recovery')
 
     def setup_session(self):
         """Setup session"""
@@ -48,7 +56,7 @@ class MissingYearsRecovery:
             return False
 
     def get_leagues_for_season(self, season_id, season_name):
-        """Get all leagues for a specific season"""
+        """Get all leagues for a specific season; DiscoveryError if a page fails or lists none"""
         print(f'\n🎯 RECOVERING SEASON {season_name} (ID: {season_id})')
         
         leagues = []
@@ -82,8 +90,7 @@ class MissingYearsRecovery:
                 })
                 
                 if response.status_code != 200:
-                    print(f'   ❌ HTTP {response.status_code}')
-                    break
+                    raise DiscoveryError(f'page {startrow//20 + 1}: HTTP {response.status_code}')
                 
                 soup = BeautifulSoup(response.text, 'html.parser')
                 
@@ -117,6 +124,10 @@ class MissingYearsRecovery:
                 print(f'   📄 Page {startrow//20 + 1}: Found {leagues_found_this_page} leagues')
                 
                 if leagues_found_this_page == 0:
+                    # Only the end of the list when earlier pages had leagues;
+                    # an empty first page is a soft failure (expired session, error page)
+                    if startrow == 0:
+                        raise DiscoveryError('no leagues on page 1')
                     break
                 
                 # Check for next page
@@ -126,9 +137,10 @@ class MissingYearsRecovery:
                 startrow += 20
                 time.sleep(0.5)  # Be nice to the server
                 
+            except DiscoveryError:
+                raise
             except Exception as e:
-                print(f'   💥 Error on page {startrow//20 + 1}: {str(e)[:100]}...')
-                break
+                raise DiscoveryError(f'page {startrow//20 + 1}: {str(e)[:100]}') from e
         
         print(f'   ✅ Total leagues found: {len(leagues)}')
         self.stats['leagues_found'] += len(leagues)
@@ -137,81 +149,122 @@ class MissingYearsRecovery:
     def get_teams_and_players(self, league):
         """Get teams and players for a league"""
         try:
-            # Get league page
-            league_url = f"https://www.basketball-bund.net/index.jsp?Action=100&Liga={league['id']}"
-            response = self.session.get(league_url)
-            
-            if response.status_code != 200:
-                return []
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            teams = []
-            
-            # Look for team links
-            team_links = soup.find_all('a', href=re.compile(r'Action=101.*Team=\d+'))
-            for link in team_links:
-                team_name = link.get_text(strip=True)
-                href = link.get('href', '')
-                
-                team_id_match = re.search(r'Team=(\d+)', href)
-                if team_id_match:
-                    team_id = team_id_match.group(1)
-                    teams.append({
-                        'id': team_id,
-                        'name': team_name,
-                        'league': league
-                    })
-            
-            print(f'     🏀 {league["name"]}: {len(teams)} teams')
-            self.stats['teams_found'] += len(teams)
-            
-            # Get players for each team
-            all_players = []
-            for team in teams:
-                players = self.get_players_for_team(team)
-                all_players.extend(players)
-                time.sleep(0.2)  # Rate limiting
-            
-            return all_players
-            
+            return self.fetch_teams_and_players(league)
         except Exception as e:
             print(f'     💥 League error: {str(e)[:50]}...')
             return []
 
-    def get_players_for_team(self, team):
-        """Get players for a specific team"""
-        try:
-            team_url = f"https://www.basketball-bund.net/index.jsp?Action=101&Liga={team['league']['id']}&Team={team['id']}"
-            response = self.session.get(team_url)
-            
-            if response.status_code != 200:
-                return []
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            players = []
-            
-            # Look for player links
-            player_links = soup.find_all('a', href=re.compile(r'Action=102.*Person=\d+'))
-            for link in player_links:
-                player_name = link.get_text(strip=True)
-                href = link.get('href', '')
-                
-                person_id_match = re.search(r'Person=(\d+)', href)
-                if person_id_match:
-                    person_id = person_id_match.group(1)
-                    players.append({
-                        'id': person_id,
-                        'name': player_name,
-                        'team': team['name'],
-                        'league': team['league']['name'],
-                        'season': team['league']['season_name'],
-                        'season_id': team['league']['season_id']
-                    })
+    def fetch_teams_and_players(self, league):
+        """Get teams and players for a league, raising on errors so the frontier can retry"""
+        # Get league page
+        league_url = f"https://www.basketball-bund.net/index.jsp?Action=100&Liga={league['id']}"
+        response = self.session.get(league_url)
+        
+        failure = response_failure(response)
+        if failure:
+            raise RuntimeError(failure)
+        
+        soup = BeautifulSoup(response.text, 'html.parser')
+        teams = []
+        
+        # Look for team links
+        team_links = soup.find_all('a', href=re.compile(r'Action=101.*Team=\d+'))
+        for link in team_links:
+            team_name = link.get_text(strip=True)
+            href = link.get('href', '')
             
-            return players
+            team_id_match = re.search(r'Team=(\d+)', href)
+            if team_id_match:
+                team_id = team_id_match.group(1)
+                teams.append({
+                    'id': team_id,
+                    'name': team_name,
+                    'league': league
+                })
+        
+        print(f'     🏀 {league["name"]}: {len(teams)} teams')
+        self.stats['teams_found'] += len(teams)
+        
+        # Get players for each team
+        all_players = []
+        for team in teams:
+            players = self.get_players_for_team(team)
+            all_players.extend(players)
+            time.sleep(0.2)  # Rate limiting
+        
+        return all_players
+
+    def get_players_for_team(self, team):
+        """Get players for a specific team (raises on a failed page, so the league is retried)"""
+        team_url = f"https://www.basketball-bund.net/index.jsp?Action=101&Liga={team['league']['id']}&Team={team['id']}"
+        response = self.session.get(team_url)
+        
+        failure = response_failure(response)
+        if failure:
+            raise RuntimeError(f"team {team['id']}: {failure}")
+        
+        soup = BeautifulSoup(response.text, 'html.parser')
+        players = []
+        
+        # Look for player links
+        player_links = soup.find_all('a', href=re.compile(r'Action=102.*Person=\d+'))
+        for link in player_links:
+            player_name = link.get_text(strip=True)
+            href = link.get('href', '')
             
-        except Exception as e:
+            person_id_match = re.search(r'Person=(\d+)', href)
+            if person_id_match:
+                person_id = person_id_match.group(1)
+                players.append({
+                    'id': person_id,
+                    'name': player_name,
+                    'team': team['name'],
+                    'league': team['league']['name'],
+                    'season': team['league']['season_name'],
+                    'season_id': team['league']['season_id']
+                })
+        
+        return players
+
+    def discover_leagues(self, season_id, season_name):
+        """League list of a season, fetched once and kept in the frontier"""
+        if self.frontier.is_done(season_id, DISCOVERY_ENDPOINT):
+            leagues = self.frontier.result(season_id, DISCOVERY_ENDPOINT)
+            print(f'\n♻️ Season {season_name}: {len(leagues)} leagues already discovered')
+            return leagues
+        
+        item = self.frontier.claim_key(season_id, DISCOVERY_ENDPOINT)
+        if item is None:
+            return None
+        
+        try:
+            leagues = self.get_leagues_for_season(season_id, season_name)
+        except DiscoveryError as e:
+            # Not completed: the next run discovers the season again
+            print(f'   💥 League list incomplete: {e}')
+            self.frontier.fail(item, e)
             return []
+        except Exception as e:
+            self.frontier.fail(item, e)
+            raise
+        self.frontier.add_many((season_id, league['id'], LEAGUE_ENDPOINT, league) for league in leagues)
+        self.frontier.complete(item, leagues)
+        return leagues
+
+    def drain_leagues(self, season_id):
+        """Claim pending leagues of a season one at a time until none are left"""
+        while True:
+            items = self.frontier.claim(1, season=season_id, endpoint=LEAGUE_ENDPOINT)
+            if not items:
+                return
+            item = items[0]
+            try:
+                players = self.fetch_teams_and_players(item.payload)
+            except Exception as e:
+                print(f'     💥 League error: {str(e)[:50]}...')
+                self.frontier.fail(item, e)
+                continue
+            self.frontier.complete(item, players)
 
     def recover_missing_years(self):
         """Recover all missing years"""
@@ -223,15 +276,24 @@ class MissingYearsRecovery:
             return
         
         for season_id, season_name in self.missing_seasons:
-            leagues = self.get_leagues_for_season(season_id, season_name)
-            
-            for league in leagues:
-                players = self.get_teams_and_players(league)
-                self.all_players.extend(players)
+            leagues = self.discover_leagues(season_id, season_name)
+            if leagues is None:
+                print(f'   ⏭️ Season {season_name} is being discovered by another worker')
+                continue
             
+            self.drain_leagues(season_id)
             self.stats['seasons_processed'] += 1
             time.sleep(1)  # Rest between seasons
         
+        # Everything recovered so far, including earlier (interrupted) runs
+        season_ids = {str(season_id) for season_id, _ in self.missing_seasons}
+        self.all_players = [
+            player
+            for item, players in self.frontier.results(endpoint=LEAGUE_ENDPOINT)
+            if item.season in season_ids
+            for player in players
+        ]
+        
         self.stats['players_found'] = len(self.all_players)
         
         # Save results
@@ -269,4 +331,8 @@ class MissingYearsRecovery:
 
 if __name__ == "__main__":
     recovery = MissingYearsRecovery()
-    recovery.recover_missing_years()
+    try:
+        recovery.recover_missing_years()
+    except KeyboardInterrupt:
+        recovery.frontier.release()
+        print('\n⚠️ Interrupted - run again to resume from the crawl frontier')
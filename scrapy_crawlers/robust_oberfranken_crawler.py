@@ -15,9 +15,12 @@ import csv
 from datetime import datetime
 import logging
 
+from async_fetch_engine import FetchRequest, fetch_all
+from http_response_cache import CachedSession
+
 class RobustOberfrankenCrawler:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, concurrent_leagues=4, requests_per_second=3.0):
+        self.session = CachedSession()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36'
         })
@@ -47,6 +50,10 @@ class RobustOberfrankenCrawler:
             if name in ['__cmpconsentx47082', '__cmpcccx47082', '_cc_id', 'panoramaId_expiry', 'panoramaId', 'panoramaIdType', '__gads', '__gpi', '__eoi', 'cto_bundle']:
                 self.session.cookies.set(name, value, domain='.basketball-bund.net')
         
+        # Load budget for concurrent league fetches
+        self.concurrent_leagues = concurrent_leagues
+        self.requests_per_second = requests_per_second
+        
         # Anomaly detection thresholds
         self.anomalies = []
         self.thresholds = {
@@ -332,18 +339,50 @@ class RobustOberfrankenCrawler:
                 return int(match.group(1))
         return None
     
+    def statistik_url(self, league):
+        """Top scorer archive URL for a league"""
+        return f"https://www.basketball-bund.net/statistik.do?reqCode=statBesteWerferArchiv&liga_id={league['id']}&saison_id={league['season']}&_top=-1"
+    
     def crawl_players_for_league(self, league):
         """Crawl players with anomaly detection"""
+        self.logger.info(f"🔍 Crawling players: Liga {league['id']} ({league['full_name']}) - Season {league['season']}")
+        
+        try:
+            response = self.session.get(self.statistik_url(league))
+        except Exception as e:
+            self.flag_anomaly('CRITICAL', f"Error crawling players for liga {league['id']}: {e}")
+            return []
+        
+        return self.process_player_response(response, league)
+    
+    def crawl_players_for_leagues(self, leagues):
+        """Fetch several leagues concurrently, then run the anomaly checks in order"""
+        self.logger.info(f"🚀 Fetching {len(leagues)} leagues ({self.concurrent_leagues} at once)")
+        
+        responses = fetch_all(
+            [FetchRequest(self.statistik_url(league)) for league in leagues],
+            session=self.session,
+            max_per_host=self.concurrent_leagues,
+            requests_per_second=self.requests_per_second,
+            logger=self.logger,
+        )
+        
+        results = []
+        for league, response in zip(leagues, responses):
+            if response.error and not response.status_code:
+                self.flag_anomaly('CRITICAL', f"Error crawling players for liga {league['id']}: {response.error}")
+                results.append([])
+                continue
+            results.append(self.process_player_response(response, league))
+        return results
+    
+    def process_player_response(self, response, league):
+        """Validate, store and parse a statistik response"""
         liga_id = league['id']
         season = league['season'] 
         full_name = league['full_name']
         
-        self.logger.info(f"🔍 Crawling players: Liga {liga_id} ({full_name}) - Season {season}")
-        
         try:
-            statistik_url = f"https://www.basketball-bund.net/statistik.do?reqCode=statBesteWerferArchiv&liga_id={liga_id}&saison_id={season}&_top=-1"
-            
-            response = self.session.get(statistik_url)
             self.logger.info(f"Player request status: {response.status_code}, size: {len(response.text)}")
             
             if response.status_code != 200:
@@ -470,12 +509,8 @@ class RobustOberfrankenCrawler:
         all_players = []
         test_leagues = leagues[:3]  # Test first 3 leagues
         
-        for league in test_leagues:
-            players = self.crawl_players_for_league(league)
+        for players in self.crawl_players_for_leagues(test_leagues):
             all_players.extend(players)
-            
-            # Small delay
-            time.sleep(1)
         
         # Save results with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
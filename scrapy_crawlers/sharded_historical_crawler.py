@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Sharded Historical Crawler
+
+Runs the paginated historical crawl (Action=106 league lists, statistik and
+Action=107/108 pages) in a pool of worker processes instead of one process
+that parses on the fetching thread and sleeps between seasons.
+
+- Season discovery runs first, in the parent process, one season after the
+  other on one session: Action=106 paging depends on server-side session
+  state, so league lists are never fetched in parallel.
+- The season x liga_id x endpoint items are then drained by all shards from
+  the shared crawl frontier, so a shard that finishes early takes over work
+  of slower ones instead of idling.
+- Every shard has its own session and a share of the total concurrency and
+  rate budget (never more shards than concurrent requests), and parses its
+  pages in its own process.
+- When all shards are done, the parent process merges the stored results in
+  a fixed order (season, discovery order of the leagues, endpoint order) into
+  the usual paginated_season_* / paginated_historical_comprehensive_* files
+  and real_players_extracted.json.
+
+Usage:
+    python sharded_historical_crawler.py --shards 4 --requests-per-second 3
+"""
+
+import argparse
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from crawl_frontier import CrawlFrontier, DISCOVERY_ENDPOINT
+from paginated_historical_crawler import (
+    CONCURRENT_REQUESTS, REQUESTS_PER_SECOND, LEAGUE_ENDPOINTS,
+    assemble_season_results, create_session_with_cookies, discover_liga_ids,
+    fetch_frontier_items, save_comprehensive_players, save_season_players,
+    update_frontend_data
+)
+
+CRAWLER_NAME = 'paginated_historical'
+DEFAULT_SHARDS = 4
+DEFAULT_SEASONS = list(range(2003, 2025))
+IDLE_POLL_SECONDS = 2
+
+
+def discover_seasons(seasons):
+    """
+    League lists of all seasons, fetched serially on one session before the
+    shards start; a failed discovery is retried up to the frontier's attempt
+    limit. Returns the number of leagues per discovered season.
+    """
+    session = create_session_with_cookies()
+    frontier = CrawlFrontier(CRAWLER_NAME)
+    discovered = {}
+    try:
+        for season in seasons:
+            liga_ids = None
+            for _ in range(frontier.max_attempts):
+                try:
+                    liga_ids = discover_liga_ids(session, season, frontier)
+                except Exception as e:
+                    print(f"  💥 Discovery of season {season} failed: {e}")
+                    liga_ids = []
+                # Done, failed for good, or being discovered by another process
+                if liga_ids or liga_ids is None or frontier.is_done(season, DISCOVERY_ENDPOINT):
+                    break
+            if not liga_ids:
+                continue
+            frontier.add_many(
+                (season, liga_info['liga_id'], endpoint, liga_info)
+                for liga_info in liga_ids
+                for endpoint in LEAGUE_ENDPOINTS
+            )
+            discovered[season] = len(liga_ids)
+    finally:
+        frontier.close()
+    return discovered
+
+
+def run_shard(shard_index, seasons, concurrent_requests, requests_per_second):
+    """Worker process: drain the league pages of the discovered seasons from the frontier"""
+    started = time.monotonic()
+    session = create_session_with_cookies()
+    # host:pid:label, so a restarted crawl on this host can reclaim a crashed shard's items
+    frontier = CrawlFrontier(CRAWLER_NAME, worker_id=f"{socket.gethostname()}:{os.getpid()}:shard{shard_index}")
+    summary = {
+        'shard': shard_index,
+        'items_done': 0,
+        'items_failed': 0,
+        'batches': 0,
+    }
+
+    try:
+        while True:
+            items = frontier.claim(concurrent_requests * 5, season=seasons, endpoint=LEAGUE_ENDPOINTS)
+            if items:
+                done = fetch_frontier_items(session, frontier, items, concurrent_requests, requests_per_second)
+                summary['items_done'] += done
+                summary['items_failed'] += len(items) - done
+                summary['batches'] += 1
+                continue
+
+            # Nothing claimable: wait for items held by other shards (retried when they fail)
+            if frontier.is_drained(seasons, LEAGUE_ENDPOINTS):
+                break
+            time.sleep(IDLE_POLL_SECONDS)
+    finally:
+        frontier.close()
+
+    summary['elapsed'] = time.monotonic() - started
+    return summary
+
+
+def merge_results(seasons):
+    """Deterministically merge the frontier results of all shards into the usual output files"""
+    frontier = CrawlFrontier(CRAWLER_NAME, worker_id='merge')
+    all_players = []
+    season_summary = {}
+
+    for season in sorted(seasons):
+        liga_ids = frontier.result(season, DISCOVERY_ENDPOINT)
+        if not liga_ids:
+            continue
+        season_results = assemble_season_results(frontier, liga_ids, season, verbose=False)
+        if not season_results:
+            continue
+        all_players.extend(season_results)
+        season_summary[season] = {
+            'total_leagues': len(liga_ids),
+            'leagues': [liga['name'] for liga in liga_ids]
+        }
+        save_season_players(season, season_results, liga_ids)
+
+    failed = frontier.counts(seasons, LEAGUE_ENDPOINTS)['failed']
+    frontier.close()
+
+    if all_players:
+        save_comprehensive_players(all_players, season_summary)
+        update_frontend_data(all_players, list(season_summary.keys()))
+    return all_players, season_summary, failed
+
+
+def print_shard_summary(summaries):
+    print(f"\n📊 SHARD SUMMARY")
+    print(f"{'Shard':>5} {'Done':>7} {'Failed':>7} {'Batches':>8} {'Time':>8}")
+    for summary in sorted(summaries, key=lambda s: s['shard']):
+        print(f"{summary['shard']:>5} {summary['items_done']:>7} {summary['items_failed']:>7} "
+              f"{summary['batches']:>8} {summary['elapsed']:>7.1f}s")
+
+
+def crawl_historical_sharded(seasons=None, num_shards=DEFAULT_SHARDS,
+                             concurrent_requests=CONCURRENT_REQUESTS,
+                             requests_per_second=REQUESTS_PER_SECOND):
+    """
+    Crawl seasons with num_shards worker processes. concurrent_requests and
+    requests_per_second are the total budget, split evenly across shards.
+    """
+    seasons = list(seasons or DEFAULT_SEASONS)
+    # At least one request per shard, so the shards together stay within the budget
+    concurrent_requests = max(1, concurrent_requests)
+    num_shards = max(1, min(num_shards, len(seasons), concurrent_requests))
+    shard_concurrency = concurrent_requests // num_shards
+    shard_rate = requests_per_second / num_shards
+
+    print("🏀 SHARDED HISTORICAL CRAWLER")
+    print(f"Seasons: {seasons[0]}-{seasons[-1]} ({len(seasons)})")
+    print(f"Shards: {num_shards} × ({shard_concurrency} concurrent, {shard_rate:.2f}/s)")
+
+    start_time = datetime.now()
+    print(f"\n🔍 Discovering league lists (serially, one session)...")
+    discovered = discover_seasons(seasons)
+    print(f"  ✅ {sum(discovered.values())} leagues in {len(discovered)} seasons")
+
+    with ProcessPoolExecutor(max_workers=num_shards) as pool:
+        futures = [
+            pool.submit(run_shard, shard_index, seasons, shard_concurrency, shard_rate)
+            for shard_index in range(num_shards)
+        ]
+        summaries = []
+        for future in futures:
+            try:
+                summaries.append(future.result())
+            except Exception as e:
+                print(f"💥 Shard failed: {e}")
+
+    print_shard_summary(summaries)
+
+    print(f"\n🔀 Merging shard results...")
+    all_players, season_summary, failed = merge_results(seasons)
+
+    print(f"\n🎯 SHARDED CRAWL COMPLETE!")
+    print(f"📊 Total leagues: {len(all_players)}")
+    print(f"📅 Seasons: {list(season_summary.keys())}")
+    if failed:
+        print(f"⚠️  {failed} pages failed after retries (see crawl_frontier.last_error)")
+    print(f"⏱️  Total time: {(datetime.now() - start_time).total_seconds():.1f}s")
+    return all_players
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded historical basketball-bund.net crawl')
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS, help='Number of worker processes')
+    parser.add_argument('--start', type=int, default=DEFAULT_SEASONS[0], help='First season')
+    parser.add_argument('--end', type=int, default=DEFAULT_SEASONS[-1], help='Last season')
+    parser.add_argument('--concurrent-requests', type=int, default=CONCURRENT_REQUESTS,
+                        help='Total concurrent requests across all shards')
+    parser.add_argument('--requests-per-second', type=float, default=REQUESTS_PER_SECOND,
+                        help='Total request rate across all shards')
+    args = parser.parse_args()
+
+    crawl_historical_sharded(
+        seasons=range(args.start, args.end + 1),
+        num_shards=args.shards,
+        concurrent_requests=args.concurrent_requests,
+        requests_per_second=args.requests_per_second
+    )
+
+
+if __name__ == "__main__":
+    main()
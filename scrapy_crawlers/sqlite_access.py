@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+SQLite Access Layer
+
+Shared read-only database access for the Flask APIs, instead of a fresh
+sqlite3.connect per request:
+
+- a bounded pool of read-only connections (URI mode=ro, query_only) with
+  mmap_size / cache_size pragmas, checked out per query or per streamed
+  response and returned afterwards; the connections outlive the request
+  threads of the dev server (a new thread per request), so pragmas run once
+  per connection and the statement cache is reused. The database is switched
+  to WAL once so readers do not block the crawlers and builders writing to it
+- a replaced database file (e.g. a rebuild) is noticed on checkout and the
+  pooled connection is reopened
+- query helpers (rows, one, scalar) run through the connection's statement
+  cache, so repeated queries are prepared once per connection
+- TTLCache keeps small results such as the overview counters for a few seconds
+- data_version() changes with every commit to the file; VersionedCache keeps
+  results (e.g. match counts per filter set) until it does
+- LatencyHistogram records the request latency per route
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 64 * 1024
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_MS = 5000
+# Connections per database; a request waits up to POOL_TIMEOUT_S for a free one
+POOL_SIZE = 8
+POOL_TIMEOUT_S = 30
+
+# Upper bounds in milliseconds; the last bucket takes everything slower
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def enable_wal(path: str) -> Optional[str]:
+    """Switch an existing database to WAL (persistent); returns the journal mode"""
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+        try:
+            return conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        # Read-only file system or locked: readers still work, just without WAL
+        print(f"⚠️  Could not enable WAL for {path}: {e}")
+        return None
+
+
+class ReadOnlyDatabase:
+    """Bounded pool of read-only connections to one SQLite file"""
+
+    def __init__(self, path: str, mmap_size: int = MMAP_SIZE, cache_size_kib: int = CACHE_SIZE_KIB,
+                 pool_size: int = POOL_SIZE):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.pool_size = pool_size
+        # Idle connections, most recently used first, and the file stamp each was opened on
+        self._idle = queue.LifoQueue()
+        self._stamps = {}
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._wal_checked = False
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_dev
+
+    def _open(self) -> sqlite3.Connection:
+        if not self._wal_checked:
+            enable_wal(self.path)
+            self._wal_checked = True
+        uri = f"file:{os.path.abspath(self.path)}?mode=ro"
+        # Used by one thread at a time, but not always by the one that opened it
+        conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_MS / 1000,
+                               cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        conn.execute('PRAGMA query_only=1')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kib)}')
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Check a connection out of the pool (reopened if the file was replaced);
+        hand it back with release()
+        """
+        if not self._slots.acquire(timeout=POOL_TIMEOUT_S):
+            raise sqlite3.OperationalError(f"No free connection to {self.path} after {POOL_TIMEOUT_S}s")
+        try:
+            # Raises FileNotFoundError for a missing database instead of creating an empty one
+            stamp = self._file_stamp()
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+            if conn is not None and self._stamps.get(conn) != stamp:
+                self._stamps.pop(conn, None)
+                conn.close()
+                conn = None
+            if conn is None:
+                conn = self._open()
+                self._stamps[conn] = stamp
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """A pooled connection for the duration of the with block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def data_version(self):
+        """
+        Stamp that changes whenever the database is written (committed pages
+        land in the -wal file or, without WAL, in the database file) or replaced
+        """
+        stamps = []
+        for path in (self.path, self.path + '-wal'):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stamps.append(None)
+                continue
+            stamps.append((stat.st_ino, stat.st_dev, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
+
+    def rows(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def one(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def scalar(self, sql: str, params: Sequence = (), default: Any = None) -> Any:
+        row = self.one(sql, params)
+        return default if row is None else row[0]
+
+    def close(self):
+        """Close the idle connections"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._stamps.pop(conn, None)
+            conn.close()
+
+
+class TTLCache:
+    """Small result cache; entries expire ttl_seconds after they were computed"""
+
+    def __init__(self, ttl_seconds: float = 30.0):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self._entries = {}
+
+    def get_or_compute(self, key, compute: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        with self.lock:
+            # Another thread may have refreshed it while we waited
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            value = compute()
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            return value
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class VersionedCache:
+    """Results kept until the data version changes; at most max_entries keys"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.version = None
+        self._entries = {}
+
+    def get_or_compute(self, version, key, compute: Callable[[], Any]) -> Any:
+        with self.lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            if key in self._entries:
+                return self._entries[key]
+            value = compute()
+            if len(self._entries) >= self.max_entries:
+                # Drop the oldest entry (dicts keep insertion order)
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = value
+            return value
+
+    def invalidate(self):
+        with self.lock:
+            self._entries.clear()
+            self.version = None
+
+
+class LatencyHistogram:
+    """Request latency per route in fixed millisecond buckets"""
+
+    def __init__(self, buckets_ms: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, route: str, seconds: float):
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(self.buckets_ms) if ms <= bound), len(self.buckets_ms))
+        with self.lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = {
+                    'counts': [0] * (len(self.buckets_ms) + 1),
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0
+                }
+            stats['counts'][index] += 1
+            stats['count'] += 1
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+
+    def _percentile(self, counts: List[int], total: int, fraction: float) -> str:
+        # Upper bound of the bucket holding the percentile
+        target = fraction * total
+        seen = 0
+        for bound, count in zip(self.buckets_ms, counts):
+            seen += count
+            if seen >= target:
+                return f"<={bound}ms"
+        return f">{self.buckets_ms[-1]}ms"
+
+    def snapshot(self) -> Dict[str, Dict]:
+        labels = [f"<={bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        with self.lock:
+            routes = {route: dict(stats, counts=list(stats['counts'])) for route, stats in self.routes.items()}
+        return {
+            route: {
+                'count': stats['count'],
+                'avg_ms': round(stats['total_ms'] / stats['count'], 2),
+                'max_ms': round(stats['max_ms'], 2),
+                'p50': self._percentile(stats['counts'], stats['count'], 0.5),
+                'p95': self._percentile(stats['counts'], stats['count'], 0.95),
+                # A list keeps the bucket order through JSON serialization
+                'buckets': [[label, count] for label, count in zip(labels, stats['counts'])]
+            }
+            for route, stats in sorted(routes.items())
+        }
+
+    def install(self, app):
+        """Time every request of a Flask app by its route rule"""
+        from flask import g, request
+
+        @app.before_request
+        def _start_timer():
+            g._latency_started = time.perf_counter()
+
+        @app.after_request
+        def _record_latency(response):
+            started = g.pop('_latency_started', None)
+            if started is not None:
+                route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+                self.observe(f"{request.method} {route}", time.perf_counter() - started)
+            return response
+
+        return self
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Custom Stat Formulas
+
+Compiles the user formulas of /api/players/custom-stat once and evaluates them
+as one NumPy expression over all players, instead of string-replacing and
+eval()-ing the formula again for every player.
+
+- the formula is parsed into an AST and checked against a whitelist
+  (arithmetic, single comparisons, numbers, the known variables and math.*
+  functions); anything else raises FormulaError. Numbers are floats, so
+  constant-only parts cannot turn into unbounded integer arithmetic
+- the shortcuts PPG, FG%, FT% and 3P% are expanded before parsing
+- compiled formulas are kept in an LRU cache keyed by the formula text
+- rank_values() returns the top N with a partial sort
+"""
+
+import ast
+import math
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+# Formula variable -> (player fields to read, in order; default)
+VARIABLES = {
+    'points': (('punkte', 'points'), 0),
+    'games': (('spiele', 'games'), 1),
+    'fg': (('field_goals',), 0),
+    'fga': (('field_goal_attempts',), 1),
+    'ft': (('freiwuerfe',), 0),
+    'fta': (('freiwurf_versuche',), 1),
+    'three': (('dreier',), 0),
+    'threea': (('dreier_versuche',), 1),
+}
+
+SHORTCUTS = [
+    ('PPG', '(points/games)'),
+    ('FG%', '(fg/fga)*100'),
+    ('FT%', '(ft/fta)*100'),
+    ('3P%', '(three/threea)*100'),
+]
+
+# math.* function -> (NumPy ufunc, number of arguments). Formulas call them
+# through wrappers with exactly these positional arguments, so an extra
+# argument can never reach the ufunc as its `out` array
+MATH_FUNCTIONS = {
+    'sqrt': (np.sqrt, 1),
+    'log': (np.log, 1),
+    'log10': (np.log10, 1),
+    'exp': (np.exp, 1),
+    'floor': (np.floor, 1),
+    'ceil': (np.ceil, 1),
+    'fabs': (np.fabs, 1),
+    'pow': (np.power, 2),
+}
+MATH_CONSTANTS = {'pi': math.pi, 'e': math.e}
+
+ALLOWED_OPERATORS = (
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UAdd, ast.USub,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+MAX_FORMULA_LENGTH = 500
+FORMULA_CACHE_SIZE = 128
+
+
+
+def _math_wrapper(ufunc, arity):
+    if arity == 1:
+        return lambda x: ufunc(x)
+    return lambda x, y: ufunc(x, y)
+
+
+_NUMPY_MATH = SimpleNamespace(
+    **{name: _math_wrapper(ufunc, arity) for name, (ufunc, arity) in MATH_FUNCTIONS.items()},
+    **MATH_CONSTANTS
+)
+
+
+class FormulaError(ValueError):
+    """Formula that cannot be parsed or uses something outside the whitelist"""
+
+
+def expand_shortcuts(formula: str) -> str:
+    for shortcut, expression in SHORTCUTS:
+        formula = formula.replace(shortcut, expression)
+    return formula
+
+
+class _FormulaValidator(ast.NodeVisitor):
+    def __init__(self):
+        self.variables = set()
+
+    def generic_visit(self, node):
+        raise FormulaError(f"Unsupported syntax: {type(node).__name__}")
+
+    def visit_Expression(self, node):
+        self.visit(node.body)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise FormulaError(f"Unsupported constant: {node.value!r}")
+        # Evaluated as floats: 9**9**9 overflows at once instead of building a huge int
+        node.value = float(node.value)
+
+    def visit_Name(self, node):
+        if node.id not in VARIABLES:
+            raise FormulaError(f"Unknown variable '{node.id}' (allowed: {', '.join(VARIABLES)})")
+        self.variables.add(node.id)
+
+    def visit_BinOp(self, node):
+        self._check_operator(node.op)
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_UnaryOp(self, node):
+        self._check_operator(node.op)
+        self.visit(node.operand)
+
+    def visit_Compare(self, node):
+        if len(node.ops) != 1:
+            raise FormulaError("Chained comparisons are not supported")
+        self._check_operator(node.ops[0])
+        self.visit(node.left)
+        self.visit(node.comparators[0])
+
+    def visit_Attribute(self, node):
+        # math.pi / math.e
+        if not (isinstance(node.value, ast.Name) and node.value.id == 'math' and node.attr in MATH_CONSTANTS):
+            raise FormulaError(f"Unsupported attribute: {ast.unparse(node)}")
+
+    def visit_Call(self, node):
+        func = node.func
+        if not (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name)
+                and func.value.id == 'math' and func.attr in MATH_FUNCTIONS):
+            raise FormulaError(f"Unsupported function: {ast.unparse(func)} "
+                               f"(allowed: {', '.join('math.' + name for name in MATH_FUNCTIONS)})")
+        if node.keywords:
+            raise FormulaError("Keyword arguments are not supported")
+        arity = MATH_FUNCTIONS[func.attr][1]
+        if len(node.args) != arity:
+            raise FormulaError(f"math.{func.attr}() takes {arity} argument{'s' if arity > 1 else ''}, "
+                               f"got {len(node.args)}")
+        for arg in node.args:
+            self.visit(arg)
+
+    def _check_operator(self, op):
+        if not isinstance(op, ALLOWED_OPERATORS):
+            raise FormulaError(f"Unsupported operator: {type(op).__name__}")
+
+
+class CompiledFormula:
+    """A validated formula, evaluated over arrays of all players at once"""
+
+    def __init__(self, formula: str):
+        self.formula = formula
+        self.expression = expand_shortcuts(formula)
+        if len(self.expression) > MAX_FORMULA_LENGTH:
+            raise FormulaError(f"Formula is longer than {MAX_FORMULA_LENGTH} characters")
+        try:
+            tree = ast.parse(self.expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise FormulaError(f"Invalid formula: {e.msg}") from None
+
+        validator = _FormulaValidator()
+        validator.visit(tree)
+        self.variables = sorted(validator.variables)
+        self._code = compile(tree, '<formula>', 'eval')
+
+    def evaluate(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+        """
+        Values for every player, rounded to 2 decimals. Players whose value is
+        not finite (e.g. division by zero) get 0, as the per-player eval did.
+        """
+        namespace = {name: inputs[name] for name in self.variables}
+        namespace['math'] = _NUMPY_MATH
+        with np.errstate(all='ignore'):
+            try:
+                values = eval(self._code, {'__builtins__': {}}, namespace)
+                values = np.broadcast_to(np.asarray(values, dtype=float), (size,))
+            except (ArithmeticError, ValueError):
+                return np.zeros(size)  # only possible for formulas without variables
+        return np.round(np.where(np.isfinite(values), values, 0.0), 2)
+
+    def evaluate_player(self, player: Dict) -> float:
+        return float(self.evaluate(formula_inputs([player]), 1)[0])
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def compile_formula(formula: str) -> CompiledFormula:
+    """Compiled formula, cached by formula text"""
+    return CompiledFormula(formula)
+
+
+def _float_or_default(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def formula_inputs(players: List[Dict]) -> Dict[str, np.ndarray]:
+    """One read-only float array per formula variable over all players"""
+    inputs = {}
+    for name, (fields, default) in VARIABLES.items():
+        values = []
+        for player in players:
+            value = default
+            for field in fields:
+                if field in player:
+                    value = player[field]
+                    break
+            values.append(_float_or_default(value, default))
+        inputs[name] = np.array(values, dtype=float)
+        # Shared by all formula evaluations of a data snapshot
+        inputs[name].flags.writeable = False
+    return inputs
+
+
+def rank_values(values: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Positions of the `limit` highest values, highest first; ties keep their
+    original order. Only the candidates around the cut are fully sorted.
+    """
+    size = len(values)
+    limit = max(0, min(limit, size))
+    if limit == 0:
+        return np.array([], dtype=int)
+    if limit < size:
+        cutoff = np.partition(values, size - limit)[size - limit]
+        candidates = np.flatnonzero(values >= cutoff)
+    else:
+        candidates = np.arange(size)
+    order = candidates[np.lexsort((candidates, -values[candidates]))]
+    return order[:limit]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Statistik Parser
+
+Shared lxml-based parser for the statistik.do player tables
+(statBesteWerferArchiv, statBesteFreiWerferArchiv, statBeste3erWerferArchiv).
+
+The crawlers used to build a BeautifulSoup(html.parser) tree per page, walk
+every table/tr/td and re-join the cell texts for each check. This module
+parses a page once with lxml, targets rows with precompiled XPath
+expressions and computes each cell text only once. Cell texts follow
+BeautifulSoup's get_text(strip=True), so the crawlers' row filters give the
+same results as before.
+
+- parse_tables()      every table as rows of cell texts (generic walk)
+- parse_result_rows() the sportItem result rows as typed PlayerStatRow tuples
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from lxml import etree
+from lxml import html as lxml_html
+
+
+STATISTIK_ENDPOINTS = ('statBesteWerferArchiv', 'statBesteFreiWerferArchiv', 'statBeste3erWerferArchiv')
+
+# Rows of the result table: a td with a sportItemOdd/sportItemEven class
+RESULT_ROWS_XPATH = etree.XPath(
+    "//tr[.//td[contains(concat(' ', normalize-space(@class)), ' sportItem')]]"
+)
+
+_HTML_PARSER = lxml_html.HTMLParser(remove_comments=True)
+_UTF8_HTML_PARSER = lxml_html.HTMLParser(remove_comments=True, encoding='utf-8')
+
+
+class PlayerStatRow(NamedTuple):
+    """One row of a statistik result table"""
+    rank: Optional[int]
+    surname: str
+    first_name: str
+    team: str
+    points: Optional[int]
+    games: Optional[int]
+    average: Optional[float]
+    cells: Tuple[str, ...]
+    row_index: int
+
+    @property
+    def full_name(self) -> str:
+        if self.first_name and self.surname:
+            return f"{self.first_name} {self.surname}"
+        return ''
+
+
+def parse_document(content: Union[str, bytes]):
+    """Parse a page into an lxml tree (None for empty content)"""
+    if not content or not content.strip():
+        return None
+    if isinstance(content, str):
+        # lxml rejects str input carrying an encoding declaration
+        document = lxml_html.document_fromstring(content.encode('utf-8'), parser=_UTF8_HTML_PARSER)
+    else:
+        document = lxml_html.document_fromstring(content, parser=_HTML_PARSER)
+
+    # get_text() never includes script/style contents; drop them once (tails are kept)
+    for element in list(document.iter('script', 'style')):
+        element.drop_tree()
+    return document
+
+
+def cell_text(element) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True)"""
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def _to_int(text: str) -> Optional[int]:
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+def _to_float(text: str) -> Optional[float]:
+    try:
+        return float(text.replace(',', '.'))
+    except ValueError:
+        return None
+
+
+class StatistikTable:
+    """A table of a statistik page with lazily extracted rows"""
+
+    def __init__(self, index: int, element, row_cache: Optional[Dict] = None):
+        self.index = index
+        self.element = element
+        # Shared per document: rows of nested tables are only extracted once
+        self.row_cache = row_cache if row_cache is not None else {}
+        self._cells = None
+
+    def _row_cells(self):
+        if self._cells is None:
+            self._cells = []
+            for row in self.element.iter('tr'):
+                cells = self.row_cache.get(row)
+                if cells is None:
+                    cells = [(cell.tag, cell_text(cell)) for cell in row.iter('td', 'th')]
+                    self.row_cache[row] = cells
+                self._cells.append(cells)
+        return self._cells
+
+    @property
+    def rows(self) -> List[List[str]]:
+        """Cell texts (td and th) of every row, nested rows included"""
+        return [[text for _, text in cells] for cells in self._row_cells()]
+
+    @property
+    def data_rows(self) -> List[List[str]]:
+        """Cell texts of td cells only"""
+        return [[text for tag, text in cells if tag == 'td'] for cells in self._row_cells()]
+
+    def caption(self, min_length: int = 5) -> Optional[str]:
+        """Text of the closest preceding sibling element longer than min_length characters"""
+        current = self.element.getprevious()
+        while current is not None:
+            if isinstance(current.tag, str):
+                text = cell_text(current)
+                if len(text) > min_length:
+                    return text
+            current = current.getprevious()
+        return None
+
+
+def parse_tables(content: Union[str, bytes]) -> List[StatistikTable]:
+    """Every table in document order (nested tables included)"""
+    document = parse_document(content)
+    if document is None:
+        return []
+    row_cache = {}
+    return [StatistikTable(index, table, row_cache) for index, table in enumerate(document.iter('table'))]
+
+
+def parse_result_rows(content: Union[str, bytes], min_cells: int = 6) -> List[PlayerStatRow]:
+    """
+    Typed rows of the sportItem result table. Rows with fewer than min_cells
+    cells are skipped; row_index counts all matching rows.
+    """
+    document = parse_document(content)
+    if document is None:
+        return []
+
+    rows = []
+    for row_index, row in enumerate(RESULT_ROWS_XPATH(document)):
+        cells = tuple(cell_text(cell).replace('&nbsp;', '').strip() for cell in row.iter('td'))
+        if len(cells) < min_cells:
+            continue
+        padded = cells + ('',) * (6 - len(cells))
+        rows.append(PlayerStatRow(
+            rank=_to_int(padded[0].rstrip('.')),
+            surname=padded[1],
+            first_name=padded[2],
+            team=padded[3],
+            points=_to_int(padded[4]),
+            games=_to_int(padded[5]),
+            average=_to_float(cells[6]) if len(cells) > 6 else None,
+            cells=cells,
+            row_index=row_index,
+        ))
+    return rows
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Streaming Export
+
+Generators that turn player rows into CSV, NDJSON or Parquet chunks for a
+streamed HTTP response, instead of building a DataFrame and writing a
+timestamp-named file into the working directory first.
+
+- rows come from any iterable of dicts: PlayerIndex.filter() for the loaded
+  players, or iter_cursor_rows() for a SQLite query
+- output is produced in chunks of EXPORT_BATCH_SIZE rows, so memory use does
+  not grow with the export size
+- gzip_chunks() compresses a chunk stream on the fly
+- Parquet needs pyarrow (optional); the row groups are flushed as they are
+  written. Column types come from an explicit schema (e.g. the declared
+  types of a SQLite table, schema_from_declared_types) or are inferred from
+  every row of an in-memory list. SQLite columns are loosely typed, so
+  fit_schema_to_table() turns columns holding values of another storage
+  class into strings before the response starts; a value that still does
+  not fit is converted if that is lossless (3.0 -> 3, '12' -> 12), else
+  written as null and counted, so a stream never aborts halfway
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+EXPORT_BATCH_SIZE = 1000
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+EXPORT_FORMATS = {
+    'csv': {'mimetype': 'text/csv; charset=utf-8', 'extension': 'csv'},
+    'ndjson': {'mimetype': 'application/x-ndjson', 'extension': 'ndjson'},
+    'parquet': {'mimetype': 'application/vnd.apache.parquet', 'extension': 'parquet'},
+}
+
+
+class ExportError(ValueError):
+    """Unsupported export format or missing optional dependency"""
+
+
+def collect_fieldnames(rows: Iterable[Dict]) -> List[str]:
+    """Union of all keys in order of first appearance (the DataFrame column order)"""
+    fieldnames = []
+    seen = set()
+    for row in rows:
+        for key in row:
+            if key not in seen:
+                seen.add(key)
+                fieldnames.append(key)
+    return fieldnames
+
+
+def iter_cursor_rows(cursor, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Dict]:
+    """Rows of an executed sqlite3 cursor as dicts, fetched batch by batch"""
+    columns = [column[0] for column in cursor.description]
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        for row in batch:
+            yield dict(zip(columns, row))
+
+
+def _batches(rows: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(rows: Iterable[Dict], fieldnames: List[str], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    for batch in _batches(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(rows: Iterable[Dict], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    for batch in _batches(rows, batch_size):
+        yield ''.join(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in batch).encode('utf-8')
+
+
+class _ChunkSink:
+    """Write-only file object collecting what the Parquet writer flushes"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+# Inferred column kinds, narrowest first; a column takes the widest kind of its values
+_KINDS = ('bool', 'int', 'float', 'string')
+
+
+def _value_kind(value) -> str:
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    return 'string'
+
+
+def _widen(kind: Optional[str], value) -> Optional[str]:
+    if value is None:
+        return kind
+    value_kind = _value_kind(value)
+    if kind is None or kind == value_kind:
+        return value_kind
+    if 'bool' in (kind, value_kind) or 'string' in (kind, value_kind):
+        return 'string'  # bools mixed with numbers, or text mixed with anything
+    return 'float'  # int and float
+
+
+def _arrow_type(kind: Optional[str]):
+    return {'bool': pa.bool_(), 'int': pa.int64(), 'float': pa.float64()}.get(kind, pa.string())
+
+
+def infer_parquet_schema(rows: Iterable[Dict], fieldnames: List[str]):
+    """
+    Column types from all given rows: int columns with a float become
+    float64, columns mixing numbers and text (or bools) become strings
+    """
+    kinds = dict.fromkeys(fieldnames)
+    for row in rows:
+        for name in fieldnames:
+            kinds[name] = _widen(kinds[name], row.get(name))
+    return pa.schema([(name, _arrow_type(kinds[name])) for name in fieldnames])
+
+
+def schema_from_declared_types(columns: Iterable) -> 'pa.Schema':
+    """Parquet schema from (name, declared SQLite type) pairs, by SQLite's affinity rules"""
+    fields = []
+    for name, declared in columns:
+        declared = (declared or '').upper()
+        if 'BOOL' in declared:
+            arrow_type = pa.bool_()
+        elif 'INT' in declared:
+            arrow_type = pa.int64()
+        elif any(real in declared for real in ('REAL', 'FLOA', 'DOUB')):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append((name, arrow_type))
+    return pa.schema(fields)
+
+
+def fit_schema_to_table(conn, schema, from_clause: str, params=()) -> 'pa.Schema':
+    """
+    schema with every bool / int / float column turned into a string column if
+    one of the rows of from_clause ('table WHERE ...') stores a value of
+    another SQLite storage class in it (one aggregate query)
+    """
+    checks = {}
+    for field in schema:
+        column = f'"{field.name}"'
+        if pa.types.is_boolean(field.type):
+            checks[field.name] = f"typeof({column}) != 'null' AND NOT (typeof({column}) = 'integer' AND {column} IN (0, 1))"
+        elif pa.types.is_int64(field.type):
+            checks[field.name] = f"typeof({column}) NOT IN ('null', 'integer')"
+        elif pa.types.is_float64(field.type):
+            checks[field.name] = f"typeof({column}) NOT IN ('null', 'integer', 'real')"
+    if not checks:
+        return schema
+
+    selects = ', '.join(f"MAX({check})" for check in checks.values())
+    row = conn.execute(f"SELECT {selects} FROM {from_clause}", params).fetchone()
+    mismatched = {name for name, found in zip(checks, row) if found}
+    return pa.schema([(field.name, pa.string()) if field.name in mismatched else field for field in schema])
+
+
+def _parse_number(value):
+    """int or float of a numeric text, None if it is not one"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parquet_value(value, field):
+    """(value for the column, whether it fits); values that do not fit become None"""
+    if value is None:
+        return None, True
+    arrow_type = field.type
+    if pa.types.is_string(arrow_type):
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False, default=str), True
+        return str(value), True
+    if not pa.types.is_boolean(arrow_type) and not pa.types.is_int64(arrow_type) \
+            and not pa.types.is_float64(arrow_type):
+        return value, True
+
+    number = value if _value_kind(value) in ('bool', 'int', 'float') else _parse_number(value)
+    if number is None:
+        return None, False
+    if pa.types.is_boolean(arrow_type):
+        # SQLite stores booleans as 0 / 1
+        if number in (0, 1):
+            return bool(number), True
+    elif pa.types.is_int64(arrow_type):
+        if (not isinstance(number, float) or number.is_integer()) and INT64_MIN <= number <= INT64_MAX:
+            return int(number), True
+    else:
+        return float(number), True
+    return None, False
+
+
+def iter_parquet(rows: Iterable[Dict], fieldnames: List[str], schema=None,
+                 batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    One row group per batch. Without a schema the column types are inferred
+    from all rows, which must then be a list (pass a schema for other
+    iterables, e.g. a database cursor).
+    """
+    if pa is None:
+        raise ExportError("Parquet export requires pyarrow (pip install pyarrow)")
+    if schema is None:
+        if not isinstance(rows, (list, tuple)):
+            raise ExportError("Parquet export of a row stream needs a schema")
+        schema = infer_parquet_schema(rows, fieldnames)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    misfits = {}
+    try:
+        for batch in _batches(rows, batch_size):
+            columns = {}
+            for field in schema:
+                values = []
+                for row in batch:
+                    value, fits = _parquet_value(row.get(field.name), field)
+                    if not fits:
+                        misfits[field.name] = misfits.get(field.name, 0) + 1
+                    values.append(value)
+                columns[field.name] = values
+            writer.write_table(pa.table(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+    if misfits:
+        summary = ', '.join(f"{name}: {count:,}" for name, count in misfits.items())
+        print(f"⚠️ Parquet export wrote values that did not fit their column as null ({summary})")
+
+
+def iter_export(rows: Iterable[Dict], export_format: str, fieldnames: List[str], schema=None) -> Iterator[bytes]:
+    if export_format == 'csv':
+        return iter_csv(rows, fieldnames)
+    if export_format == 'ndjson':
+        return iter_ndjson(rows)
+    if export_format == 'parquet':
+        if pa is None:
+            raise ExportError("Parquet export requires pyarrow (pip install pyarrow)")
+        if schema is None and not isinstance(rows, (list, tuple)):
+            raise ExportError("Parquet export of a row stream needs a schema")
+        return iter_parquet(rows, fieldnames, schema=schema)
+    raise ExportError(f"Unsupported export format '{export_format}' (use {', '.join(EXPORT_FORMATS)})")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a chunk stream into one gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
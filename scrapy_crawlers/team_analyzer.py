@@ -1,79 +1,176 @@
 """
 Team Analysis Module
 Provides team rosters, statistics, and organization information
+
+Uses the shared BasketballStatsEngine (its player dicts and cached advanced
+stats). Teams are indexed once per data version: every (team, liga_id,
+season_id) group keeps its player positions and pre-aggregated totals. Team
+detail payloads are assembled on first request from those groups, memoized
+as JSON and dropped by invalidate() or when the engine reloads its data.
+
+Everything built for one data version lives in one TeamIndex that refresh()
+swaps in with a single assignment, so a request never combines the teams of
+one version with the search index or memoized details of another.
 """
 
 import json
+import threading
 from collections import defaultdict
 from basketball_stats_engine import BasketballStatsEngine
+from player_index import stat_value
+from team_search import DEFAULT_LIMIT, TeamSearchIndex
 
-class TeamAnalyzer:
-    """Analyze team performance and provide detailed team information"""
+# Memoized detail payloads (team / league / season combinations)
+MAX_CACHED_DETAILS = 2048
+
+class TeamIndex:
+    """Teams, groups, search index and memoized details of one engine snapshot"""
     
-    def __init__(self, players_data_path):
-        """Initialize with player data"""
-        with open(players_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+    def __init__(self, snapshot):
+        self.data_version = snapshot.data_version
+        self.players_data = snapshot.players_data
+        self.details_cache = {}
+        teams = {}
+        team_groups = {}
         
-        if isinstance(data, dict) and 'players' in data:
-            self.players_data = data['players']
-        else:
-            self.players_data = data
-            
-        self.stats_engine = BasketballStatsEngine(players_data_path)
-        self._build_team_index()
-        
-    def _build_team_index(self):
-        """Build comprehensive team index"""
-        self.teams = defaultdict(lambda: {
-            'players': [],
-            'leagues': set(),
-            'seasons': set(),
-            'total_points': 0,
-            'total_games': 0,
-            'categories': defaultdict(int)
-        })
-        
-        for player in self.players_data:
+        for position, player in enumerate(self.players_data):
             team = player.get('team', 'Unknown')
             league_id = player.get('liga_id')
             season_id = player.get('season_id')
-            category = player.get('endpoint', '')
-            points = float(player.get('points', 0))
-            games = float(player.get('games', 0))
+            points = stat_value(player, 'points')
+            games = stat_value(player, 'games')
+            
+            team_data = teams.get(team)
+            if team_data is None:
+                team_data = teams[team] = {
+                    'players': [],
+                    'leagues': set(),
+                    'seasons': set(),
+                    'total_points': 0,
+                    'total_games': 0,
+                    'categories': defaultdict(int),
+                    'groups': []
+                }
+            team_data['players'].append(player)
+            team_data['leagues'].add(league_id)
+            team_data['seasons'].add(season_id)
+            team_data['total_points'] += points
+            team_data['total_games'] += games
+            team_data['categories'][player.get('endpoint', '')] += 1
             
-            self.teams[team]['players'].append(player)
-            self.teams[team]['leagues'].add(league_id)
-            self.teams[team]['seasons'].add(season_id)
-            self.teams[team]['total_points'] += points
-            self.teams[team]['total_games'] += games
-            self.teams[team]['categories'][category] += 1
+            # (team, liga_id, season_id) group with its totals
+            key = (team, league_id, season_id)
+            group = team_groups.get(key)
+            if group is None:
+                group = team_groups[key] = {'positions': [], 'total_points': 0, 'total_games': 0}
+                team_data['groups'].append(key)
+            group['positions'].append(position)
+            group['total_points'] += points
+            group['total_games'] += games
+        
+        self.teams = teams
+        self.team_groups = team_groups
+        self.all_teams = sorted([{
+            'name': team_name,
+            'players_count': len(team_data['players']),
+            'leagues': list(team_data['leagues']),
+            'seasons': list(team_data['seasons']),
+            'total_points': team_data['total_points']
+        } for team_name, team_data in teams.items()], key=lambda t: t['total_points'], reverse=True)
+        self.search_index = TeamSearchIndex(
+            teams.keys(), weights={team_name: len(team_data['players']) for team_name, team_data in teams.items()}
+        )
+
+class TeamAnalyzer:
+    """Analyze team performance and provide detailed team information"""
     
-    def get_team_details(self, team_name, league_id=None, season_id=None):
-        """Get comprehensive team details"""
-        if team_name not in self.teams:
+    def __init__(self, stats_engine):
+        """Initialize with the shared stats engine (a players JSON path builds its own)"""
+        if isinstance(stats_engine, str):
+            stats_engine = BasketballStatsEngine(stats_engine)
+        self.stats_engine = stats_engine
+        self.lock = threading.Lock()
+        self.index = None
+        self.refresh()
+    
+    @property
+    def players_data(self):
+        return self.index.players_data
+    
+    @property
+    def teams(self):
+        return self.index.teams
+    
+    @property
+    def search_index(self):
+        return self.index.search_index
+    
+    def refresh(self):
+        """Re-index when the engine loaded other data; returns the current TeamIndex"""
+        snapshot = self.stats_engine.snapshot
+        index = self.index
+        if index is not None and index.data_version == snapshot.data_version:
+            return index
+        with self.lock:
+            if self.index is None or self.index.data_version != snapshot.data_version:
+                self.index = TeamIndex(snapshot)
+            return self.index
+    
+    def invalidate(self, team_name=None):
+        """Drop memoized team details (of one team, or of all teams)"""
+        with self.lock:
+            index = self.index
+            if team_name is None:
+                index.details_cache = {}
+            else:
+                index.details_cache = {
+                    key: payload for key, payload in index.details_cache.items() if key[0] != team_name
+                }
+    
+    def team_details_json(self, team_name, league_id=None, season_id=None):
+        """Team details as a memoized JSON string (None for unknown teams)"""
+        index = self.refresh()
+        key = (team_name, league_id or None, season_id or None)
+        payload = index.details_cache.get(key)
+        if payload is not None:
+            return payload
+        if team_name not in index.teams:
             return None
-            
-        team_data = self.teams[team_name]
         
-        # Filter players by league and season if specified
-        players = team_data['players']
-        if league_id:
-            players = [p for p in players if p.get('liga_id') == league_id]
-        if season_id:
-            players = [p for p in players if p.get('season_id') == season_id]
+        payload = json.dumps(self._build_team_details(index, *key), ensure_ascii=False, default=str)
+        with self.lock:
+            # Stored with the index it was built from, never with a newer one
+            if len(index.details_cache) >= MAX_CACHED_DETAILS:
+                index.details_cache.pop(next(iter(index.details_cache)))
+            index.details_cache[key] = payload
+        return payload
+    
+    def get_team_details(self, team_name, league_id=None, season_id=None):
+        """Get comprehensive team details (a copy of the memoized payload)"""
+        payload = self.team_details_json(team_name, league_id, season_id)
+        return json.loads(payload) if payload is not None else None
+    
+    def _build_team_details(self, index, team_name, league_id, season_id):
+        team_data = index.teams[team_name]
+        
+        # Groups of the requested league / season with their pre-aggregated totals
+        groups = [
+            index.team_groups[key] for key in team_data['groups']
+            if (not league_id or key[1] == league_id) and (not season_id or key[2] == season_id)
+        ]
+        positions = sorted(position for group in groups for position in group['positions'])
+        total_points = sum(group['total_points'] for group in groups)
+        total_games = sum(group['total_games'] for group in groups)
         
-        # Calculate team statistics
-        total_points = sum(float(p.get('points', 0)) for p in players)
-        total_games = sum(float(p.get('games', 0)) for p in players)
+        # Copies with advanced stats; the engine's player dicts stay untouched
+        players = [
+            dict(player, advanced_stats=self.stats_engine.get_advanced_stats(player))
+            for player in (index.players_data[position] for position in positions)
+        ]
         avg_ppg = total_points / len(players) if players else 0
         
         # Get top performers
-        top_scorers = sorted(players, key=lambda p: float(p.get('points', 0)), reverse=True)[:5]
-        
-        # Calculate advanced team stats
-        for player in players:
-            player['advanced_stats'] = self.stats_engine.calculate_advanced_stats(player)
+        top_scorers = sorted(players, key=lambda p: stat_value(p, 'points'), reverse=True)[:5]
         
         # Organization info (special case for BG Litzendorf)
         organization_info = self.get_organization_info(team_name)
@@ -159,7 +256,7 @@ class TeamAnalyzer:
             'top_scorer': None
         })
         
-        for player in self.players_data:
+        for player in self.refresh().players_data:
             if (player.get('liga_id') == league_id and 
                 player.get('season_id') == season_id):
                 
@@ -197,33 +294,28 @@ class TeamAnalyzer:
     
     def get_all_teams(self):
         """Get list of all teams"""
-        teams_list = []
-        for team_name, team_data in self.teams.items():
-            teams_list.append({
+        return self.refresh().all_teams
+    
+    def search_teams(self, query, limit=DEFAULT_LIMIT):
+        """Search teams by name (ranked, typo tolerant, prefix autocomplete)"""
+        index = self.refresh()
+        results = []
+        
+        for team_name, score in index.search_index.search(query, limit):
+            team_data = index.teams[team_name]
+            results.append({
                 'name': team_name,
+                'score': score,
                 'players_count': len(team_data['players']),
                 'leagues': list(team_data['leagues']),
-                'seasons': list(team_data['seasons']),
-                'total_points': team_data['total_points']
+                'seasons': list(team_data['seasons'])
             })
         
-        return sorted(teams_list, key=lambda t: t['total_points'], reverse=True)
-    
-    def search_teams(self, query):
-        """Search teams by name"""
-        query = query.lower()
-        results = []
-        
-        for team_name in self.teams.keys():
-            if query in team_name.lower():
-                results.append({
-                    'name': team_name,
-                    'players_count': len(self.teams[team_name]['players']),
-                    'leagues': list(self.teams[team_name]['leagues']),
-                    'seasons': list(self.teams[team_name]['seasons'])
-                })
-        
         return results
+    
+    def suggest_teams(self, team_name, limit=10):
+        """Known team names similar to team_name"""
+        return self.refresh().search_index.suggest(team_name, limit)
 
 def main():
     """Test the team analyzer"""
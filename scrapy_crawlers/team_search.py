@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Team Search Index
+
+Prebuilt name index for team search, autocomplete and "did you mean"
+suggestions, instead of substring tests over every team name per request:
+
+- names are normalized once: lower case, umlauts / ß folded (ä -> ae,
+  ß -> ss), other accents stripped, punctuation removed; names with umlauts
+  are also indexed with the plain vowel (ü -> u), so "wuerzburg",
+  "würzburg" and "wurzburg" all find Würzburg
+- token prefix index: sorted tokens, so a (partial) query token is a bisect
+  plus the tokens sharing the prefix (autocomplete)
+- trigram index: trigram -> teams, for substring and typo-tolerant matches
+- results are ranked and limited:
+
+      exact name  >  name prefix  >  every query token prefixes a name token
+      >  substring  >  trigram similarity (Dice coefficient >= MIN_SIMILARITY)
+
+  ties go to the shorter name, then to the team with more players
+
+Postings are NumPy arrays; a query counts shared trigrams with one bincount
+and ranks with one sort over the candidates, so it stays well below a
+millisecond for tens of thousands of team names.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_LIMIT = 20
+MIN_SIMILARITY = 0.35
+
+SCORE_EXACT = 1.0
+SCORE_NAME_PREFIX = 0.9
+SCORE_TOKEN_PREFIX = 0.8
+SCORE_SUBSTRING = 0.7
+# Fuzzy matches score similarity * SCORE_FUZZY, below every tier above
+SCORE_FUZZY = 0.6
+
+_FOLDS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+_PLAIN = str.maketrans({'ß': 'ss'})
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+def normalize_team_name(name, fold_umlauts: bool = True) -> str:
+    """'TSV Weißenburg-Süd' -> 'tsv weissenburg sued' ('tsv weissenburg sud' without folding)"""
+    text = unicodedata.normalize('NFC', str(name or '')).lower()
+    text = text.translate(_FOLDS if fold_umlauts else _PLAIN)
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(' ', text).strip()
+
+
+def trigrams(normalized: str) -> set:
+    padded = f" {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _postings(index: Dict[str, List[int]]) -> Dict[str, np.ndarray]:
+    return {key: np.array(ids, dtype=np.int32) for key, ids in index.items()}
+
+
+class TeamSearchIndex:
+    """Token prefix and trigram indexes over team names"""
+
+    def __init__(self, team_names: Iterable[str], weights: Optional[Dict[str, float]] = None):
+        """weights (e.g. players per team) break ties between equally ranked names"""
+        self.names = list(team_names)
+        weights = weights or {}
+        # Folded and plain-vowel spelling per team (the same for most names)
+        self.variants = [
+            tuple(dict.fromkeys((normalize_team_name(name), normalize_team_name(name, fold_umlauts=False))))
+            for name in self.names
+        ]
+
+        token_ids = {}
+        gram_ids = {}
+        gram_counts = []
+        full_names = []
+        for team_id, variants in enumerate(self.variants):
+            grams = set().union(*(trigrams(variant) for variant in variants))
+            gram_counts.append(len(grams))
+            for gram in grams:
+                gram_ids.setdefault(gram, []).append(team_id)
+            for token in {token for variant in variants for token in variant.split()}:
+                token_ids.setdefault(token, []).append(team_id)
+            full_names.extend((variant, team_id) for variant in variants)
+
+        self._tokens = sorted(token_ids)
+        self._token_postings = [np.array(token_ids[token], dtype=np.int32) for token in self._tokens]
+        self._by_trigram = _postings(gram_ids)
+        self._gram_counts = np.array(gram_counts, dtype=np.float64)
+        full_names.sort()
+        self._full_names = [variant for variant, _ in full_names]
+        self._full_name_ids = np.array([team_id for _, team_id in full_names], dtype=np.int32)
+
+        # Tie-break rank: shorter name, more players, then alphabetical
+        ranked = sorted(range(len(self.names)), key=lambda team_id: (
+            len(self.variants[team_id][0]), -weights.get(self.names[team_id], 0), self.names[team_id]
+        ))
+        self._tie_rank = np.empty(len(self.names), dtype=np.int64)
+        self._tie_rank[ranked] = np.arange(len(ranked))
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def _prefix_range(sorted_keys: List[str], prefix: str) -> Tuple[int, int]:
+        start = bisect_left(sorted_keys, prefix)
+        # '\uffff' sorts after every character of a normalized name
+        return start, bisect_left(sorted_keys, prefix + '\uffff', start)
+
+    def _token_prefix_mask(self, tokens: List[str]) -> np.ndarray:
+        """Teams where every query token prefixes one of the name's tokens"""
+        matched = np.ones(len(self.names), dtype=bool)
+        for token in tokens:
+            start, end = self._prefix_range(self._tokens, token)
+            token_mask = np.zeros(len(self.names), dtype=bool)
+            if end > start:
+                token_mask[np.concatenate(self._token_postings[start:end])] = True
+            matched &= token_mask
+        return matched
+
+    def search(self, query, limit: int = DEFAULT_LIMIT) -> List[Tuple[str, float]]:
+        """Best matching (team name, score) pairs, best first"""
+        query = normalize_team_name(query)
+        if not query or limit <= 0 or not self.names:
+            return []
+
+        # Autocomplete: token prefixes, then whole-name prefixes and exact names
+        scores = np.where(self._token_prefix_mask(query.split()), SCORE_TOKEN_PREFIX, 0.0)
+        start, end = self._prefix_range(self._full_names, query)
+        prefixed = self._full_name_ids[start:end]
+        scores[prefixed] = SCORE_NAME_PREFIX
+        while start < end and self._full_names[start] == query:
+            scores[self._full_name_ids[start]] = SCORE_EXACT
+            start += 1
+
+        # Substring and typo-tolerant matches rank below every prefix match,
+        # so they are only needed while the prefix matches leave room
+        fuzzy = None
+        if np.count_nonzero(scores) < limit:
+            query_grams = trigrams(query)
+            shared = self._shared_trigrams(query_grams)
+            similarity = 2 * shared / (len(query_grams) + self._gram_counts)
+            fuzzy = np.where(similarity >= MIN_SIMILARITY, similarity * SCORE_FUZZY, 0.0)
+            tiers = fuzzy
+            if len(query) >= 3:
+                # Substring candidates contain every trigram inside the query
+                inner_grams = {query[i:i + 3] for i in range(len(query) - 2)}
+                contains_all = self._shared_trigrams(inner_grams) == len(inner_grams)
+                tiers = np.where(contains_all, SCORE_SUBSTRING, fuzzy)
+            scores = np.maximum(scores, tiers)
+
+        candidates = np.flatnonzero(scores)
+        ranked = candidates[np.lexsort((self._tie_rank[candidates], -scores[candidates]))]
+
+        results = []
+        demoted = []
+        for team_id in ranked:
+            score = scores[team_id]
+            if score == SCORE_SUBSTRING and not any(query in variant for variant in self.variants[team_id]):
+                # Trigrams in other places: keep the similarity score instead
+                if fuzzy[team_id]:
+                    demoted.append((fuzzy[team_id], team_id))
+                continue
+            results.append((score, team_id))
+            if len(results) == limit:
+                break
+        if demoted:
+            results = sorted(results + demoted, key=lambda item: (-item[0], self._tie_rank[item[1]]))[:limit]
+        return [(self.names[team_id], round(float(score), 3)) for score, team_id in results]
+
+    def _shared_trigrams(self, grams) -> np.ndarray:
+        """Number of the given trigrams in each team's names"""
+        postings = [self._by_trigram.get(gram, _EMPTY) for gram in grams]
+        return np.bincount(np.concatenate(postings), minlength=len(self.names)).astype(np.float64)
+
+    def suggest(self, query, limit: int = 10) -> List[str]:
+        """Team names for a "did you mean" list"""
+        return [name for name, _ in self.search(query, limit)]
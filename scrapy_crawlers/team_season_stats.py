@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Incremental team_season_stats
+
+Keeps team_season_stats of basketball_analytics.db in step with the matches
+table without recomputing every team from the source JSON:
+
+- triggers on matches queue the (team_permanent_id, season_year, league_id)
+  keys touched by an inserted, updated or deleted match in
+  team_season_stats_dirty; the old and the new teams of a changed match are
+  both queued
+- refresh() recomputes only the queued keys from their matches through the
+  team / league indexes (games, wins, losses, points for/against,
+  differential, averages), writes the rows that changed and deletes keys
+  without games left; refresh(full=True) aggregates all keys in one pass
+- every written or deleted row is recorded in team_season_stats_changes, so
+  readers can follow what changed (/api/analytics/changes)
+- apply_matches() upserts match rows (e.g. from CurrentSeasonScraper or a
+  re-crawl) and refreshes; unchanged matches do not touch the stats
+
+The numbers follow build_basketball_analytics_db: a match counts once both
+teams are known and the result contains ':'; a tie counts as a loss for both.
+"""
+
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+STATS_KEY = ('team_permanent_id', 'season_year', 'league_id')
+STATS_FIELDS = ('games_played', 'wins', 'losses', 'points_for', 'points_against')
+
+MATCH_COLUMNS = (
+    'match_id', 'league_id', 'season_year', 'match_day', 'match_no', 'kickoff_date', 'kickoff_time',
+    'home_team_id', 'guest_team_id', 'home_team_name', 'guest_team_name', 'result',
+    'home_score', 'guest_score', 'confirmed', 'cancelled', 'forfeit'
+)
+# Columns whose change can move a match between teams or change its numbers
+STATS_MATCH_COLUMNS = ('home_team_id', 'guest_team_id', 'season_year', 'league_id',
+                       'result', 'home_score', 'guest_score')
+
+MATCH_UPSERT = f'''
+    INSERT INTO matches ({', '.join(MATCH_COLUMNS)})
+    VALUES ({', '.join('?' * len(MATCH_COLUMNS))})
+    ON CONFLICT(match_id) DO UPDATE SET
+        {', '.join(f'{column} = excluded.{column}' for column in MATCH_COLUMNS[1:])}
+    WHERE ({', '.join(f'matches.{column}' for column in MATCH_COLUMNS[1:])})
+        IS NOT ({', '.join(f'excluded.{column}' for column in MATCH_COLUMNS[1:])})
+'''
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS team_season_stats_dirty (
+        team_permanent_id INTEGER,
+        season_year INTEGER,
+        league_id INTEGER,
+        PRIMARY KEY (team_permanent_id, season_year, league_id)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS team_season_stats_changes (
+        change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        team_permanent_id INTEGER,
+        season_year INTEGER,
+        league_id INTEGER,
+        change_type TEXT,
+        games_played INTEGER,
+        wins INTEGER,
+        losses INTEGER,
+        points_for INTEGER,
+        points_against INTEGER,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+
+def _queue_keys(row: str) -> str:
+    # An OR IGNORE in a trigger would give way to the conflict policy of the
+    # statement firing it (the match upsert); DO NOTHING is not overridden
+    return f'''
+        INSERT INTO team_season_stats_dirty (team_permanent_id, season_year, league_id)
+        SELECT {row}.home_team_id, {row}.season_year, {row}.league_id WHERE {row}.home_team_id IS NOT NULL
+        UNION ALL
+        SELECT {row}.guest_team_id, {row}.season_year, {row}.league_id WHERE {row}.guest_team_id IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    '''
+
+
+TRIGGERS = {
+    'matches_stats_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS matches_stats_insert AFTER INSERT ON matches
+        BEGIN {_queue_keys('NEW')} END
+    ''',
+    'matches_stats_update': f'''
+        CREATE TRIGGER IF NOT EXISTS matches_stats_update
+        AFTER UPDATE OF {', '.join(STATS_MATCH_COLUMNS)} ON matches
+        BEGIN {_queue_keys('OLD')} {_queue_keys('NEW')} END
+    ''',
+    'matches_stats_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS matches_stats_delete AFTER DELETE ON matches
+        BEGIN {_queue_keys('OLD')} END
+    ''',
+}
+
+# Played matches from the home and the guest side, summed per key
+_SIDES = '''
+    SELECT home_team_id AS team_permanent_id, season_year, league_id,
+           COALESCE(home_score, 0) AS points_for, COALESCE(guest_score, 0) AS points_against
+    FROM matches
+    WHERE home_team_id AND guest_team_id AND result LIKE '%:%' {home_filter}
+    UNION ALL
+    SELECT guest_team_id, season_year, league_id, COALESCE(guest_score, 0), COALESCE(home_score, 0)
+    FROM matches
+    WHERE home_team_id AND guest_team_id AND result LIKE '%:%' {guest_filter}
+'''
+_TOTALS = 'COUNT(*), SUM(points_for > points_against), SUM(points_for <= points_against), SUM(points_for), SUM(points_against)'
+
+# Full refresh: one pass over matches
+ALL_KEY_TOTALS = f'''
+    SELECT team_permanent_id, season_year, league_id, {_TOTALS}
+    FROM ({_SIDES.format(home_filter='', guest_filter='')})
+    GROUP BY team_permanent_id, season_year, league_id
+'''
+# Incremental refresh: one key through the team / league indexes of matches
+KEY_TOTALS = f'''
+    SELECT {_TOTALS}
+    FROM ({_SIDES.format(
+        home_filter='AND home_team_id = :team AND season_year = :season AND league_id = :league',
+        guest_filter='AND guest_team_id = :team AND season_year = :season AND league_id = :league')})
+'''
+
+STATS_UPSERT = '''
+    INSERT INTO team_season_stats
+    (team_permanent_id, season_year, league_id, games_played, wins, losses,
+     points_for, points_against, point_differential, avg_points_for, avg_points_against)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(team_permanent_id, season_year, league_id) DO UPDATE SET
+        games_played = excluded.games_played,
+        wins = excluded.wins,
+        losses = excluded.losses,
+        points_for = excluded.points_for,
+        points_against = excluded.points_against,
+        point_differential = excluded.point_differential,
+        avg_points_for = excluded.avg_points_for,
+        avg_points_against = excluded.avg_points_against
+'''
+
+# Teams that show up in new matches get a teams row (seasons from their matches)
+TEAMS_UPSERT = '''
+    INSERT INTO teams (team_permanent_id, team_name, first_seen_season, last_seen_season, total_seasons)
+    SELECT team_id, MAX(team_name), MIN(season_year), MAX(season_year), COUNT(DISTINCT season_year)
+    FROM (
+        SELECT home_team_id AS team_id, home_team_name AS team_name, season_year
+        FROM matches WHERE home_team_id = ?
+        UNION ALL
+        SELECT guest_team_id, guest_team_name, season_year
+        FROM matches WHERE guest_team_id = ?
+    )
+    GROUP BY team_id
+    ON CONFLICT(team_permanent_id) DO UPDATE SET
+        first_seen_season = MIN(COALESCE(teams.first_seen_season, excluded.first_seen_season), excluded.first_seen_season),
+        last_seen_season = MAX(COALESCE(teams.last_seen_season, excluded.last_seen_season), excluded.last_seen_season),
+        total_seasons = excluded.total_seasons
+'''
+
+
+class TeamSeasonStatsAggregator:
+    """Incremental maintenance of team_season_stats on an open analytics connection"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def ensure_schema(self) -> bool:
+        """
+        Dirty queue, change log, triggers and a unique key on team_season_stats.
+        Returns True when the triggers were just installed; changes made
+        before that were not tracked and need a full refresh.
+        """
+        existing = {row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        for sql in SCHEMA:
+            self.conn.execute(sql)
+
+        has_unique_key = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_team_season_stats_key'").fetchone()
+        if not has_unique_key:
+            # Earlier builds could insert a key twice; keep the latest row
+            self.conn.execute('''
+                DELETE FROM team_season_stats WHERE id NOT IN (
+                    SELECT MAX(id) FROM team_season_stats
+                    GROUP BY team_permanent_id, season_year, league_id
+                )
+            ''')
+            self.conn.execute('''
+                CREATE UNIQUE INDEX idx_team_season_stats_key
+                ON team_season_stats (team_permanent_id, season_year, league_id)
+            ''')
+
+        for sql in TRIGGERS.values():
+            self.conn.execute(sql)
+        self.conn.commit()
+        return not set(TRIGGERS) <= existing
+
+    def mark_all_dirty(self):
+        """Queue every key that has matches or a stats row"""
+        self.conn.execute('''
+            INSERT OR IGNORE INTO team_season_stats_dirty (team_permanent_id, season_year, league_id)
+            SELECT home_team_id, season_year, league_id FROM matches WHERE home_team_id IS NOT NULL
+            UNION
+            SELECT guest_team_id, season_year, league_id FROM matches WHERE guest_team_id IS NOT NULL
+            UNION
+            SELECT team_permanent_id, season_year, league_id FROM team_season_stats
+        ''')
+
+    def pending(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM team_season_stats_dirty').fetchone()[0]
+
+    def refresh(self, full: bool = False) -> Dict[str, int]:
+        """Recompute the queued keys (all keys with full=True) and log what changed"""
+        started = time.perf_counter()
+        if self.ensure_schema():
+            full = True
+        if full:
+            self.mark_all_dirty()
+
+        computed = {}
+        if full:
+            for row in self.conn.execute(ALL_KEY_TOTALS):
+                computed[tuple(row[:3])] = tuple(row[3:])
+        else:
+            # Per key: the queue has no planner statistics, a join would scan matches
+            dirty = self.conn.execute('SELECT * FROM team_season_stats_dirty').fetchall()
+            for key in dirty:
+                totals = self.conn.execute(KEY_TOTALS, dict(zip(('team', 'season', 'league'), key))).fetchone()
+                if totals[0]:
+                    computed[key] = totals
+
+        current = {}
+        for row in self.conn.execute(f'''
+            SELECT s.team_permanent_id, s.season_year, s.league_id, {', '.join('s.' + f for f in STATS_FIELDS)}
+            FROM team_season_stats_dirty d
+            CROSS JOIN team_season_stats s USING (team_permanent_id, season_year, league_id)
+        '''):
+            current[tuple(row[:3])] = tuple(row[3:])
+
+        upserts = []
+        changes = []
+        for key, totals in computed.items():
+            previous = current.get(key)
+            if previous == totals:
+                continue
+            games, wins, losses, points_for, points_against = totals
+            upserts.append(key + totals + (
+                points_for - points_against,
+                points_for / max(games, 1),
+                points_against / max(games, 1)
+            ))
+            changes.append(key + ('insert' if previous is None else 'update',) + totals)
+        deletes = [key for key in current if key not in computed]
+        changes.extend(key + ('delete',) + (None,) * len(STATS_FIELDS) for key in deletes)
+
+        self.conn.executemany(STATS_UPSERT, upserts)
+        self.conn.executemany('''
+            DELETE FROM team_season_stats
+            WHERE team_permanent_id = ? AND season_year = ? AND league_id = ?
+        ''', deletes)
+        self.conn.executemany(f'''
+            INSERT INTO team_season_stats_changes
+            ({', '.join(STATS_KEY)}, change_type, {', '.join(STATS_FIELDS)})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', changes)
+
+        checked = self.conn.execute('SELECT COUNT(*) FROM team_season_stats_dirty').fetchone()[0]
+        self.conn.execute('DELETE FROM team_season_stats_dirty')
+        self.conn.commit()
+
+        summary = {
+            'checked': checked,
+            'inserted': sum(1 for change in changes if change[3] == 'insert'),
+            'updated': sum(1 for change in changes if change[3] == 'update'),
+            'deleted': len(deletes),
+        }
+        print(f"📈 team_season_stats: {summary['checked']} keys checked, {summary['inserted']} new, "
+              f"{summary['updated']} updated, {summary['deleted']} removed "
+              f"({time.perf_counter() - started:.2f}s)")
+        return summary
+
+    def apply_matches(self, matches: Iterable[Sequence]) -> Dict[str, int]:
+        """Upsert match rows (MATCH_COLUMNS order) and refresh the affected stats"""
+        self.ensure_schema()
+        matches = list(matches)
+        self.conn.executemany(MATCH_UPSERT, matches)
+        team_ids = {team_id for match in matches for team_id in (match[7], match[8]) if team_id}
+        self.conn.executemany(TEAMS_UPSERT, [(team_id, team_id) for team_id in team_ids])
+        self.conn.commit()
+        return self.refresh()
+
+    def changes_since(self, change_id: int = 0, limit: int = 500) -> List[Dict]:
+        rows = self.conn.execute(f'''
+            SELECT change_id, {', '.join(STATS_KEY)}, change_type, {', '.join(STATS_FIELDS)}, changed_at
+            FROM team_season_stats_changes
+            WHERE change_id > ?
+            ORDER BY change_id
+            LIMIT ?
+        ''', (change_id, limit)).fetchall()
+        columns = ('change_id',) + STATS_KEY + ('change_type',) + STATS_FIELDS + ('changed_at',)
+        return [dict(zip(columns, row)) for row in rows]
+
+
+def _season_year(season_name) -> Optional[int]:
+    """'2025/26' / '2025/2026' / 2025 -> 2025"""
+    digits = str(season_name or '')[:4]
+    return int(digits) if digits.isdigit() else None
+
+
+def _team_id(team: Dict):
+    return team.get('teamPermanentId') or team.get('id')
+
+
+def match_row_from_competition(league: Dict, match: Dict) -> Optional[tuple]:
+    """
+    Match row for a match of the /rest/competition/actual payload used by
+    CurrentSeasonScraper (None if the match has no id or season)
+    """
+    season_year = _season_year(league.get('season'))
+    match_id = match.get('id')
+    if not match_id or season_year is None:
+        return None
+    home_team = match.get('homeTeam', {}) or {}
+    away_team = match.get('awayTeam', {}) or {}
+    home_score = match.get('homeScore')
+    away_score = match.get('awayScore')
+    result = f"{home_score}:{away_score}" if home_score is not None and away_score is not None else ''
+    kickoff = str(match.get('date') or '')
+    return (
+        match_id, league['id'], season_year, match.get('matchDay'), match.get('matchNo'),
+        kickoff[:10], kickoff[11:16], _team_id(home_team), _team_id(away_team),
+        home_team.get('name', ''), away_team.get('name', ''), result,
+        home_score or 0, away_score or 0, match.get('status') == 'FINISHED', False, False
+    )